@@ -1,7 +1,10 @@
 """
 services/aggregator/aggregator.py
 =================================
-Aggregates 1-min candles into 30-min candles
+Aggregates 1-min candles into 30-min candles, and folds each one into
+the 30m streaming indicators (shared/indicators.py): the values are
+stored on the 30m candle and the state in indicator_state. The 1m
+indicators are folded by the ingestor as each minute closes.
 """
 import asyncio
 import sys
@@ -9,10 +12,18 @@ import os
 from datetime import datetime, timedelta, timezone
 
 sys.path.insert(0, '/app/shared')
-from mongo_client import MongoDB
+from mongo_client import MongoDB, AsyncMongoDB
+from latency import stamp
+from indicators import IndicatorFeed
 import config
 
 db = MongoDB()
+adb = AsyncMongoDB(db)
+
+# 1m fields the aggregation reads
+AGG_FIELDS = ('open', 'high', 'low', 'close', 'range', 'tick_count', 'timing')
+
+indicators_30m = IndicatorFeed(adb, config.SYMBOL, '30m')
 
 def floor_30min(dt):
     """Floor to 30-min boundary"""
@@ -26,7 +37,7 @@ async def aggregate():
     window_start = window_end - timedelta(minutes=30)
     
     # Check if already exists
-    existing = db.db[config.COLL_30M].find_one({
+    existing = await adb.run(db.db[config.COLL_30M].find_one, {
         'symbol': config.SYMBOL,
         'window_start': window_start
     })
@@ -35,10 +46,11 @@ async def aggregate():
         return
     
     # Get 1-min candles
-    candles_1m = db.get_1m_candles(
+    candles_1m = await adb.get_1m_candles(
         config.SYMBOL,
         window_start,
-        window_end
+        window_end,
+        fields=AGG_FIELDS
     )
     
     if len(candles_1m) < 25:  # Need at least 25/30 candles
@@ -68,9 +80,21 @@ async def aggregate():
         'created_at': datetime.utcnow()
     }
     
-    db.save_30m_candle(candle_30m)
+    # Carry the closing 1m candle's timing forward
+    timing = stamp(candles_1m[-1].get('timing'), 'window_end', window_end)
+    candle_30m['timing'] = stamp(timing, 'aggregated')
+    
+    # Indicators: each closed candle is folded in exactly once
+    candle_30m['indicators'] = await indicators_30m.close(candle_30m)
+    
+    await adb.save_30m_candle(candle_30m)
+    await indicators_30m.save()
     
     print(f"[AGGREGATOR] Saved 30m: {window_start} | Range:{total_range:.4f} | Candles:{len(candles_1m)}")
+    
+    if db.cache:
+        s = db.cache_stats()[config.COLL_1M]
+        print(f"[AGGREGATOR] 1m cache: {s['hits']} hits / {s['misses']} misses ({s['hit_rate']:.0%})")
 
 async def scheduler():
     """Wait for 30-min boundaries"""
@@ -9,11 +9,12 @@ import os
 from datetime import datetime, timedelta, timezone
 
 sys.path.insert(0, '/app/shared')
-from mongo_client import MongoDB
-from deriv_api import DerivAPI
+from mongo_client import MongoDB, AsyncMongoDB
+from deriv_api import DerivAPI, CANDLES_PER_REQUEST
 import config
 
 db = MongoDB()
+adb = AsyncMongoDB(db)
 
 def floor_minute(dt):
     """Floor to minute"""
@@ -36,9 +37,9 @@ async def check_gaps():
         expected.append(current)
         current += timedelta(minutes=1)
     
-    # Get existing candles
-    existing = db.get_1m_candles(config.SYMBOL, start_time, end_time + timedelta(minutes=1))
-    existing_times = {c['minute_start'] for c in existing}
+    # Get existing candles (Mongo returns naive UTC datetimes)
+    existing = await adb.get_1m_candles(config.SYMBOL, start_time, end_time + timedelta(minutes=1))
+    existing_times = {c['minute_start'].replace(tzinfo=timezone.utc) for c in existing}
     
     # Find gaps
     gaps = [t for t in expected if t not in existing_times]
@@ -49,42 +50,62 @@ async def check_gaps():
     
     print(f"[BACKFILL] Found {len(gaps)} gaps. Filling...")
     
-    # Fill gaps
+    # History in pages of at most CANDLES_PER_REQUEST minutes, each starting
+    # at the next unfilled gap, then one bulk upsert
     api = DerivAPI(use_auth=False)
     await api.connect()
     
-    for gap_time in gaps:
-        try:
-            start_epoch = int(gap_time.timestamp())
-            end_epoch = int((gap_time + timedelta(minutes=1)).timestamp()) - 1
+    gap_set = set(gaps)
+    filled = []
+    pages = 0
+    
+    try:
+        i = 0
+        while i < len(gaps):
+            page_start = gaps[i]
+            page_end = page_start + timedelta(minutes=CANDLES_PER_REQUEST)
             
             candles = await api.get_candles_history(
                 config.SYMBOL,
-                start_epoch,
-                end_epoch
+                int(page_start.timestamp()),
+                int(min(page_end, gaps[-1] + timedelta(minutes=1)).timestamp()) - 1
             )
+            pages += 1
             
-            if candles:
-                for c in candles:
-                    candle = {
-                        'symbol': config.SYMBOL,
-                        'minute_start': datetime.fromtimestamp(c['epoch'], timezone.utc),
-                        'open': float(c['open']),
-                        'high': float(c['high']),
-                        'low': float(c['low']),
-                        'close': float(c['close']),
-                        'range': abs(float(c['close']) - float(c['open'])),  # Approx
-                        'tick_count': 30,
-                        'filled': True,
-                        'created_at': datetime.utcnow()
-                    }
-                    db.save_1m_candle(candle)
-                    print(f"[BACKFILL] Filled: {gap_time}")
+            for c in candles or []:
+                minute_start = datetime.fromtimestamp(c['epoch'], timezone.utc)
+                if minute_start not in gap_set:
+                    continue
+                filled.append({
+                    'symbol': config.SYMBOL,
+                    'minute_start': minute_start,
+                    'open': float(c['open']),
+                    'high': float(c['high']),
+                    'low': float(c['low']),
+                    'close': float(c['close']),
+                    'range': abs(float(c['close']) - float(c['open'])),  # Approx
+                    'tick_count': 30,
+                    'filled': True,
+                    'created_at': datetime.utcnow()
+                })
             
-            await asyncio.sleep(0.5)
-            
-        except Exception as e:
-            print(f"[BACKFILL] Error filling {gap_time}: {e}")
+            while i < len(gaps) and gaps[i] < page_end:
+                i += 1
+        
+        if filled:
+            stats = await adb.save_1m_candles_bulk(filled)
+            upserted = sum(b['upserted'] for b in stats)
+            print(f"[BACKFILL] Filled {len(filled)}/{len(gaps)} gaps ({upserted} new) "
+                  f"from {pages} history page(s) in {len(stats)} batch(es)")
+        else:
+            print("[BACKFILL] History returned no candles for the gaps")
+        
+    except Exception as e:
+        print(f"[BACKFILL] Error filling {gaps[0]} → {gaps[-1]}: {e}")
+    
+    missing = sorted(gap_set - {c['minute_start'] for c in filled})
+    if missing:
+        print(f"[BACKFILL] ⚠️  {len(missing)} minutes still unfilled between {missing[0]} and {missing[-1]}")
     
     await api.close()
 
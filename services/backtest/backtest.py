@@ -0,0 +1,353 @@
+"""
+services/backtest/backtest.py
+=============================
+Vectorized backtest of the 010+doji strategy on stored candles.
+
+Candles are loaded once into NumPy arrays. Signals, SL/TP levels and
+multipliers are computed for every bar at once with the same rules as the
+detector (c1 bullish, c2 and c3 not bullish, c3 a doji) and the executor
+(plan_order: SL = doji low - SL_BUFFER_PCT * doji range, TP = doji high,
+breathing-room multiplier, sl_usd capped at 95% of stake). The first bar
+that touches SL or TP is found for all trades together over a sliding
+window; only the cheap stake/balance bookkeeping runs trade by trade.
+
+Positions are simulated as the Deriv contracts the executor actually
+opens: direction 0 is MULTDOWN, so the contract loses sl_usd when price
+rises by the SL distance and makes tp_usd when it falls by the TP
+distance. When SL and TP are both inside the same 30m bar the SL is
+assumed to fill first (conservative).
+
+    python backtest.py --days 365
+    python backtest.py --since 2024-01-01 --until 2025-01-01 --symbol R_50 --trades-csv trades.csv
+"""
+import argparse
+import csv
+import heapq
+import sys
+from datetime import datetime, timedelta
+
+import numpy as np
+
+sys.path.insert(0, '/app/shared')
+from calculator import calculate_stake
+import calculator_vec
+import config
+
+BAR = np.timedelta64(30, 'm')
+
+# Strategy parameters a run can override (defaults from shared/config.py)
+PARAM_KEYS = (
+    'doji_threshold',
+    'breathing_multiple',
+    'sl_buffer_pct',
+    'base_stake',
+    'stake_increment',
+    'profit_milestone',
+)
+
+def default_params():
+    return {
+        'doji_threshold': config.DOJI_THRESHOLD,
+        'breathing_multiple': config.BREATHING_MULTIPLE,
+        'sl_buffer_pct': config.SL_BUFFER_PCT,
+        'base_stake': config.BASE_STAKE,
+        'stake_increment': config.STAKE_INCREMENT,
+        'profit_milestone': config.PROFIT_MILESTONE,
+        'initial_balance': 1000.0,
+        'max_hold_bars': 48 * 14,
+        'commission_pct': 0.0,
+    }
+
+# ----------------------------------------------------------------------
+# Data
+# ----------------------------------------------------------------------
+def load_candles(db, symbol, start, end):
+    """30m candles in [start, end) as arrays: t (datetime64[ms]), open, high, low, close, range"""
+    cursor = db[config.COLL_30M].find(
+        {'symbol': symbol, 'window_start': {'$gte': start, '$lt': end}},
+        {'_id': 0, 'window_start': 1, 'open': 1, 'high': 1, 'low': 1, 'close': 1, 'range': 1}
+    ).sort('window_start', 1)
+    rows = list(cursor)
+
+    return {
+        't': np.array([r['window_start'] for r in rows], dtype='datetime64[ms]'),
+        'open': np.array([r['open'] for r in rows], dtype=float),
+        'high': np.array([r['high'] for r in rows], dtype=float),
+        'low': np.array([r['low'] for r in rows], dtype=float),
+        'close': np.array([r['close'] for r in rows], dtype=float),
+        'range': np.array([r.get('range', r['high'] - r['low']) for r in rows], dtype=float),
+    }
+
+# ----------------------------------------------------------------------
+# Vectorized strategy maths
+# ----------------------------------------------------------------------
+def find_signals(candles, doji_threshold):
+    """Indices of c3 bars completing bullish -> not bullish -> not-bullish doji (detector rules)"""
+    o, h, l, c = candles['open'], candles['high'], candles['low'], candles['close']
+    if len(c) < 3:
+        return np.array([], dtype=int)
+
+    bull = calculator_vec.is_bullish(o, c)
+    doji = calculator_vec.is_doji(o, h, l, c, doji_threshold)
+
+    sig = bull[:-2] & ~bull[1:-1] & ~bull[2:] & doji[2:]
+    return np.nonzero(sig)[0] + 2
+
+def plan_orders(candles, idx, breathing_multiple, sl_buffer_pct):
+    """Per-signal entry, SL/TP prices and multiplier (executor plan_order rules, stake-free part)"""
+    entry = candles['close'][idx]
+    sl_price = candles['low'][idx] - sl_buffer_pct * candles['range'][idx]
+    tp_price = candles['high'][idx]
+    sl_dist = entry - sl_price
+
+    multiplier = calculator_vec.calculate_multiplier(entry, sl_price, breathing_multiple)
+
+    return {
+        'idx': idx,
+        'entry': entry,
+        'sl_price': sl_price,
+        'tp_price': tp_price,
+        'sl_pct': sl_dist / entry,
+        'tp_pct': (tp_price - entry) / entry,
+        'multiplier': multiplier,
+    }
+
+def exit_levels(plan, direction):
+    """
+    Price levels at which each contract hits SL and TP. The SL loss is
+    capped at 95% of stake, i.e. at a 0.95 / multiplier price move.
+    """
+    with np.errstate(divide='ignore'):
+        sl_move = np.minimum(plan['sl_pct'], 0.95 / plan['multiplier'])
+    tp_move = plan['tp_pct']
+    entry = plan['entry']
+
+    if direction == 1:
+        return entry * (1 - sl_move), entry * (1 + tp_move)
+    return entry * (1 + sl_move), entry * (1 - tp_move)
+
+def resolve_exits(candles, plan, direction, max_hold_bars):
+    """
+    First bar after entry whose range reaches the SL or TP move, for all
+    trades at once. Returns (exit_idx, outcome, ambiguous) where outcome is
+    'SL', 'TP' or 'TIMEOUT'.
+    """
+    h, l = candles['high'], candles['low']
+    n = len(h)
+    idx = plan['idx']
+    H = max(1, min(max_hold_bars, n))
+
+    sl_level, tp_level = exit_levels(plan, direction)
+
+    pad_h = np.concatenate([h, np.full(H, np.nan)])
+    pad_l = np.concatenate([l, np.full(H, np.nan)])
+    win_h = np.lib.stride_tricks.sliding_window_view(pad_h, H)[idx + 1]
+    win_l = np.lib.stride_tricks.sliding_window_view(pad_l, H)[idx + 1]
+
+    if direction == 1:
+        hit_sl = win_l <= sl_level[:, None]
+        hit_tp = win_h >= tp_level[:, None]
+    else:
+        hit_sl = win_h >= sl_level[:, None]
+        hit_tp = win_l <= tp_level[:, None]
+
+    never = H + 1
+    first_sl = np.where(hit_sl.any(axis=1), hit_sl.argmax(axis=1), never)
+    first_tp = np.where(hit_tp.any(axis=1), hit_tp.argmax(axis=1), never)
+
+    outcome = np.where(first_sl <= first_tp, 'SL', 'TP')
+    outcome = np.where((first_sl == never) & (first_tp == never), 'TIMEOUT', outcome)
+    offset = np.minimum(first_sl, first_tp)
+    offset = np.where(offset == never, H - 1, offset)
+    exit_idx = np.minimum(idx + 1 + offset, n - 1)
+    ambiguous = (first_sl == first_tp) & (first_sl != never)
+
+    return exit_idx, outcome, ambiguous
+
+def bar_exits(candles, plan, direction, params):
+    """Default exit resolver: first touching 30m bar, timeouts exit at that bar's close"""
+    exit_idx, outcome, ambiguous = resolve_exits(candles, plan, direction, params['max_hold_bars'])
+    return {
+        'outcome': outcome,
+        'ambiguous': ambiguous,
+        'exit_time': candles['t'][exit_idx] + BAR,
+        'exit_price': candles['close'][exit_idx],
+    }
+
+# ----------------------------------------------------------------------
+# Sequential sizing and bookkeeping
+# ----------------------------------------------------------------------
+def simulate(candles, params=None, direction=0, exit_resolver=bar_exits):
+    """
+    Run the strategy over `candles`. Returns {'trades': [...], 'equity':
+    [(time, balance)], 'metrics': {...}}.
+
+    exit_resolver(candles, plan, direction, params) returns per-trade
+    arrays outcome, ambiguous, exit_time and exit_price; swap it to resolve
+    fills on finer data (see fills.py). 'SL' and 'TP' settle at exactly
+    -sl_usd / +tp_usd; any other outcome (TIMEOUT, GAP) settles at
+    exit_price, and a loss reaching the stake is a STOP_OUT.
+    """
+    p = default_params()
+    p.update(params or {})
+
+    idx = find_signals(candles, p['doji_threshold'])
+    plan = plan_orders(candles, idx, p['breathing_multiple'], p['sl_buffer_pct'])
+
+    tradable = (plan['multiplier'] > 0) & (plan['tp_pct'] > 0) & (idx < len(candles['close']) - 1)
+    plan = {k: v[tradable] for k, v in plan.items()}
+
+    exits = exit_resolver(candles, plan, direction, p)
+    outcome, ambiguous, exit_time = exits['outcome'], exits['ambiguous'], exits['exit_time']
+
+    t = candles['t']
+    balance = p['initial_balance']
+    open_positions = []  # heap of (exit_time, n, stake, pnl)
+    trades = []
+    equity = [(t[0] if len(t) else None, balance)]
+
+    for n in range(len(plan['idx'])):
+        i = plan['idx'][n]
+        entry_time = t[i] + BAR
+
+        # Settle everything that closed before this entry
+        while open_positions and open_positions[0][0] <= entry_time:
+            closed_at, _, stake, pnl = heapq.heappop(open_positions)
+            balance += stake + pnl
+            equity.append((closed_at, balance))
+
+        stake = calculate_stake(balance, p['base_stake'], p['stake_increment'], p['profit_milestone'])
+        if stake > balance:
+            continue
+        mult = plan['multiplier'][n]
+
+        sl_usd = min(round(float(stake * mult * plan['sl_pct'][n]), 2), stake * 0.95)
+        tp_usd = round(float(stake * mult * plan['tp_pct'][n]), 2)
+        if sl_usd <= 0 or tp_usd <= 0:
+            continue
+
+        result = str(outcome[n])
+        if result == 'SL':
+            pnl = -sl_usd
+        elif result == 'TP':
+            pnl = tp_usd
+        else:
+            move = (exits['exit_price'][n] - plan['entry'][n]) / plan['entry'][n]
+            pnl = stake * mult * (move if direction == 1 else -move)
+            if pnl <= -stake:
+                # Deriv closes the contract once the loss reaches the stake
+                pnl, result = -stake, 'STOP_OUT'
+            elif result == 'GAP':
+                # Price jumped through SL: filled at the next available price
+                result = 'SL'
+        pnl -= stake * mult * p['commission_pct']
+
+        balance -= stake
+        heapq.heappush(open_positions, (exit_time[n], n, stake, pnl))
+        trades.append({
+            'entry_time': entry_time.astype(datetime),
+            'exit_time': exit_time[n].astype(datetime),
+            'entry_price': float(plan['entry'][n]),
+            'sl_price': float(plan['sl_price'][n]),
+            'tp_price': float(plan['tp_price'][n]),
+            'stake': stake,
+            'multiplier': int(mult),
+            'sl_usd': sl_usd,
+            'tp_usd': tp_usd,
+            'outcome': result,
+            'ambiguous': bool(ambiguous[n]),
+            'pnl': round(float(pnl), 2),
+        })
+
+    while open_positions:
+        closed_at, _, stake, pnl = heapq.heappop(open_positions)
+        balance += stake + pnl
+        equity.append((closed_at, balance))
+
+    return {'trades': trades, 'equity': equity, 'metrics': metrics(trades, equity, p['initial_balance'])}
+
+def metrics(trades, equity, initial_balance):
+    pnl = np.array([tr['pnl'] for tr in trades], dtype=float)
+    curve = np.array([b for _, b in equity], dtype=float)
+    peak = np.maximum.accumulate(curve) if len(curve) else curve
+    wins, losses = pnl[pnl > 0], pnl[pnl <= 0]
+
+    return {
+        'trades': len(trades),
+        'win_rate': float(len(wins) / len(pnl)) if len(pnl) else 0.0,
+        'net_pnl': float(pnl.sum()),
+        'final_balance': float(curve[-1]) if len(curve) else initial_balance,
+        'return_pct': float((curve[-1] / initial_balance - 1) * 100) if len(curve) else 0.0,
+        'max_drawdown': float((peak - curve).max()) if len(curve) else 0.0,
+        'max_drawdown_pct': float(((peak - curve) / peak).max() * 100) if len(curve) else 0.0,
+        'profit_factor': float(wins.sum() / -losses.sum()) if losses.sum() < 0 else float('inf'),
+        'avg_win': float(wins.mean()) if len(wins) else 0.0,
+        'avg_loss': float(losses.mean()) if len(losses) else 0.0,
+        'timeouts': sum(tr['outcome'] == 'TIMEOUT' for tr in trades),
+        'ambiguous': sum(tr['ambiguous'] for tr in trades),
+    }
+
+def print_metrics(m):
+    print(
+        f"[BACKTEST] Trades: {m['trades']} | Win rate: {m['win_rate']:.1%} | "
+        f"Net P&L: ${m['net_pnl']:.2f} ({m['return_pct']:+.1f}%) | Final: ${m['final_balance']:.2f}"
+    )
+    print(
+        f"[BACKTEST] Max DD: ${m['max_drawdown']:.2f} ({m['max_drawdown_pct']:.1f}%) | "
+        f"PF: {m['profit_factor']:.2f} | Avg win: ${m['avg_win']:.2f} | Avg loss: ${m['avg_loss']:.2f} | "
+        f"Timeouts: {m['timeouts']} | SL/TP same bar: {m['ambiguous']}"
+    )
+
+def write_csv(path, rows):
+    if not rows:
+        return
+    with open(path, 'w', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=list(rows[0]))
+        writer.writeheader()
+        writer.writerows(rows)
+
+def main():
+    parser = argparse.ArgumentParser(description="Vectorized 010+doji backtest on stored 30m candles")
+    parser.add_argument('--symbol', default=config.SYMBOL)
+    parser.add_argument('--days', type=float, default=365)
+    parser.add_argument('--since', help="start (ISO date, UTC)")
+    parser.add_argument('--until', help="end (ISO date, UTC)")
+    parser.add_argument('--balance', type=float, default=1000.0, help="initial balance")
+    parser.add_argument('--fills', choices=['30m', '1m'], default='30m',
+                        help="resolve SL/TP on 30m bars or walk stored 1m candles")
+    parser.add_argument('--trades-csv', help="write the trade list here")
+    parser.add_argument('--equity-csv', help="write the equity curve here")
+    for key in PARAM_KEYS:
+        parser.add_argument(f"--{key.replace('_', '-')}", type=float)
+    args = parser.parse_args()
+
+    end = datetime.fromisoformat(args.until) if args.until else datetime.utcnow()
+    start = datetime.fromisoformat(args.since) if args.since else end - timedelta(days=args.days)
+    params = {k: getattr(args, k) for k in PARAM_KEYS if getattr(args, k) is not None}
+    params['initial_balance'] = args.balance
+
+    from mongo_client import MongoDB
+    mongo = MongoDB()
+    candles = load_candles(mongo.db, args.symbol, start, end)
+    print(f"[BACKTEST] {args.symbol}: {len(candles['close'])} 30m candles {start:%Y-%m-%d} → {end:%Y-%m-%d}")
+
+    resolver = bar_exits
+    if args.fills == '1m':
+        from fills import load_1m_path, path_exits
+        path = load_1m_path(mongo, args.symbol, start, end)
+        print(f"[BACKTEST] Resolving fills on {len(path['t'])} 1m candles")
+        resolver = path_exits(path)
+
+    t0 = datetime.utcnow()
+    result = simulate(candles, params, exit_resolver=resolver)
+    print(f"[BACKTEST] Simulated in {(datetime.utcnow() - t0).total_seconds() * 1000:.0f}ms")
+    print_metrics(result['metrics'])
+
+    if args.trades_csv:
+        write_csv(args.trades_csv, result['trades'])
+    if args.equity_csv:
+        write_csv(args.equity_csv, [{'time': t.astype(datetime) if t is not None else '', 'balance': b}
+                                    for t, b in result['equity']])
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,176 @@
+"""
+services/backtest/fills.py
+==========================
+Intra-candle fill simulation on a finer price path.
+
+A 30m bar that spans both the SL and the TP level cannot tell which was
+touched first. This resolver walks a finer path after each entry instead:
+stored 1m candles, or ticks (a path whose bars have zero length and
+open = high = low = close). All open trades are scanned together, a chunk
+of path bars at a time; trades drop out as soon as they are resolved, so
+most of the horizon is never touched.
+
+Per trade it reports:
+  SL / TP    first path bar reaching the level (SL wins ties, flagged
+             ambiguous; with ticks there are no ties)
+  GAP        the bar opened beyond SL already: filled at that open, and
+             the backtest applies Deriv's stop-out if the loss reaches
+             the stake
+  TIMEOUT    neither within max_hold_bars: exit at the last close
+
+Trades the path does not cover keep their 30m-bar result: no path bar
+at the entry itself, or a hole in the path (consecutive bars further
+apart than max_gap: one bar for 1m candles) before the trade resolved.
+
+    python backtest.py --days 365 --fills 1m
+"""
+import sys
+
+import numpy as np
+
+sys.path.insert(0, '/app/shared')
+from backtest import BAR, bar_exits, exit_levels
+
+MINUTE = np.timedelta64(1, 'm')
+TICK_GAP = np.timedelta64(30, 's')
+
+def load_1m_path(mongo, symbol, start, end):
+    """Stored 1m candles in [start, end) as a path"""
+    cols = mongo.get_1m_columns(symbol, start, end)
+    path = {'t': np.array(cols['minute_start'], dtype='datetime64[ms]'), 'bar': MINUTE, 'max_gap': MINUTE}
+    for field in ('open', 'high', 'low', 'close'):
+        path[field] = np.asarray(cols[field], dtype=float)
+    return path
+
+def tick_path(times, prices, max_gap=TICK_GAP):
+    """Path from raw ticks (e.g. a ticks_history download); a longer silence is a hole"""
+    prices = np.asarray(prices, dtype=float)
+    return {
+        't': np.asarray(times, dtype='datetime64[ms]'),
+        'open': prices,
+        'high': prices,
+        'low': prices,
+        'close': prices,
+        'bar': np.timedelta64(0, 'ms'),
+        'max_gap': max_gap,
+    }
+
+def simulate_fills(path, entry_time, sl_level, tp_level, direction, max_hold, chunk=120):
+    """
+    Resolve every trade on `path` within max_hold path bars (a scalar or
+    one horizon per trade). Returns a dict of per-trade arrays: outcome,
+    ambiguous, exit_time, exit_price, covered (a path bar at the entry)
+    and truncated (the path ended or had a hole before the trade resolved).
+    """
+    t, o, h, l, c = path['t'], path['open'], path['high'], path['low'], path['close']
+    n, T = len(t), len(entry_time)
+    max_gap = path.get('max_gap', path['bar'])
+
+    entry = np.asarray(entry_time, dtype='datetime64[ms]')
+    pos = np.searchsorted(t, entry, side='left')
+    covered = pos < n
+    covered[covered] = t[pos[covered]] - entry[covered] < max_gap
+
+    # Scan each trade up to the last bar before the first hole after its entry
+    holes = np.nonzero(np.diff(t) > max_gap)[0]
+    last = np.append(holes, n - 1)[np.searchsorted(holes, pos)]
+    end = np.minimum(pos + max_hold, last + 1)
+
+    outcome = np.full(T, 'TIMEOUT', dtype='<U8')
+    ambiguous = np.zeros(T, dtype=bool)
+    exit_pos = np.maximum(end - 1, 0)
+    exit_price = np.full(T, np.nan)
+
+    W = max(1, chunk)
+    pad = lambda a: np.concatenate([a, np.full(W, np.nan)])
+    win_h = np.lib.stride_tricks.sliding_window_view(pad(h), W)
+    win_l = np.lib.stride_tricks.sliding_window_view(pad(l), W)
+
+    cur = pos.copy()
+    active = np.nonzero(covered & (pos < end))[0]
+
+    while active.size:
+        start = cur[active]
+        # Columns past each trade's own horizon don't count
+        inside = np.arange(W)[None, :] < (end[active] - start)[:, None]
+        sl, tp = sl_level[active][:, None], tp_level[active][:, None]
+
+        if direction == 1:
+            hit_sl = (win_l[start] <= sl) & inside
+            hit_tp = (win_h[start] >= tp) & inside
+        else:
+            hit_sl = (win_h[start] >= sl) & inside
+            hit_tp = (win_l[start] <= tp) & inside
+
+        never = W + 1
+        first_sl = np.where(hit_sl.any(axis=1), hit_sl.argmax(axis=1), never)
+        first_tp = np.where(hit_tp.any(axis=1), hit_tp.argmax(axis=1), never)
+        done = (first_sl != never) | (first_tp != never)
+
+        rows = active[done]
+        fs, ft = first_sl[done], first_tp[done]
+        first = np.minimum(fs, ft)
+        at = start[done] + first
+        sl_first = fs <= ft
+
+        bar_open = o[at]
+        gapped = sl_first & ((bar_open <= sl_level[rows]) if direction == 1 else (bar_open >= sl_level[rows]))
+        gapped &= at > pos[rows]  # the entry bar's open is the entry itself
+
+        outcome[rows] = np.where(sl_first, np.where(gapped, 'GAP', 'SL'), 'TP')
+        ambiguous[rows] = (fs == ft)
+        exit_pos[rows] = at
+        exit_price[rows] = np.where(gapped, bar_open, np.where(sl_first, sl_level[rows], tp_level[rows]))
+
+        # Advance the rest by one chunk
+        rest = active[~done]
+        cur[rest] += W
+        active = rest[cur[rest] < end[rest]]
+
+    timeout = outcome == 'TIMEOUT'
+    safe_pos = np.clip(exit_pos, 0, max(n - 1, 0))
+    if n:
+        exit_price[timeout] = c[safe_pos[timeout]]
+        exit_time = t[safe_pos] + path['bar']
+    else:
+        exit_time = np.asarray(entry_time, dtype='datetime64[ms]')
+
+    return {
+        'outcome': outcome,
+        'ambiguous': ambiguous,
+        'exit_time': exit_time,
+        'exit_price': exit_price,
+        'covered': covered,
+        'truncated': timeout & (end < pos + max_hold),
+    }
+
+def path_exits(path, chunk=120):
+    """
+    Exit resolver for backtest.simulate() that settles trades on `path`,
+    falling back to 30m bars where the path has no data.
+    """
+    bars_per_30m = int(BAR / path['bar']) if path['bar'] else None
+
+    def resolve(candles, plan, direction, params):
+        fallback = bar_exits(candles, plan, direction, params)
+        if not len(plan['idx']):
+            return fallback
+
+        entry_time = candles['t'][plan['idx']] + BAR
+        sl_level, tp_level = exit_levels(plan, direction)
+        if bars_per_30m:
+            max_hold = params['max_hold_bars'] * bars_per_30m
+        else:
+            # Ticks: bound by the same wall-clock horizon
+            horizon = entry_time + params['max_hold_bars'] * BAR
+            max_hold = np.maximum(np.searchsorted(path['t'], horizon) - np.searchsorted(path['t'], entry_time), 1)
+
+        fills = simulate_fills(path, entry_time, sl_level, tp_level, direction, max_hold, chunk)
+        use = fills['covered'] & ~fills['truncated']
+
+        return {
+            key: np.where(use, fills[key], fallback[key]).astype(fills[key].dtype)
+            for key in ('outcome', 'ambiguous', 'exit_time', 'exit_price')
+        }
+
+    return resolve
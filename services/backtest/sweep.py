@@ -0,0 +1,203 @@
+"""
+services/backtest/sweep.py
+==========================
+Parallel parameter sweep over the backtest engine.
+
+Candle history is read from MongoDB once and copied into a
+multiprocessing shared-memory block; every worker in the pool maps the
+same block as NumPy views, so workers neither re-query Mongo nor receive
+pickled copies of the arrays. Each task is one parameter combination.
+
+Parameters are given as name=spec, where spec is a list ("0.5,0.7,0.85")
+or a range ("0.5:0.95:0.05", end inclusive). The full grid is evaluated,
+or --random N combinations drawn from it. Results are ranked by one or
+more metrics; prefix a metric with "-" to prefer lower values.
+
+    python sweep.py --days 730 --param doji_threshold=0.5:0.95:0.05 --param sl_buffer_pct=0,0.01,0.05
+    python sweep.py --param breathing_multiple=1.2:2.5:0.1 --param base_stake=5:25:5 \\
+        --random 500 --rank return_pct,-max_drawdown_pct --min-trades 30 --csv sweep.csv
+"""
+import argparse
+import csv
+import itertools
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timedelta
+from multiprocessing import shared_memory
+
+import numpy as np
+
+sys.path.insert(0, '/app/shared')
+import config
+from backtest import PARAM_KEYS, load_candles, metrics, simulate
+
+FIELDS = ('t', 'open', 'high', 'low', 'close', 'range')
+
+# ----------------------------------------------------------------------
+# Shared memory
+# ----------------------------------------------------------------------
+def share_candles(candles):
+    """Copy candle arrays into one shared block: rows = FIELDS, t stored as int64 ms"""
+    n = len(candles['close'])
+    shm = shared_memory.SharedMemory(create=True, size=max(1, len(FIELDS) * n * 8))
+    block = np.ndarray((len(FIELDS), n), dtype=np.float64, buffer=shm.buf)
+    block.view(np.int64)[0] = candles['t'].astype('datetime64[ms]').astype(np.int64)
+    for row, field in enumerate(FIELDS[1:], start=1):
+        block[row] = candles[field]
+    return shm, n
+
+def attach_candles(name, n):
+    """NumPy views over a shared block created by share_candles()"""
+    shm = shared_memory.SharedMemory(name=name)
+    block = np.ndarray((len(FIELDS), n), dtype=np.float64, buffer=shm.buf)
+    candles = {'t': block.view(np.int64)[0].astype('datetime64[ms]')}
+    for row, field in enumerate(FIELDS[1:], start=1):
+        candles[field] = block[row]
+    return shm, candles
+
+# Per-worker state, set by the pool initializer
+_worker = {}
+
+def _init_worker(name, n, base_params):
+    shm, candles = attach_candles(name, n)
+    _worker.update(shm=shm, candles=candles, base=base_params)
+
+def _evaluate(combo):
+    params = dict(_worker['base'])
+    params.update(combo)
+    try:
+        return combo, simulate(_worker['candles'], params)['metrics'], None
+    except Exception as e:
+        return combo, None, str(e)
+
+# ----------------------------------------------------------------------
+# Parameter space
+# ----------------------------------------------------------------------
+def parse_spec(spec):
+    """'a,b,c' -> [a, b, c]; 'start:stop:step' -> inclusive range"""
+    if ':' in spec:
+        start, stop, step = (float(x) for x in spec.split(':'))
+        count = int(round((stop - start) / step)) + 1
+        return [round(start + i * step, 10) for i in range(count)]
+    return [float(x) for x in spec.split(',')]
+
+def build_space(param_args):
+    space = {}
+    for arg in param_args:
+        name, _, spec = arg.partition('=')
+        if name not in PARAM_KEYS:
+            raise SystemExit(f"[SWEEP] Unknown parameter {name!r}; choose from {', '.join(PARAM_KEYS)}")
+        space[name] = parse_spec(spec)
+    return space
+
+def combinations(space, sample=None, seed=None):
+    names = list(space)
+    total = 1
+    for values in space.values():
+        total *= len(values)
+
+    if sample is None or sample >= total:
+        return [dict(zip(names, values)) for values in itertools.product(*space.values())]
+
+    # Draw distinct grid points without materialising the whole grid
+    rng = random.Random(seed)
+    picks = rng.sample(range(total), sample)
+    combos = []
+    for k in picks:
+        combo = {}
+        for name in reversed(names):
+            k, i = divmod(k, len(space[name]))
+            combo[name] = space[name][i]
+        combos.append(combo)
+    return combos
+
+def check_rank_keys(keys):
+    """Fail before the sweep, not after it, on a metric that does not exist"""
+    known = list(metrics([], [], 1.0))
+    unknown = [k for k in keys if (k[1:] if k.startswith('-') else k) not in known]
+    if unknown or not keys:
+        raise SystemExit(f"[SWEEP] Unknown --rank metric(s) {unknown}; choose from {', '.join(known)}")
+
+def rank(results, keys, min_trades=0):
+    """Sort (combo, metrics) pairs by metric keys; '-key' sorts ascending"""
+    def sort_key(item):
+        m = item[1]
+        return tuple(m[k[1:]] if k.startswith('-') else -m[k] for k in keys)
+
+    eligible = [r for r in results if r[1]['trades'] >= min_trades]
+    return sorted(eligible, key=sort_key)
+
+def main():
+    parser = argparse.ArgumentParser(description="Parallel strategy parameter sweep")
+    parser.add_argument('--symbol', default=config.SYMBOL)
+    parser.add_argument('--days', type=float, default=365)
+    parser.add_argument('--since', help="start (ISO date, UTC)")
+    parser.add_argument('--until', help="end (ISO date, UTC)")
+    parser.add_argument('--balance', type=float, default=1000.0, help="initial balance")
+    parser.add_argument('--param', action='append', default=[], help="name=a,b,c or name=start:stop:step")
+    parser.add_argument('--random', type=int, help="evaluate N random grid points instead of the full grid")
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--rank', default='return_pct,-max_drawdown_pct', help="comma-separated metrics")
+    parser.add_argument('--min-trades', type=int, default=0)
+    parser.add_argument('--top', type=int, default=20)
+    parser.add_argument('--workers', type=int, help="pool size (default: CPU count)")
+    parser.add_argument('--csv', help="write every result here")
+    args = parser.parse_args()
+
+    space = build_space(args.param)
+    if not space:
+        raise SystemExit("[SWEEP] Give at least one --param")
+    combos = combinations(space, args.random, args.seed)
+    rank_keys = [k.strip() for k in args.rank.split(',') if k.strip()]
+    check_rank_keys(rank_keys)
+
+    end = datetime.fromisoformat(args.until) if args.until else datetime.utcnow()
+    start = datetime.fromisoformat(args.since) if args.since else end - timedelta(days=args.days)
+
+    from mongo_client import MongoDB
+    candles = load_candles(MongoDB().db, args.symbol, start, end)
+    print(f"[SWEEP] {args.symbol}: {len(candles['close'])} 30m candles, {len(combos)} combinations")
+
+    shm, n = share_candles(candles)
+    results = []
+    t0 = time.perf_counter()
+    try:
+        with ProcessPoolExecutor(
+            max_workers=args.workers,
+            initializer=_init_worker,
+            initargs=(shm.name, n, {'initial_balance': args.balance})
+        ) as pool:
+            for done, (combo, m, error) in enumerate(pool.map(_evaluate, combos, chunksize=16), start=1):
+                if error:
+                    print(f"[SWEEP] ❌ {combo}: {error}")
+                else:
+                    results.append((combo, m))
+                if done % 100 == 0 or done == len(combos):
+                    elapsed = time.perf_counter() - t0
+                    print(f"[SWEEP] {done}/{len(combos)} done ({done / elapsed:.0f}/s)")
+    finally:
+        shm.close()
+        shm.unlink()
+
+    # Results first, so nothing computed is lost whatever happens next
+    if args.csv and results:
+        with open(args.csv, 'w', newline='') as f:
+            writer = csv.DictWriter(f, fieldnames=list(space) + list(results[0][1]))
+            writer.writeheader()
+            for combo, m in results:
+                writer.writerow({**combo, **m})
+        print(f"[SWEEP] {len(results)} results written to {args.csv}")
+
+    ranked = rank(results, rank_keys, args.min_trades)
+    print(f"\n[SWEEP] Top {min(args.top, len(ranked))} by {', '.join(rank_keys)}:")
+    for combo, m in ranked[:args.top]:
+        params = ' '.join(f"{k}={v:g}" for k, v in combo.items())
+        print(
+            f"  {params:<60} trades={m['trades']:<5} win={m['win_rate']:.1%} "
+            f"ret={m['return_pct']:+.1f}% dd={m['max_drawdown_pct']:.1f}% pf={m['profit_factor']:.2f}"
+        )
+
+if __name__ == '__main__':
+    main()
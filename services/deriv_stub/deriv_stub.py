@@ -0,0 +1,464 @@
+"""
+services/deriv_stub/deriv_stub.py
+=================================
+Local stand-in for the Deriv WebSocket API, for offline load and latency
+benchmarking. Point any service at it with WS_URL=ws://<host>:8765.
+
+Speaks the subset of the protocol we use:
+    authorize, balance (+subscribe), proposal (+subscribe), buy (with
+    parameters or by proposal id), proposal_open_contract (+subscribe),
+    ticks (+subscribe), ticks_history, forget, ping, time
+
+Prices are a per-symbol random walk. Open multiplier contracts are marked
+to market on every tick and closed on take profit, stop loss or stop out,
+which pushes both the contract update and the new balance.
+
+Environment:
+    STUB_SYMBOLS           symbol:ticks_per_second list (R_50:1,R_100:1)
+    STUB_VOLATILITY        per-tick log-return stdev (0.0002)
+    STUB_LATENCY_MS        added before every response (0)
+    STUB_JITTER_MS         uniform extra 0..N ms per response (0)
+    STUB_DISCONNECT_PROB   chance to drop a connection per request (0)
+    STUB_DISCONNECT_EVERY  drop every connection every N seconds (0 = off)
+    STUB_BALANCE           starting demo balance (10000)
+    STUB_PROPOSAL_TTL      seconds a proposal id stays buyable (60)
+    STUB_SEED              RNG seed (unset = random)
+
+Request latency is injected into responses only; pushes (ticks, balance,
+contract updates) are sent immediately so their order is preserved.
+"""
+import asyncio
+import itertools
+import json
+import math
+import os
+import random
+import time
+
+import websockets
+
+HOST = os.getenv('STUB_HOST', '0.0.0.0')
+PORT = int(os.getenv('STUB_PORT', 8765))
+SYMBOLS = {
+    s.split(':')[0]: float(s.split(':')[1]) if ':' in s else 1.0
+    for s in os.getenv('STUB_SYMBOLS', 'R_50:1,R_100:1').split(',') if s
+}
+VOLATILITY = float(os.getenv('STUB_VOLATILITY', 0.0002))
+LATENCY_MS = float(os.getenv('STUB_LATENCY_MS', 0))
+JITTER_MS = float(os.getenv('STUB_JITTER_MS', 0))
+DISCONNECT_PROB = float(os.getenv('STUB_DISCONNECT_PROB', 0))
+DISCONNECT_EVERY = float(os.getenv('STUB_DISCONNECT_EVERY', 0))
+START_BALANCE = float(os.getenv('STUB_BALANCE', 10000))
+PROPOSAL_TTL = float(os.getenv('STUB_PROPOSAL_TTL', 60))
+
+rng = random.Random(os.getenv('STUB_SEED'))
+ids = itertools.count(int(time.time()) * 1000)
+
+
+class Market:
+    """Random-walk price feed for one symbol"""
+
+    def __init__(self, symbol, tick_rate):
+        self.symbol = symbol
+        self.tick_rate = tick_rate
+        self.price = 100.0 + rng.random() * 100
+        self.epoch = int(time.time())
+        self.listeners = []
+        self.proposal_listeners = []
+
+    def step(self):
+        self.price *= math.exp(rng.gauss(0, VOLATILITY))
+        self.epoch = int(time.time())
+        return self.tick()
+
+    def tick(self):
+        return {
+            'symbol': self.symbol,
+            'quote': round(self.price, 4),
+            'epoch': self.epoch,
+            'id': str(next(ids)),
+        }
+
+    async def run(self):
+        interval = 1.0 / self.tick_rate
+        while True:
+            await asyncio.sleep(interval)
+            tick = self.step()
+            account.mark_to_market(self.symbol, tick)
+            for session, sub_id, req in list(self.listeners):
+                session.push({
+                    'msg_type': 'tick',
+                    'tick': tick,
+                    'echo_req': req,
+                    'req_id': req.get('req_id'),
+                    'subscription': {'id': sub_id},
+                })
+            for session, sub_id, req in list(self.proposal_listeners):
+                session.push({
+                    'msg_type': 'proposal',
+                    'proposal': quote(req, self),
+                    'echo_req': req,
+                    'req_id': req.get('req_id'),
+                    'subscription': {'id': sub_id},
+                })
+
+
+class Account:
+    """Single shared demo account with open multiplier contracts"""
+
+    def __init__(self, balance):
+        self.loginid = 'VRTC0000001'
+        self.balance = balance
+        self.contracts = {}
+        self.balance_listeners = []
+        self.contract_listeners = {}
+
+    def balance_payload(self):
+        return {'balance': round(self.balance, 2), 'currency': 'USD', 'loginid': self.loginid}
+
+    def push_balance(self):
+        for session, sub_id, req in list(self.balance_listeners):
+            session.push({
+                'msg_type': 'balance',
+                'balance': self.balance_payload(),
+                'echo_req': req,
+                'req_id': req.get('req_id'),
+                'subscription': {'id': sub_id},
+            })
+
+    def buy(self, params):
+        market = markets.get(params.get('symbol'))
+        if market is None:
+            return None, {'code': 'InvalidSymbol', 'message': 'Unknown symbol'}
+
+        stake = float(params['amount'])
+        if stake > self.balance:
+            return None, {'code': 'InsufficientBalance', 'message': 'Insufficient balance'}
+
+        self.balance -= stake
+        contract_id = next(ids)
+        limit_order = params.get('limit_order') or {}
+        self.contracts[contract_id] = {
+            'contract_id': contract_id,
+            'underlying': market.symbol,
+            'contract_type': params['contract_type'],
+            'multiplier': int(params['multiplier']),
+            'buy_price': stake,
+            'entry_spot': market.price,
+            'current_spot': market.price,
+            'date_start': int(time.time()),
+            'stop_loss': limit_order.get('stop_loss'),
+            'take_profit': limit_order.get('take_profit'),
+            'profit': 0.0,
+            'is_sold': 0,
+            'status': 'open',
+        }
+        self.push_balance()
+
+        return {
+            'contract_id': contract_id,
+            'buy_price': stake,
+            'balance_after': round(self.balance, 2),
+            'start_time': int(time.time()),
+            'transaction_id': next(ids),
+            'longcode': f"{params['contract_type']} {market.symbol} x{params['multiplier']}",
+        }, None
+
+    def mark_to_market(self, symbol, tick):
+        for c in list(self.contracts.values()):
+            if c['underlying'] != symbol or c['is_sold']:
+                continue
+
+            side = 1 if c['contract_type'] == 'MULTUP' else -1
+            move = (tick['quote'] / c['entry_spot'] - 1) * side
+            c['current_spot'] = tick['quote']
+            c['profit'] = round(c['buy_price'] * c['multiplier'] * move, 2)
+
+            if c['profit'] <= -c['buy_price']:
+                self._close(c, tick, -c['buy_price'])
+            elif c['stop_loss'] and c['profit'] <= -float(c['stop_loss']):
+                self._close(c, tick, -float(c['stop_loss']))
+            elif c['take_profit'] and c['profit'] >= float(c['take_profit']):
+                self._close(c, tick, float(c['take_profit']))
+
+            self.push_contract(c)
+
+    def _close(self, c, tick, profit):
+        c['profit'] = round(profit, 2)
+        c['sell_price'] = round(c['buy_price'] + profit, 2)
+        c['sell_time'] = tick['epoch']
+        c['exit_tick'] = tick['quote']
+        c['exit_tick_time'] = tick['epoch']
+        c['is_sold'] = 1
+        c['status'] = 'won' if profit > 0 else 'lost'
+        self.balance += c['sell_price']
+        self.push_balance()
+
+    def contract_payload(self, c):
+        limit_order = {'stop_out': {'order_amount': -c['buy_price']}}
+        if c['stop_loss']:
+            limit_order['stop_loss'] = {'order_amount': -float(c['stop_loss'])}
+        if c['take_profit']:
+            limit_order['take_profit'] = {'order_amount': float(c['take_profit'])}
+        payload = {k: v for k, v in c.items() if k not in ('stop_loss', 'take_profit')}
+        payload['limit_order'] = limit_order
+        payload['bid_price'] = round(max(0.0, c['buy_price'] + c['profit']), 2)
+        return payload
+
+    def push_contract(self, c):
+        for session, sub_id, req in list(self.contract_listeners.get(c['contract_id'], [])):
+            session.push({
+                'msg_type': 'proposal_open_contract',
+                'proposal_open_contract': self.contract_payload(c),
+                'echo_req': req,
+                'req_id': req.get('req_id'),
+                'subscription': {'id': sub_id},
+            })
+
+
+def quote(req, market):
+    """Fresh single-use proposal for a proposal request; expired ids are dropped"""
+    now = time.monotonic()
+    # Ids are issued in time order, so expired ones sit at the front
+    while proposals:
+        oldest = next(iter(proposals))
+        if now - proposals[oldest][1] <= PROPOSAL_TTL:
+            break
+        del proposals[oldest]
+
+    proposal_id = f"{next(ids):x}"
+    proposals[proposal_id] = (req, now)
+    return {
+        'id': proposal_id,
+        'ask_price': float(req['amount']),
+        'spot': round(market.price, 4),
+        'spot_time': market.epoch,
+        'date_start': int(time.time()),
+        'longcode': f"{req['contract_type']} {market.symbol} x{req['multiplier']}",
+    }
+
+
+markets = {s: Market(s, rate) for s, rate in SYMBOLS.items()}
+account = Account(START_BALANCE)
+proposals = {}  # proposal id -> (request, issued at)
+sessions = set()
+
+
+class Session:
+    """One client connection"""
+
+    def __init__(self, ws):
+        self.ws = ws
+        self.authorized = False
+        self.subscriptions = {}  # sub_id -> listener list it lives in
+        self.tasks = set()  # in-flight sends/requests, kept until done
+
+    def spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self.tasks.add(task)
+        task.add_done_callback(self.tasks.discard)
+
+    def push(self, payload):
+        self.spawn(self._send(payload))
+
+    async def _send(self, payload):
+        try:
+            await self.ws.send(json.dumps(payload))
+        except websockets.ConnectionClosed:
+            pass
+
+    async def reply(self, req, msg_type, body=None, error=None, subscription=None):
+        delay = LATENCY_MS + rng.random() * JITTER_MS
+        if delay:
+            await asyncio.sleep(delay / 1000)
+
+        payload = {'msg_type': msg_type, 'echo_req': req}
+        if req.get('req_id') is not None:
+            payload['req_id'] = req['req_id']
+        if error:
+            payload['error'] = error
+        else:
+            payload[msg_type] = body
+        if subscription:
+            payload['subscription'] = {'id': subscription}
+        await self._send(payload)
+
+    def listen(self, listeners, req):
+        sub_id = f"{next(ids):x}"
+        entry = (self, sub_id, req)
+        listeners.append(entry)
+        self.subscriptions[sub_id] = (listeners, entry)
+        return sub_id
+
+    def forget(self, sub_id):
+        listeners, entry = self.subscriptions.pop(sub_id, (None, None))
+        if listeners is None:
+            return False
+        if entry in listeners:
+            listeners.remove(entry)
+        return True
+
+    def close(self):
+        for sub_id in list(self.subscriptions):
+            self.forget(sub_id)
+
+    async def handle(self, req):
+        sub = req.get('subscribe') == 1
+
+        if 'authorize' in req:
+            self.authorized = True
+            return await self.reply(req, 'authorize', {
+                'loginid': account.loginid,
+                'balance': round(account.balance, 2),
+                'currency': 'USD',
+                'is_virtual': 1,
+            })
+
+        if 'ping' in req:
+            return await self.reply(req, 'ping', 'pong')
+        if 'time' in req:
+            return await self.reply(req, 'time', int(time.time()))
+        if 'forget' in req:
+            return await self.reply(req, 'forget', 1 if self.forget(req['forget']) else 0)
+
+        if 'ticks' in req:
+            market = markets.get(req['ticks'])
+            if market is None:
+                return await self.reply(req, 'tick', error={'code': 'InvalidSymbol', 'message': 'Unknown symbol'})
+            sub_id = self.listen(market.listeners, req) if sub else None
+            return await self.reply(req, 'tick', market.tick(), subscription=sub_id)
+
+        if 'ticks_history' in req:
+            return await self.ticks_history(req)
+
+        if not self.authorized:
+            return await self.reply(req, next(iter(req)), error={
+                'code': 'AuthorizationRequired', 'message': 'Please log in.'
+            })
+
+        if 'balance' in req:
+            sub_id = self.listen(account.balance_listeners, req) if sub else None
+            return await self.reply(req, 'balance', account.balance_payload(), subscription=sub_id)
+
+        if 'proposal' in req:
+            market = markets.get(req.get('symbol'))
+            if market is None:
+                return await self.reply(req, 'proposal', error={'code': 'InvalidSymbol', 'message': 'Unknown symbol'})
+            sub_id = self.listen(market.proposal_listeners, req) if sub else None
+            return await self.reply(req, 'proposal', quote(req, market), subscription=sub_id)
+
+        if 'buy' in req:
+            if req['buy'] == 1:
+                params = req.get('parameters') or {}
+            else:
+                params, issued = proposals.pop(str(req['buy']), (None, 0))
+                if params is None or time.monotonic() - issued > PROPOSAL_TTL:
+                    return await self.reply(req, 'buy', error={
+                        'code': 'InvalidContractProposal', 'message': 'Proposal expired or already used.'
+                    })
+            buy, error = account.buy(params)
+            return await self.reply(req, 'buy', buy, error=error)
+
+        if 'proposal_open_contract' in req:
+            c = account.contracts.get(int(req.get('contract_id', 0)))
+            if c is None:
+                return await self.reply(req, 'proposal_open_contract', {})
+            sub_id = None
+            if sub and not c['is_sold']:
+                sub_id = self.listen(account.contract_listeners.setdefault(c['contract_id'], []), req)
+            return await self.reply(
+                req, 'proposal_open_contract', account.contract_payload(c), subscription=sub_id
+            )
+
+        return await self.reply(req, 'error', error={
+            'code': 'UnrecognisedRequest', 'message': 'Unrecognised request.'
+        })
+
+    async def ticks_history(self, req):
+        market = markets.get(req['ticks_history'])
+        if market is None:
+            return await self.reply(req, 'history', error={'code': 'InvalidSymbol', 'message': 'Unknown symbol'})
+
+        end = int(time.time()) if req.get('end', 'latest') == 'latest' else int(req['end'])
+        count = int(req.get('count', 5000))
+        granularity = int(req.get('granularity', 60))
+        start = max(int(req.get('start', end - count * granularity)), end - count * granularity)
+
+        # Walk backwards from the live price so history joins up with ticks
+        walk = random.Random(f"{market.symbol}:{start}:{end}")
+        price = market.price
+
+        if req.get('style') == 'candles':
+            candles = []
+            epoch = end - end % granularity
+            while epoch >= start:
+                close = price
+                path = [close]
+                for _ in range(max(1, granularity // 2)):
+                    path.append(path[-1] * math.exp(walk.gauss(0, VOLATILITY)))
+                price = path[-1]
+                candles.append({
+                    'epoch': epoch,
+                    'open': round(price, 4),
+                    'high': round(max(path), 4),
+                    'low': round(min(path), 4),
+                    'close': round(close, 4),
+                })
+                epoch -= granularity
+            candles.reverse()
+            return await self.reply(req, 'candles', candles)
+
+        times, prices = [], []
+        for epoch in range(end, start - 1, -1):
+            times.append(epoch)
+            prices.append(round(price, 4))
+            price *= math.exp(walk.gauss(0, VOLATILITY))
+        return await self.reply(req, 'history', {'times': times[::-1], 'prices': prices[::-1]})
+
+
+async def handler(ws):
+    session = Session(ws)
+    sessions.add(session)
+    try:
+        async for raw in ws:
+            try:
+                req = json.loads(raw)
+            except ValueError:
+                continue
+
+            if DISCONNECT_PROB and rng.random() < DISCONNECT_PROB:
+                print("[STUB] 🔌 Simulated disconnect")
+                await ws.close(code=1011, reason='simulated disconnect')
+                break
+
+            session.spawn(session.handle(req))
+    except websockets.ConnectionClosed:
+        pass
+    finally:
+        session.close()
+        sessions.discard(session)
+
+
+async def disconnector():
+    """Drop every client every DISCONNECT_EVERY seconds"""
+    while True:
+        await asyncio.sleep(DISCONNECT_EVERY)
+        print(f"[STUB] 🔌 Dropping {len(sessions)} connection(s)")
+        for session in list(sessions):
+            await session.ws.close(code=1011, reason='simulated disconnect')
+
+
+async def main():
+    print(f"[STUB] Deriv stand-in on ws://{HOST}:{PORT}")
+    print(f"[STUB] Symbols: {SYMBOLS} | latency: {LATENCY_MS}ms ±{JITTER_MS}ms")
+
+    tasks = [asyncio.create_task(m.run()) for m in markets.values()]
+    if DISCONNECT_EVERY:
+        tasks.append(asyncio.create_task(disconnector()))
+
+    async with websockets.serve(handler, HOST, PORT, max_size=None):
+        await asyncio.gather(*tasks)
+
+
+if __name__ == '__main__':
+    asyncio.run(main())
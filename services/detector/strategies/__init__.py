@@ -0,0 +1,6 @@
+"""
+services/detector/strategies
+============================
+Detector strategy plugins. Every module here is imported by
+strategy.load_strategies(); the ones named in STRATEGIES are run.
+"""
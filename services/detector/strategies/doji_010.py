@@ -0,0 +1,40 @@
+"""
+services/detector/strategies/doji_010.py
+========================================
+010+doji: bullish c1, bearish c2, then a bearish doji c3. Always MULTDOWN.
+"""
+import sys
+
+sys.path.insert(0, '/app/shared')
+from calculator import is_bullish, is_doji
+from strategy import Strategy, register
+
+@register
+class Doji010(Strategy):
+    id = '010_doji'
+    window = 3
+
+    def on_candle(self, event):
+        if len(event['window']) < 3:
+            return None
+        c1, c2, c3 = event['window'][-3:]
+
+        # 010 start (bullish → bearish)
+        if not is_bullish(c1) or is_bullish(c2):
+            return None
+
+        # Must be bearish doji
+        if is_bullish(c3):
+            print(f"[DETECTOR] Pattern {c2['window_start']}: c3 bullish → discarded")
+            return None
+        if not is_doji(c3):
+            print(f"[DETECTOR] Pattern {c2['window_start']}: c3 not doji → discarded")
+            return None
+
+        return {
+            'pattern_id': f"010_doji_{c2['window_start']}",
+            'direction': 0,  # Always bearish for doji
+            'c1': c1,
+            'c2': c2,
+            'c3': c3,
+        }
@@ -0,0 +1,37 @@
+"""
+services/detector/strategies/every_candle.py
+============================================
+Every closed 30m candle becomes a signal: direction 1 if bullish, 0 if
+bearish, no pattern or doji filter. For exercising the pipeline only.
+
+Port of the old commented-out detector loop. Its pattern_id was the
+constant "every_candle_v1"; it now carries the window start like every
+other strategy's ids, so one signal per candle stays unique by id alone.
+"""
+import sys
+
+sys.path.insert(0, '/app/shared')
+from calculator import is_bullish
+from strategy import Strategy, register
+
+def body_pct(candle):
+    """Body / range, preferring the tick-sum 'range' field; high - low if it is missing"""
+    rng = candle.get('range')
+    if rng is None:
+        rng = candle['high'] - candle['low']
+    if rng <= 0:
+        return 0.0
+    return abs(candle['close'] - candle['open']) / rng
+
+@register
+class EveryCandle(Strategy):
+    id = 'every_candle'
+    window = 1
+
+    def on_candle(self, event):
+        candle = event['candle']
+        return {
+            'pattern_id': f"every_candle_v1_{candle['window_start']}",
+            'direction': 1 if is_bullish(candle) else 0,
+            'body_pct_c3': body_pct(candle),
+        }
@@ -0,0 +1,222 @@
+"""
+services/detector/strategy.py
+=============================
+Strategy plugin host.
+
+Strategies live in strategies/ and register themselves with @register.
+Each declares the symbols and timeframes it wants, how many closed
+candles it needs to look back on, and a time budget. The host polls
+every (symbol, timeframe) once per cycle, whatever the number of
+strategies, keeps one shared candle window per stream (candles carry
+their `indicators`), and hands each new closed candle to every
+subscribed strategy.
+
+A strategy returns None, a signal dict or a list of them; the host fills
+in the common fields, tags the signal with the strategy id and inserts it
+unless it already exists. Strategies run in their own worker thread: a
+call that overruns its budget is abandoned (its result is dropped), a
+strategy still busy with an old candle is skipped, and one that overruns
+STRATEGY_MAX_OVERRUNS times in a row is disabled, so a slow or broken
+strategy never holds up the others.
+"""
+import asyncio
+import importlib
+import pkgutil
+import sys
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+sys.path.insert(0, '/app/shared')
+from mongo_client import candle_snapshot
+from latency import stamp
+import config
+
+STRATEGIES = {}
+
+def register(cls):
+    STRATEGIES[cls.id] = cls
+    return cls
+
+
+class Strategy:
+    """
+    Base class for detector strategies. Override on_candle(); it gets an
+    event dict:
+        symbol, timeframe
+        candle       the candle that just closed
+        window       tuple of the last `window` closed candles, oldest first
+                     (shared between strategies: do not modify)
+        indicators   candle['indicators']: stored at close by the ingestor
+                     (1m) or the aggregator (30m)
+    """
+    id = None
+    symbols = None          # None = [config.SYMBOL]
+    timeframes = ('30m',)
+    window = 3
+    budget_ms = None        # None = config.STRATEGY_BUDGET_MS
+
+    def on_candle(self, event):
+        raise NotImplementedError
+
+
+def load_strategies(names=None):
+    """Import every module in strategies/ and instantiate the enabled ones"""
+    import strategies
+    for module in pkgutil.iter_modules(strategies.__path__):
+        importlib.import_module(f"strategies.{module.name}")
+
+    names = config.STRATEGIES if names is None else names
+    unknown = [n for n in names if n not in STRATEGIES]
+    if unknown:
+        raise SystemExit(f"[DETECTOR] Unknown strategies {unknown}; available: {', '.join(sorted(STRATEGIES))}")
+    return [STRATEGIES[n]() for n in names]
+
+
+class StrategyHost:
+    def __init__(self, db, adb, strategies):
+        self.db = db
+        self.adb = adb
+        self.strategies = strategies
+        self.runners = {s.id: ThreadPoolExecutor(max_workers=1, thread_name_prefix=s.id) for s in strategies}
+        self.busy = {}
+        self.overruns = {s.id: 0 for s in strategies}
+        self.disabled = set()
+
+        # (symbol, timeframe) -> subscribed strategies / shared window
+        self.subscribers = {}
+        for s in strategies:
+            for symbol in s.symbols or [config.SYMBOL]:
+                for timeframe in s.timeframes:
+                    self.subscribers.setdefault((symbol, timeframe), []).append(s)
+        self.windows = {
+            key: deque(maxlen=max(s.window for s in subs))
+            for key, subs in self.subscribers.items()
+        }
+
+    # ------------------------------------------------------------------
+    # Candle stream
+    # ------------------------------------------------------------------
+    async def fetch(self, symbol, timeframe, limit):
+        """Newest `limit` closed candles, oldest first"""
+        if timeframe == '30m':
+            return await self.adb.get_30m_candles(symbol, limit)
+        if timeframe == '1m':
+            now = datetime.utcnow().replace(second=0, microsecond=0)
+            candles = await self.adb.get_1m_candles(symbol, now - timedelta(minutes=limit), now)
+            return candles[-limit:]
+        raise ValueError(f"unsupported timeframe {timeframe!r}")
+
+    async def poll(self):
+        """One read per stream; dispatch the candles that closed since the last poll"""
+        for (symbol, timeframe), window in self.windows.items():
+            time_field = 'window_start' if timeframe == '30m' else 'minute_start'
+            candles = await self.fetch(symbol, timeframe, window.maxlen)
+            if not candles:
+                continue
+
+            if not window:
+                # First poll: fill the window, evaluate only the newest candle
+                window.extend(candles[:-1])
+                new = candles[-1:]
+            else:
+                last = window[-1][time_field]
+                new = [c for c in candles if c[time_field] > last]
+
+            for candle in new:
+                window.append(candle)
+                event = {
+                    'symbol': symbol,
+                    'timeframe': timeframe,
+                    'candle': candle,
+                    'window': tuple(window),
+                    'indicators': candle.get('indicators', {}),
+                }
+                await asyncio.gather(*(
+                    self.dispatch(s, event) for s in self.subscribers[(symbol, timeframe)]
+                ))
+
+    # ------------------------------------------------------------------
+    # Strategy calls
+    # ------------------------------------------------------------------
+    async def dispatch(self, strategy, event):
+        sid = strategy.id
+        if sid in self.disabled:
+            return
+        if self.busy.get(sid) is not None and not self.busy[sid].done():
+            print(f"[DETECTOR] ⚠️  {sid}: still busy with an earlier candle, skipping {event['symbol']}/{event['timeframe']}")
+            return
+
+        budget = (strategy.budget_ms or config.STRATEGY_BUDGET_MS) / 1000
+        loop = asyncio.get_running_loop()
+        future = loop.run_in_executor(self.runners[sid], strategy.on_candle, event)
+        self.busy[sid] = future
+        t0 = time.perf_counter()
+
+        try:
+            result = await asyncio.wait_for(asyncio.shield(future), budget)
+        except asyncio.TimeoutError:
+            self.overruns[sid] += 1
+            print(f"[DETECTOR] ⏱️  {sid}: over its {budget * 1000:.0f}ms budget "
+                  f"({self.overruns[sid]}/{config.STRATEGY_MAX_OVERRUNS}), result dropped")
+            if self.overruns[sid] >= config.STRATEGY_MAX_OVERRUNS:
+                self.disabled.add(sid)
+                print(f"[DETECTOR] ❌ {sid}: disabled after {self.overruns[sid]} overruns in a row")
+            return
+        except Exception as e:
+            print(f"[DETECTOR] ❌ {sid}: {e}")
+            return
+
+        self.overruns[sid] = 0
+        if not result:
+            return
+        for signal in result if isinstance(result, list) else [result]:
+            await self.emit(strategy, event, signal, time.perf_counter() - t0)
+
+    async def emit(self, strategy, event, fields, elapsed):
+        candle = event['candle']
+        window_start = candle.get('window_start', candle.get('minute_start'))
+        signal = {
+            'symbol': event['symbol'],
+            'strategy': strategy.id,
+            'timeframe': event['timeframe'],
+            'pattern_id': f"{strategy.id}_{window_start}",
+            'window_start': window_start,
+            'created_at': datetime.utcnow(),
+            'direction': 0,
+            'c1': candle,
+            'c2': candle,
+            'c3': candle,
+            'indicators': event['indicators'],
+            'status': 'PENDING',
+            'processed': False,
+        }
+        signal.update(fields)
+        for key in ('c1', 'c2', 'c3'):
+            signal[key] = candle_snapshot(signal[key])
+
+        signals = self.db.collection(config.COLL_SIGNALS)
+        existing = await self.adb.run(signals.find_one, {
+            'symbol': signal['symbol'],
+            'window_start': signal['window_start'],
+            'pattern_id': signal['pattern_id'],
+        })
+        if existing:
+            return
+
+        signal['timing'] = stamp(candle.get('timing'), 'signal_inserted')
+        await self.adb.run(signals.insert_one, signal)
+        print(f"[DETECTOR] ✅ {strategy.id} signal for {signal['symbol']} {window_start} ({elapsed * 1000:.1f}ms)")
+
+    async def run(self, interval):
+        names = ', '.join(s.id for s in self.strategies)
+        streams = ', '.join(f"{sym}/{tf}" for sym, tf in self.subscribers)
+        print(f"[DETECTOR] Strategies: {names} | Streams: {streams}")
+
+        while True:
+            try:
+                await self.poll()
+            except Exception as e:
+                print(f"[DETECTOR] ❌ Error: {e}")
+            await asyncio.sleep(interval)
@@ -0,0 +1,112 @@
+"""
+services/executor/buy_latency.py
+================================
+Built-in latency comparison of the two buy paths:
+
+    direct            buy: 1 with full parameters (DerivAPI, priced inline)
+    proposal          buy by a pre-fetched proposal id (DerivStream)
+    direct_requote    the final SL/TP differ from the pre-fetched quote:
+                      the quote is dropped and the order goes out direct
+
+Places real contracts, so run it against a demo account or the local
+stub (WS_URL=ws://deriv_stub:8765):
+
+    python buy_latency.py --n 20 --stake 1 --multiplier 100
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+sys.path.insert(0, '/app/shared')
+from deriv_api import DerivAPI, DerivStream
+from latency import percentile
+import config
+from proposals import ProposalBook
+
+async def compare(n, stake, multiplier, contract_type, sl_usd, tp_usd):
+    api = DerivAPI(use_auth=True)
+    stream = DerivStream(use_auth=True)
+    book = ProposalBook(stream)
+    stream.on('proposal', book.on_proposal)
+
+    runner = asyncio.create_task(stream.run_forever())
+    await stream.ready.wait()
+
+    plan = {
+        'stake': stake,
+        'multiplier': multiplier,
+        'contract_type': contract_type,
+        'sl_usd': sl_usd,
+        'tp_usd': tp_usd
+    }
+    # What the executor usually buys: SL/TP recomputed from the final candle
+    final = dict(plan, sl_usd=round(sl_usd * 1.1, 2), tp_usd=round(tp_usd * 1.1, 2))
+    samples = {'direct': [], 'proposal': [], 'direct_requote': []}
+
+    async def place(plan):
+        """Same path selection as the executor"""
+        _, path = await book.buy(config.SYMBOL, plan)
+        if path != 'proposal':
+            await api.buy_contract(
+                symbol=config.SYMBOL,
+                amount=plan['stake'],
+                multiplier=plan['multiplier'],
+                contract_type=plan['contract_type'],
+                limit_order={"stop_loss": plan['sl_usd'], "take_profit": plan['tp_usd']}
+            )
+        return path
+
+    for i in range(n):
+        t0 = time.perf_counter()
+        await api.buy_contract(
+            symbol=config.SYMBOL,
+            amount=stake,
+            multiplier=multiplier,
+            contract_type=contract_type,
+            limit_order={"stop_loss": sl_usd, "take_profit": tp_usd}
+        )
+        samples['direct'].append((time.perf_counter() - t0) * 1000)
+
+        # Pre-fetched: quote is already live before the clock starts
+        await book.prefetch(config.SYMBOL, plan)
+        t0 = time.perf_counter()
+        path = await place(plan)
+        samples[path].append((time.perf_counter() - t0) * 1000)
+
+        # Pre-fetched, but the final order no longer matches the quote
+        await book.prefetch(config.SYMBOL, plan)
+        t0 = time.perf_counter()
+        path = await place(final)
+        samples[path].append((time.perf_counter() - t0) * 1000)
+
+        print(f"[BUY-LATENCY] round {i + 1}/{n} done")
+
+    runner.cancel()
+
+    print(f"\n[BUY-LATENCY] {config.SYMBOL} x{multiplier} stake ${stake}")
+    print(f"  {'path':<18} {'n':>4} {'p50':>9} {'p90':>9} {'max':>9}")
+    for path, values in samples.items():
+        values.sort()
+        if values:
+            print(
+                f"  {path:<18} {len(values):>4} {percentile(values, 50):>7.0f}ms "
+                f"{percentile(values, 90):>7.0f}ms {values[-1]:>7.0f}ms"
+            )
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare direct vs proposal buy latency")
+    parser.add_argument('--n', type=int, default=10)
+    parser.add_argument('--stake', type=float, default=1.0)
+    parser.add_argument('--multiplier', type=int, default=config.AVAILABLE_MULTIPLIERS[0])
+    parser.add_argument('--contract-type', default='MULTUP')
+    parser.add_argument('--sl-usd', type=float, default=0.5)
+    parser.add_argument('--tp-usd', type=float, default=0.5)
+    args = parser.parse_args()
+
+    asyncio.run(compare(
+        args.n, args.stake, args.multiplier, args.contract_type, args.sl_usd, args.tp_usd
+    ))
+
+if __name__ == '__main__':
+    main()
@@ -6,309 +6,256 @@ Executes trades and monitors positions
 import asyncio
 import sys
 import os
-from datetime import datetime
+import time
+from datetime import datetime, timedelta, timezone
 
 sys.path.insert(0, '/app/shared')
-from mongo_client import MongoDB
-from deriv_api import DerivAPI
-from calculator import calculate_stake, calculate_multiplier
+from mongo_client import MongoDB, AsyncMongoDB, candle_snapshot
+from deriv_api import DerivAPI, DerivStream
+from calculator import calculate_stake, calculate_multiplier, is_bullish
+from latency import stamp
 import config
+from order_pipeline import OrderPipeline
+from proposals import ProposalBook
 
 db = MongoDB()
+adb = AsyncMongoDB(db)
 api = None
-executing = False
+stream = None
+pipeline = None
+proposals = None  # ProposalBook when ORDER_MODE=proposal
+open_trades = {}  # contract_id (int) -> trade doc, for O(1) lookup on close
+staged_orders = {}  # (symbol, window_start) -> pre-computed order for that window
+STAGE_FIELDS = ('open', 'high', 'low', 'close', 'range')
+
+
+class BalanceCache:
+    """
+    In-memory account balance kept current by the Deriv balance stream.
+
+    Pushes arrive on every balance change. A value older than
+    BALANCE_MAX_AGE is refreshed with a one-off request on the shared
+    stream, falling back to a short-lived DerivAPI call if the stream
+    is down.
+    """
+
+    def __init__(self, max_age):
+        self.max_age = max_age
+        self.value = None
+        self.updated_at = 0.0
+        self.changed = asyncio.Condition()
+
+    def age(self):
+        """Seconds since the last push or refresh"""
+        return time.monotonic() - self.updated_at
+
+    async def set(self, value):
+        """Store a new balance and wake anyone waiting for an update"""
+        async with self.changed:
+            self.value = value
+            self.updated_at = time.monotonic()
+            self.changed.notify_all()
+
+    async def on_balance(self, data):
+        """DerivStream callback for `balance` messages"""
+        await self.set(float(data['balance']['balance']))
+
+    async def refresh(self):
+        """Force a fresh balance read"""
+        if stream is not None and stream.ready.is_set():
+            data = await stream.request({"balance": 1, "account": "current"})
+            if 'error' in data:
+                raise RuntimeError(f"Balance error: {data['error']}")
+            value = float(data['balance']['balance'])
+        else:
+            value = await get_api().get_balance()
+
+        await self.set(value)
+        return value
+
+    async def get(self, since=None):
+        """
+        Return the cached balance, refreshing it if stale.
+
+        `since` is a monotonic timestamp the value must be newer than
+        (e.g. a contract close); we wait up to BALANCE_PUSH_WAIT for the
+        matching push before forcing a refresh.
+        """
+        if since is not None and self.updated_at < since:
+            try:
+                async with self.changed:
+                    await asyncio.wait_for(
+                        self.changed.wait_for(lambda: self.updated_at >= since),
+                        config.BALANCE_PUSH_WAIT
+                    )
+            except asyncio.TimeoutError:
+                return await self.refresh()
+
+        if self.value is None or self.age() > self.max_age:
+            return await self.refresh()
+
+        return self.value
+
+
+balance_cache = BalanceCache(config.BALANCE_MAX_AGE)
+
+
+def get_api():
+    """Lazily create the authenticated request-style API"""
+    global api
+
+    if api is None:
+        print("[EXECUTOR] 🔌 Initializing API...")
+        api = DerivAPI(use_auth=True)
+    return api
 
 async def check_signals():
-    """Check for pending trade signals"""
-    signals = db.get_pending_signals()
+    """Queue pending trade signals; they are marked processed once executed"""
+    signals = await adb.get_pending_signals()
+    queued = 0
     
     for signal in signals:
-        await execute_trade(signal)
-        db.mark_signal_processed(signal['_id'])
+        signal['timing'] = stamp(signal.get('timing'), 'queued')
+        if await pipeline.submit(signal):
+            queued += 1
+    
+    return queued
 
-# async def execute_trade(signal):
-#     """Execute trade from signal"""
-#     global executing
+def plan_order(c3, balance, direction, stake=None):
+    """
+    Derive stake, SL/TP and multiplier for a signal candle.
+    Pure computation, so it can run ahead of time on a partial candle.
+    Returns None if no multiplier fits.
+    """
+    if stake is None:
+        stake = calculate_stake(balance)
     
-#     if executing:
-#         print("[EXECUTOR] ⚠️  Already executing - skipping")
-#         return
+    # Extract candle data
+    entry = c3['close']
+    doji_low = c3['low']
+    doji_high = c3['high']
+    doji_range = c3['range']
     
-#     executing = True
+    # Calculate SL/TP prices with buffer (EXACT research logic)
+    sl_price = doji_low - (config.SL_BUFFER_PCT * doji_range)
+    tp_price = doji_high
     
-#     try:
-#         c3 = signal['c3']
-        
-#         # Get real balance
-#         balance = await api.get_balance()
-#         print(f"[EXECUTOR] 💰 Balance: ${balance:.2f}")
-        
-#         # Calculate stake
-#         stake = calculate_stake(balance)
-#         print(f"[EXECUTOR] 📊 Stake: ${stake:.2f}")
-        
-#         # Calculate entry params
-#         entry = c3['close']
-#         doji_low = c3['low']
-#         doji_high = c3['high']
-#         doji_range = c3['range']
-        
-#         # Calculate SL with buffer
-#         sl = doji_low - (config.SL_BUFFER_PCT * doji_range)
-#         tp = doji_high
-        
-#         # Calculate multiplier
-#         multiplier = calculate_multiplier(entry, sl, stake)
-        
-#         if multiplier is None:
-#             print("[EXECUTOR] ⚠️  No valid multiplier - skipping")
-#             return
-        
-#         print(f"[EXECUTOR] 🎯 Trade params:")
-#         print(f"   Entry: {entry:.5f}")
-#         print(f"   SL: {sl:.5f}")
-#         print(f"   TP: {tp:.5f}")
-#         print(f"   Multiplier: {multiplier}x")
-#         print(f"   Stake: ${stake:.2f}")
-        
-#         # Place trade
-#         contract = await api.buy_contract(
-#             symbol=config.SYMBOL,
-#             amount=stake,
-#             multiplier=multiplier,
-#             limit_order={
-#                 "stop_loss": sl,
-#                 "take_profit": tp
-#             }
-#         )
-        
-#         if not contract:
-#             print("[EXECUTOR] ❌ Trade placement failed")
-#             return
-        
-#         contract_id = contract.get('contract_id')
-        
-#         # Save trade record
-#         trade = {
-#             'contract_id': contract_id,
-#             'pattern_id': signal['pattern_id'],
-#             'symbol': config.SYMBOL,
-#             'entry_time': datetime.utcnow(),
-#             'entry_price': entry,
-#             'sl': sl,
-#             'tp': tp,
-#             'stake': stake,
-#             'multiplier': multiplier,
-#             'status': 'OPEN',
-#             'balance_before': balance,
-#             'c1': signal['c1'],
-#             'c2': signal['c2'],
-#             'c3': signal['c3']
-#         }
-        
-#         db.save_trade(trade)
-        
-#         print(f"[EXECUTOR] ✅ TRADE PLACED: {contract_id}")
-#         print(f"[EXECUTOR] 🚀 Entry: {entry:.5f} | SL: {sl:.5f} | TP: {tp:.5f}")
-        
-#     except Exception as e:
-#         print(f"[EXECUTOR] ❌ Error: {e}")
+    # Calculate multiplier using breathing room formula
+    # This ensures: Loss at SL ≈ stake / BREATHING_MULTIPLE
+    multiplier = calculate_multiplier(entry, sl_price, stake)
     
-#     finally:
-#         executing = False
-
-
-# async def execute_trade(signal):
-#     """Execute trade from signal"""
-#     global executing, api
+    if multiplier is None:
+        return None
     
-#     if executing:
-#         print("[EXECUTOR] ⚠️  Already executing - skipping")
-#         return
+    # Convert price-based SL/TP to USD amounts for Deriv API
+    sl_pct = (entry - sl_price) / entry
+    tp_pct = (tp_price - entry) / entry
     
-#     executing = True
+    # Deriv formula: P&L = percentage × stake × multiplier
+    sl_usd = round(stake * multiplier * sl_pct, 2)
+    tp_usd = round(stake * multiplier * tp_pct, 2)
     
-#     try:
-#         # Initialize API if needed
-#         if api is None:
-#             print("[EXECUTOR] 🔌 Initializing API...")
-#             api = DerivAPI(use_auth=True)
-#             print(f"[EXECUTOR] 🔍 API module: {api.__class__.__module__}")
-        
-#         c3 = signal['c3']
-        
-#         # Determine direction from signal
-#         direction = signal.get('direction', 1)  # 1=bullish, 0=bearish
-#         contract_type = "MULTUP" if direction == 1 else "MULTDOWN"
-        
-#         print(f"[EXECUTOR] 📊 Direction: {'BULLISH' if direction == 1 else 'BEARISH'}")
-        
-#         # Get real balance
-#         balance = await api.get_balance()
-#         print(f"[EXECUTOR] 💰 Balance: ${balance:.2f}")
-        
-#         # Calculate stake
-#         stake = calculate_stake(balance)
-#         print(f"[EXECUTOR] 📊 Stake: ${stake:.2f}")
-        
-#         # Calculate entry params
-#         entry = c3['close']
-#         doji_low = c3['low']
-#         doji_high = c3['high']
-#         doji_range = c3['range']
-        
-#         # SL/TP in USD (positive values)
-#         sl_usd = 10.0
-#         tp_usd = 15.0
-        
-#         print(f"[EXECUTOR] 🎯 Trade params:")
-#         print(f"   Type: {contract_type}")
-#         print(f"   Entry: {entry:.5f}")
-#         print(f"   SL: ${sl_usd}")
-#         print(f"   TP: ${tp_usd}")
-#         print(f"   Multiplier: 200x")
-#         print(f"   Stake: ${stake:.2f}")
-        
-#         # Place trade
-#         contract = await api.buy_contract(
-#             symbol=config.SYMBOL,
-#             amount=stake,
-#             multiplier=200,
-#             contract_type=contract_type,
-#             limit_order={
-#                 "stop_loss": sl_usd,
-#                 "take_profit": tp_usd
-#             }
-#         )
-        
-#         if not contract:
-#             print("[EXECUTOR] ❌ Trade placement failed")
-#             return
-        
-#         contract_id = contract.get('contract_id')
-        
-#         # Save trade record
-#         trade = {
-#             'contract_id': contract_id,
-#             'pattern_id': signal['pattern_id'],
-#             'symbol': config.SYMBOL,
-#             'direction': direction,
-#             'contract_type': contract_type,
-#             'entry_time': datetime.utcnow(),
-#             'entry_price': entry,
-#             'sl': sl_usd,
-#             'tp': tp_usd,
-#             'stake': stake,
-#             'multiplier': 200,
-#             'status': 'OPEN',
-#             'balance_before': balance,
-#             'c1': signal['c1'],
-#             'c2': signal['c2'],
-#             'c3': signal['c3']
-#         }
-        
-#         db.save_trade(trade)
-        
-#         print(f"[EXECUTOR] ✅ TRADE PLACED: {contract_id}")
-#         print(f"[EXECUTOR] 🚀 {contract_type} | Entry: {entry:.5f} | SL: ${sl_usd} | TP: ${tp_usd}")
-        
-#     except Exception as e:
-#         print(f"[EXECUTOR] ❌ Error: {e}")
-#         import traceback
-#         traceback.print_exc()
+    # Cap SL at 95% of stake (safety, shouldn't trigger with breathing room)
+    sl_usd = min(sl_usd, stake * 0.95)
     
-#     finally:
-#         executing = False
+    return {
+        'contract_type': "MULTUP" if direction == 1 else "MULTDOWN",
+        'direction': direction,
+        'entry': entry,
+        'sl_price': sl_price,
+        'tp_price': tp_price,
+        'sl_pct': sl_pct,
+        'tp_pct': tp_pct,
+        'stake': stake,
+        'multiplier': multiplier,
+        'sl_usd': sl_usd,
+        'tp_usd': tp_usd
+    }
 
-async def execute_trade(signal):
-    """Execute trade from signal with breathing room risk management"""
-    global executing, api
+def validate_staged(staged, c3, balance, direction):
+    """
+    Final check of a pre-staged order against the real signal.
     
-    if executing:
-        print("[EXECUTOR] ⚠️  Already executing - skipping")
-        return
+    The staged plan comes from a partial candle, and the last minute
+    almost always moves close/high/low, so the price-independent parts
+    are validated instead: balance, direction and stake must be
+    unchanged. SL/TP and the multiplier (a bisect) are then recomputed
+    from the final candle. The plan counts as reused when the staged
+    multiplier still holds.
+    """
+    if staged is None or staged['balance'] != balance or staged['direction'] != direction:
+        return plan_order(c3, balance, direction), False
     
-    executing = True
+    if staged['plan'] and all(staged['c3'][k] == c3[k] for k in STAGE_FIELDS):
+        return staged['plan'], True
     
+    plan = plan_order(c3, balance, direction, stake=staged['stake'])
+    reused = bool(plan and staged['plan'] and plan['multiplier'] == staged['plan']['multiplier'])
+    return plan, reused
+
+async def execute_trade(signal):
+    """Execute trade from signal with breathing room risk management"""
     try:
-        # Initialize API if needed
-        if api is None:
-            print("[EXECUTOR] 🔌 Initializing API...")
-            api = DerivAPI(use_auth=True)
-        
+        timing = stamp(signal.get('timing'), 'claimed')
         c3 = signal['c3']
+        symbol = signal.get('symbol', config.SYMBOL)
         
         # 010+doji pattern is always bearish (MULTDOWN)
         direction = signal.get('direction', 0)
-        contract_type = "MULTUP" if direction == 1 else "MULTDOWN"
-        
-        print(f"[EXECUTOR] 📊 Direction: {'BULLISH' if direction == 1 else 'BEARISH'}")
-        
-        # Get balance and calculate stake
-        balance = await api.get_balance()
-        stake = calculate_stake(balance)
-        print(f"[EXECUTOR] 💰 Balance: ${balance:.2f} | Stake: ${stake:.2f}")
         
-        # Extract candle data
-        entry = c3['close']
-        doji_low = c3['low']
-        doji_high = c3['high']
-        doji_range = c3['range']
+        # Balance (cached, kept fresh by the stream) + pre-staged plan if any
+        balance = await balance_cache.get()
+        staged = staged_orders.pop((symbol, signal.get('window_start')), None)
+        plan, reused = validate_staged(staged, c3, balance, direction)
         
-        # Calculate SL/TP prices with buffer (EXACT research logic)
-        sl_price = doji_low - (config.SL_BUFFER_PCT * doji_range)
-        tp_price = doji_high
-        
-        # Calculate multiplier using breathing room formula
-        # This ensures: Loss at SL ≈ stake / BREATHING_MULTIPLE
-        multiplier = calculate_multiplier(entry, sl_price, stake)
-        
-        if multiplier is None:
+        if plan is None:
             print("[EXECUTOR] ⚠️  No valid multiplier - skipping trade")
-            executing = False
             return
         
-        # Convert price-based SL/TP to USD amounts for Deriv API
-        sl_distance = entry - sl_price
-        tp_distance = tp_price - entry
-        
-        sl_pct = sl_distance / entry
-        tp_pct = tp_distance / entry
-        
-        # Deriv formula: P&L = percentage × stake × multiplier
-        sl_usd = round(stake * multiplier * sl_pct, 2)
-        tp_usd = round(stake * multiplier * tp_pct, 2)
+        # Place trade: by pre-fetched proposal id, or direct buy with parameters
+        timing = stamp(timing, 'order_sent')
+        contract, order_path = None, 'direct'
+        if proposals is not None and stream.ready.is_set():
+            try:
+                contract, order_path = await proposals.buy(symbol, plan)
+            except asyncio.TimeoutError:
+                # The buy may have gone through; don't risk a second one
+                raise
+            except Exception as e:
+                print(f"[EXECUTOR] ⚠️  Proposal buy failed ({e}) - falling back to direct buy")
+                order_path = 'direct_fallback'
+        
+        if order_path != 'proposal':
+            contract = await get_api().buy_contract(
+                symbol=symbol,
+                amount=plan['stake'],
+                multiplier=plan['multiplier'],
+                contract_type=plan['contract_type'],
+                limit_order={
+                    "stop_loss": plan['sl_usd'],
+                    "take_profit": plan['tp_usd']
+                }
+            )
+        
+        timing = stamp(timing, 'buy_ack')
+        
+        # Logging happens after the send to keep it off the critical path
+        sl_usd, tp_usd = plan['sl_usd'], plan['tp_usd']
+        expected_loss_usd = plan['stake'] / config.BREATHING_MULTIPLE
         
-        # Cap SL at 95% of stake (safety, shouldn't trigger with breathing room)
-        sl_usd = min(sl_usd, stake * 0.95)
-        
-        # Calculate expected loss (breathing room verification)
-        expected_loss_usd = stake / config.BREATHING_MULTIPLE
-        
-        print(f"[EXECUTOR] 🎯 Trade Setup:")
-        print(f"   Entry:           {entry:.5f}")
-        print(f"   SL Price:        {sl_price:.5f} (dist: {sl_distance:.5f} = {sl_pct*100:.3f}%)")
-        print(f"   TP Price:        {tp_price:.5f} (dist: {tp_distance:.5f} = {tp_pct*100:.3f}%)")
-        print(f"   Multiplier:      {multiplier}x")
+        print(f"[EXECUTOR] 📊 Direction: {'BULLISH' if direction == 1 else 'BEARISH'}")
+        print(f"[EXECUTOR] 💰 Balance: ${balance:.2f} | Stake: ${plan['stake']:.2f}")
+        print(f"[EXECUTOR] 🎯 Trade Setup{' (pre-staged)' if reused else ''}:")
+        print(f"   Entry:           {plan['entry']:.5f}")
+        print(f"   SL Price:        {plan['sl_price']:.5f} ({plan['sl_pct']*100:.3f}%)")
+        print(f"   TP Price:        {plan['tp_price']:.5f} ({plan['tp_pct']*100:.3f}%)")
+        print(f"   Multiplier:      {plan['multiplier']}x")
         print(f"   SL USD:          ${sl_usd:.2f} (expected: ${expected_loss_usd:.2f})")
         print(f"   TP USD:          ${tp_usd:.2f}")
         print(f"   Risk/Reward:     1:{(tp_usd/sl_usd if sl_usd > 0 else 0):.2f}")
         
-        # Place trade
-        contract = await api.buy_contract(
-            symbol=config.SYMBOL,
-            amount=stake,
-            multiplier=multiplier,
-            contract_type=contract_type,
-            limit_order={
-                "stop_loss": sl_usd,
-                "take_profit": tp_usd
-            }
-        )
-        
         if not contract:
             print("[EXECUTOR] ❌ Trade placement failed")
-            executing = False
             return
         
         contract_id = contract.get('contract_id')
@@ -317,86 +264,116 @@ async def execute_trade(signal):
         trade = {
             'contract_id': contract_id,
             'pattern_id': signal['pattern_id'],
-            'symbol': config.SYMBOL,
+            'strategy': signal.get('strategy'),
+            'symbol': symbol,
             'direction': direction,
-            'contract_type': contract_type,
+            'contract_type': plan['contract_type'],
             'entry_time': datetime.utcnow(),
-            'entry_price': entry,
-            'sl_price': sl_price,
-            'tp_price': tp_price,
+            'entry_price': plan['entry'],
+            'sl_price': plan['sl_price'],
+            'tp_price': plan['tp_price'],
             'sl_usd': sl_usd,
             'tp_usd': tp_usd,
-            'stake': stake,
-            'multiplier': multiplier,
+            'stake': plan['stake'],
+            'multiplier': plan['multiplier'],
             'status': 'OPEN',
             'balance_before': balance,
-            'c1': signal['c1'],
-            'c2': signal['c2'],
-            'c3': signal['c3']
+            'prestaged': reused,
+            'order_path': order_path,
+            'c1': candle_snapshot(signal['c1']),
+            'c2': candle_snapshot(signal['c2']),
+            'c3': candle_snapshot(signal['c3']),
+            'timing': timing
         }
         
-        db.save_trade(trade)
+        await adb.save_trade(trade)
+        open_trades[int(contract_id)] = trade
+        await track_contract(contract_id)
         
-        print(f"[EXECUTOR] ✅ TRADE PLACED: {contract_id}")
-        print(f"[EXECUTOR] 🚀 {contract_type} {multiplier}x | SL: ${sl_usd} | TP: ${tp_usd}")
+        print(f"[EXECUTOR] ✅ TRADE PLACED: {contract_id} ({symbol})")
+        print(f"[EXECUTOR] 🚀 {plan['contract_type']} {plan['multiplier']}x | SL: ${sl_usd} | TP: ${tp_usd}")
         
     except Exception as e:
         print(f"[EXECUTOR] ❌ Error: {e}")
         import traceback
         traceback.print_exc()
+
+def classify_close(trade, position):
+    """Work out why a contract closed from its final open-contract payload"""
+    pnl = float(position.get('profit', 0))
+    stake = float(trade.get('stake', 0))
+    limit_order = position.get('limit_order') or {}
     
-    finally:
-        executing = False
+    if 'stop_out' in limit_order and pnl <= -stake * 0.99:
+        return 'STOP_OUT'
+    if trade.get('tp_usd') and pnl >= trade['tp_usd'] - 0.01:
+        return 'TP'
+    if trade.get('sl_usd') and pnl <= -trade['sl_usd'] + 0.01:
+        return 'SL'
+    return 'SOLD'
 
-async def on_portfolio_update(portfolio):
-    """Handle portfolio updates"""
-    try:
-        contracts = portfolio.get('contracts', [])
-        
-        for position in contracts:
-            contract_id = position.get('contract_id')
-            
-            # Check if closed
-            if position.get('is_sold', 0) == 1:
-                await on_position_closed(contract_id, position)
+async def track_contract(contract_id):
+    """Subscribe to open-contract pushes for one contract on the shared stream"""
+    await stream.subscribe(
+        f"contract:{contract_id}",
+        {"proposal_open_contract": 1, "contract_id": int(contract_id)}
+    )
+
+async def on_open_contract(data):
+    """DerivStream callback for `proposal_open_contract` pushes"""
+    position = data.get('proposal_open_contract') or {}
+    contract_id = position.get('contract_id')
     
-    except Exception as e:
-        print(f"[EXECUTOR] Portfolio error: {e}")
+    if not contract_id or not position.get('is_sold'):
+        return
+    
+    # The first sold push wins; later duplicates find the key already gone
+    if not await stream.unsubscribe(f"contract:{contract_id}"):
+        return
+    
+    await on_position_closed(contract_id, position)
 
 async def on_position_closed(contract_id, position):
-    """Log closed position"""
+    """Record a closed position from its final open-contract payload"""
+    closed_at = time.monotonic()
+    
     try:
-        # Find trade
-        trades = db.get_open_trades(config.SYMBOL)
-        trade = next((t for t in trades if str(t['contract_id']) == str(contract_id)), None)
+        # Find trade (in-memory index first, DB only for anything it missed)
+        trade = open_trades.pop(int(contract_id), None)
+        if trade is None:
+            trade = await adb.get_trade(contract_id)
         
-        if not trade:
+        if not trade or trade.get('status') != 'OPEN':
             print(f"[EXECUTOR] ⚠️  Trade {contract_id} not found")
             return
         
-        # Calculate P&L
-        buy_price = position.get('buy_price', trade['stake'])
-        sell_price = position.get('sell_price', 0)
-        pnl = sell_price - buy_price
+        # P&L straight from the payload
+        buy_price = float(position.get('buy_price', trade['stake']))
+        sell_price = float(position.get('sell_price', 0))
+        pnl = float(position.get('profit', sell_price - buy_price))
         
-        result = 'TP' if pnl > 0 else 'SL'
+        result = classify_close(trade, position)
+        
+        sell_time = position.get('sell_time') or position.get('exit_tick_time')
+        exit_time = datetime.utcfromtimestamp(sell_time) if sell_time else datetime.utcnow()
         
         # Update trade
         updates = {
-            'exit_time': datetime.utcnow(),
-            'exit_price': position.get('exit_tick', trade.get('tp') if result == 'TP' else trade.get('sl')),
+            'exit_time': exit_time,
+            'exit_price': position.get('exit_tick', position.get('current_spot')),
             'pnl': pnl,
             'status': 'CLOSED',
             'result': result,
             'sell_price': sell_price,
-            'buy_price': buy_price
+            'buy_price': buy_price,
+            'closed_at': datetime.utcnow()
         }
         
-        db.update_trade(contract_id, updates)
+        await adb.update_trade(contract_id, updates)
         
-        # Save balance
-        new_balance = await api.get_balance()
-        db.save_balance(new_balance, contract_id, pnl)
+        # Save balance (wait for the post-close push rather than re-requesting)
+        new_balance = await balance_cache.get(since=closed_at)
+        await adb.save_balance(new_balance, contract_id, pnl)
         
         emoji = '✅' if pnl > 0 else '❌'
         print(f"[EXECUTOR] {emoji} Trade closed: {contract_id}")
@@ -408,49 +385,168 @@ async def on_position_closed(contract_id, position):
         print(f"[EXECUTOR] Error logging closed trade: {e}")
 
 async def signal_checker():
-    """Check for signals every 10 seconds"""
+    """Poll for signals every SIGNAL_POLL_INTERVAL seconds"""
     print("[EXECUTOR] 🔍 Signal checker loop started")
     
     while True:
         try:
-            print("[EXECUTOR] 🔎 Checking for signals...")
-            await check_signals()
-            print("[EXECUTOR] ✓ Check complete")
+            queued = await check_signals()
+            if queued:
+                m = pipeline.metrics()
+                print(
+                    f"[EXECUTOR] 🔎 Queued {queued} signal(s) | in-flight: {m['in_flight']} | "
+                    f"queue depth: {m['queue_depth']} | done: {m['completed']} | "
+                    f"avg wait: {m['avg_wait_ms']:.0f}ms"
+                )
         except Exception as e:
             print(f"[EXECUTOR] Signal checker error: {e}")
         
-        await asyncio.sleep(10)
+        await asyncio.sleep(config.SIGNAL_POLL_INTERVAL)
 
-async def portfolio_monitor():
-    """Monitor portfolio continuously"""
-    global api
+def floor_30min(dt):
+    """Floor to 30-min boundary"""
+    minute_block = (dt.minute // 30) * 30
+    return dt.replace(minute=minute_block, second=0, microsecond=0, tzinfo=timezone.utc)
+
+def partial_candle(candles_1m):
+    """In-progress 30m candle from the 1m candles so far (aggregator rules)"""
+    return {
+        'open': candles_1m[0]['open'],
+        'high': max(c['high'] for c in candles_1m),
+        'low': min(c['low'] for c in candles_1m),
+        'close': candles_1m[-1]['close'],
+        'range': sum(c['range'] for c in candles_1m)
+    }
+
+async def stage_orders(symbol, window_start):
+    """Pre-compute the order for the window about to close, if a pattern could complete"""
+    window_key = window_start.replace(tzinfo=None)
+    
+    c1, c2 = (await adb.get_30m_candles(symbol, 2) + [None, None])[:2]
+    if c2 is None or c2['window_start'] != window_key - timedelta(minutes=30):
+        return
+    
+    # 010+doji needs c1 bullish and c2 bearish before the doji can complete
+    if not is_bullish(c1) or is_bullish(c2):
+        return
+    
+    candles_1m = await adb.get_1m_candles(symbol, window_start, datetime.now(timezone.utc))
+    if not candles_1m:
+        return
     
+    c3 = partial_candle(candles_1m)
+    balance = balance_cache.value
+    if balance is None:
+        balance = await balance_cache.get()
+    
+    direction = 0
+    plan = plan_order(c3, balance, direction)
+    staged_orders[(symbol, window_key)] = {
+        'c3': c3,
+        'balance': balance,
+        'direction': direction,
+        'stake': calculate_stake(balance),
+        'plan': plan
+    }
+    
+    # Have a live quote (proposal mode) or an authorized socket ready for the buy
+    if proposals is not None:
+        if plan:
+            await proposals.prefetch(symbol, plan)
+    else:
+        await get_api().warm_up()
+    
+    print(
+        f"[EXECUTOR] 🧮 Pre-staged {symbol} {window_key} | "
+        f"{'mult ' + str(plan['multiplier']) + 'x' if plan else 'no valid multiplier'}"
+    )
+
+async def prestager():
+    """Stage candidate orders PRESTAGE_LEAD seconds before every 30m boundary"""
     while True:
+        now = datetime.now(timezone.utc)
+        window_start = floor_30min(now)
+        stage_at = window_start + timedelta(minutes=30) - timedelta(seconds=config.PRESTAGE_LEAD)
+        
+        if now >= stage_at:
+            window_start += timedelta(minutes=30)
+            stage_at += timedelta(minutes=30)
+        
+        await asyncio.sleep((stage_at - now).total_seconds())
+        
+        # Drop plans for windows that never produced a signal
+        for key in [k for k in staged_orders if k[1] < window_start.replace(tzinfo=None)]:
+            del staged_orders[key]
+        
+        for symbol in config.PRESTAGE_SYMBOLS:
+            try:
+                await stage_orders(symbol, window_start)
+            except Exception as e:
+                print(f"[EXECUTOR] Pre-stage error ({symbol}): {e}")
+
+async def warm_keeper():
+    """Keep the pre-authorized buy socket alive until the signal arrives"""
+    while True:
+        await asyncio.sleep(config.WARM_SOCKET_PING)
+        
         try:
-            await api.connect()
-            await api.subscribe_portfolio(on_portfolio_update)
-            
-            # Keep connection alive
-            while True:
-                await asyncio.sleep(60)
+            await get_api().keep_warm()
+        except Exception as e:
+            print(f"[EXECUTOR] Warm socket ping error: {e}")
+
+async def balance_keeper():
+    """Refresh the cached balance before it goes stale so trades never wait"""
+    while True:
+        await asyncio.sleep(config.BALANCE_MAX_AGE / 2)
         
+        try:
+            if balance_cache.age() > config.BALANCE_MAX_AGE / 2:
+                await balance_cache.refresh()
         except Exception as e:
-            print(f"[EXECUTOR] Portfolio monitor error: {e}. Reconnecting...")
-            await asyncio.sleep(5)
+            print(f"[EXECUTOR] Balance refresh error: {e}")
 
 async def main():
     """Main loop"""
-    global api
+    global stream, pipeline, proposals
     
     print(f"[EXECUTOR] Starting for {config.SYMBOL}...")
     print(f"[EXECUTOR] Mode: {config.MODE}")
     print(f"[EXECUTOR] Base stake: ${config.BASE_STAKE}")
     
-    # Initialize API with auth
-    # api = DerivAPI(use_auth=True)
+    # One authorized stream for balance and open-contract pushes
+    stream = DerivStream(use_auth=True)
+    stream.on('balance', balance_cache.on_balance)
+    stream.on('proposal_open_contract', on_open_contract)
+    await stream.subscribe('balance', {"balance": 1, "account": "current"})
+    
+    if config.ORDER_MODE == 'proposal':
+        proposals = ProposalBook(stream)
+        stream.on('proposal', proposals.on_proposal)
+    print(f"[EXECUTOR] Order mode: {config.ORDER_MODE}")
+    
+    # Load the open-trade index and re-attach to contracts left open
+    for trade in db.get_open_trades():
+        open_trades[int(trade['contract_id'])] = trade
+        await track_contract(trade['contract_id'])
+    print(f"[EXECUTOR] Tracking {len(open_trades)} open contract(s)")
+    
+    # Order pipeline: signals are marked processed only after execution
+    pipeline = OrderPipeline(
+        execute_trade,
+        concurrency=config.ORDER_CONCURRENCY,
+        serialize_account=config.ORDER_SERIALIZE_ACCOUNT,
+        on_done=lambda signal: adb.mark_signal_processed(signal['_id'])
+    )
+    pipeline.start()
+    print(f"[EXECUTOR] Order concurrency: {config.ORDER_CONCURRENCY}")
+    
+    tasks = [stream.run_forever(), balance_keeper(), signal_checker()]
+    if config.PRESTAGE_LEAD > 0:
+        tasks.append(prestager())
+        if proposals is None:
+            tasks.append(warm_keeper())
     
-    # Run signal checker only
-    await signal_checker()
+    await asyncio.gather(*tasks)
 
 if __name__ == '__main__':
     asyncio.run(main())
\ No newline at end of file
@@ -0,0 +1,110 @@
+"""
+services/executor/order_pipeline.py
+===================================
+Bounded-concurrency order pipeline for the executor.
+
+Signals are queued and drained by a fixed pool of workers, so several
+symbols firing on the same 30m boundary are sent in parallel instead of
+being skipped. Orders for the same symbol (and optionally the whole
+account) are serialized with per-key locks.
+"""
+import asyncio
+import inspect
+import time
+
+
+class OrderPipeline:
+    def __init__(self, handler, concurrency=4, serialize_account=False, on_done=None):
+        """
+        handler:            async fn(signal) that places one order
+        concurrency:        max orders in flight at once
+        serialize_account:  if True only one order per account at a time
+        on_done:            optional fn(signal) (sync or async) called after
+                            the handler, whatever its outcome (e.g. mark
+                            processed)
+        """
+        self.handler = handler
+        self.concurrency = concurrency
+        self.serialize_account = serialize_account
+        self.on_done = on_done
+
+        self.queue = asyncio.Queue()
+        self.queued = set()
+        self.symbol_locks = {}
+        self.account_lock = asyncio.Lock()
+        self.workers = []
+
+        # Metrics
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.max_queue_depth = 0
+        self.completed = 0
+        self.failed = 0
+        self.total_wait = 0.0
+
+    def start(self):
+        """Spawn the worker tasks"""
+        for i in range(self.concurrency):
+            self.workers.append(asyncio.create_task(self._worker(i)))
+
+    async def submit(self, signal):
+        """Queue a signal unless it is already queued or in flight"""
+        key = signal['_id']
+        if key in self.queued:
+            return False
+
+        self.queued.add(key)
+        await self.queue.put((time.monotonic(), signal))
+        self.max_queue_depth = max(self.max_queue_depth, self.queue.qsize())
+        return True
+
+    def metrics(self):
+        """Snapshot of pipeline counters"""
+        done = self.completed + self.failed
+        return {
+            'in_flight': self.in_flight,
+            'queue_depth': self.queue.qsize(),
+            'max_in_flight': self.max_in_flight,
+            'max_queue_depth': self.max_queue_depth,
+            'completed': self.completed,
+            'failed': self.failed,
+            'avg_wait_ms': (self.total_wait / done * 1000) if done else 0.0
+        }
+
+    def _symbol_lock(self, symbol):
+        if symbol not in self.symbol_locks:
+            self.symbol_locks[symbol] = asyncio.Lock()
+        return self.symbol_locks[symbol]
+
+    async def _run(self, signal):
+        async with self._symbol_lock(signal.get('symbol')):
+            if self.serialize_account:
+                async with self.account_lock:
+                    await self.handler(signal)
+            else:
+                await self.handler(signal)
+
+    async def _worker(self, n):
+        while True:
+            queued_at, signal = await self.queue.get()
+            self.total_wait += time.monotonic() - queued_at
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+
+            try:
+                await self._run(signal)
+                self.completed += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"[PIPELINE] Worker {n} error on {signal.get('_id')}: {e}")
+            finally:
+                self.in_flight -= 1
+                try:
+                    if self.on_done:
+                        result = self.on_done(signal)
+                        if inspect.isawaitable(result):
+                            await result
+                except Exception as e:
+                    print(f"[PIPELINE] on_done error on {signal.get('_id')}: {e}")
+                self.queued.discard(signal['_id'])
+                self.queue.task_done()
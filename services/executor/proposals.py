@@ -0,0 +1,127 @@
+"""
+services/executor/proposals.py
+==============================
+Proposal pre-fetching for ORDER_MODE=proposal.
+
+A live `proposal` subscription is opened on the shared DerivStream for the
+order we expect to place (symbol, contract type, multiplier, stake, SL/TP).
+When the signal fires we buy by proposal id at the already-quoted price,
+so Deriv does not have to price the contract inline. If the final order
+differs from what was quoted (SL/TP follow the final candle, so it often
+does) the quote is dropped and the caller buys directly: re-quoting on
+the spot costs a forget, a proposal and a buy, which is slower than one
+direct buy.
+"""
+import asyncio
+import itertools
+import time
+
+
+class ProposalBook:
+    def __init__(self, stream):
+        self.stream = stream
+        self.quotes = {}  # params key -> (received_at, proposal)
+        self.subscribed = {}  # symbol -> (params key, stream subscription key)
+        self.seq = itertools.count()
+        self._forgetting = set()  # background unsubscribes, kept until done
+
+    @staticmethod
+    def params(symbol, plan):
+        """Proposal request for a planned order"""
+        return {
+            "proposal": 1,
+            "amount": float(plan['stake']),
+            "basis": "stake",
+            "contract_type": plan['contract_type'],
+            "currency": "USD",
+            "symbol": symbol,
+            "multiplier": int(plan['multiplier']),
+            "limit_order": {
+                "stop_loss": float(plan['sl_usd']),
+                "take_profit": float(plan['tp_usd'])
+            }
+        }
+
+    @staticmethod
+    def key(params):
+        limit_order = params.get('limit_order') or {}
+        return (
+            params.get('symbol'),
+            params.get('contract_type'),
+            int(params.get('multiplier', 0)),
+            float(params.get('amount', 0)),
+            float(limit_order.get('stop_loss', 0)),
+            float(limit_order.get('take_profit', 0))
+        )
+
+    async def on_proposal(self, data):
+        """DerivStream callback for `proposal` messages"""
+        proposal = data.get('proposal')
+        key = self.key(data.get('echo_req') or {})
+
+        # Ignore late pushes for quotes we already used or dropped
+        if proposal and proposal.get('id') and self.subscribed.get(key[0], (None,))[0] == key:
+            self.quotes[key] = (time.monotonic(), proposal)
+
+    async def prefetch(self, symbol, plan):
+        """Subscribe to a live quote for `plan`, replacing any older quote for the symbol"""
+        params = self.params(symbol, plan)
+        key = self.key(params)
+
+        if self.subscribed.get(symbol, (None,))[0] == key and key in self.quotes:
+            return self.quotes[key][1]
+
+        await self.cancel(symbol)
+        sub_key = f"proposal:{symbol}:{next(self.seq)}"
+        self.subscribed[symbol] = (key, sub_key)
+        try:
+            data = await self.stream.subscribe(sub_key, params)
+        except Exception as e:
+            # e.g. stake or multiplier out of range: leave nothing behind to replay
+            print(f"[EXECUTOR] ⚠️  Quote failed for {symbol}: {e}")
+            await self.cancel(symbol)
+            return None
+
+        if data is None:
+            return None  # stream not connected yet; sent on (re)connect
+        await self.on_proposal(data)
+        return data.get('proposal')
+
+    def _drop(self, symbol):
+        """Forget the symbol's quote locally; returns the stream key to unsubscribe"""
+        key, sub_key = self.subscribed.pop(symbol, (None, None))
+        self.quotes.pop(key, None)
+        return sub_key
+
+    async def cancel(self, symbol):
+        """Drop the live quote for a symbol"""
+        sub_key = self._drop(symbol)
+        if sub_key is not None:
+            await self.stream.unsubscribe(sub_key)
+
+    async def buy(self, symbol, plan):
+        """
+        Buy `plan` by proposal id. Returns (buy_response, 'proposal') if a
+        pre-fetched quote matched, or (None, 'direct_requote') if none did:
+        the caller then places a direct buy.
+        """
+        key = self.key(self.params(symbol, plan))
+        quote = self.quotes.get(key)
+
+        # A proposal id is single-use, and a quote for other parameters is
+        # useless: drop it now, forget it server-side off the order path
+        sub_key = self._drop(symbol)
+        data = None
+        if quote is not None:
+            proposal = quote[1]
+            data = await self.stream.request({"buy": proposal['id'], "price": float(proposal['ask_price'])})
+        if sub_key is not None:
+            task = asyncio.create_task(self.stream.unsubscribe(sub_key))
+            self._forgetting.add(task)
+            task.add_done_callback(self._forgetting.discard)
+
+        if data is None:
+            return None, 'direct_requote'
+        if 'error' in data:
+            raise RuntimeError(f"Buy error: {data['error']}")
+        return data.get('buy'), 'proposal'
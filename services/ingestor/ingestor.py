@@ -1,22 +1,26 @@
 """
 services/ingestor/ingestor.py
 =============================
-Real-time tick aggregation into 1-min candles.
+Real-time tick aggregation into 1-min candles. Each closed candle is
+folded into the 1m streaming indicators and stored with their values.
 """
 
 import asyncio
-import json
 import sys
 from datetime import datetime, timezone
 
 # Make shared modules importable
 sys.path.insert(0, "/app/shared")
 
-from mongo_client import MongoDB
-from deriv_api import DerivAPI
+from mongo_client import MongoDB, AsyncMongoDB
+from deriv_api import DerivStream
+from latency import stamp
+from indicators import IndicatorFeed
 import config
 
 db = MongoDB()
+adb = AsyncMongoDB(db)
+indicators_1m = IndicatorFeed(adb, config.SYMBOL, "1m")
 
 current_minute = None
 tick_buffer = []
@@ -37,22 +41,32 @@ async def on_tick(tick: dict):
     ts = datetime.fromtimestamp(epoch, timezone.utc)
     minute_start = floor_minute(ts)
 
-    # If we moved into a new minute, save the previous one.
+    # If we moved into a new minute, hand the previous one off for saving.
+    # The buffer is swapped before awaiting so ticks arriving during the
+    # write land in the new minute.
+    closed_minute, closed_ticks = None, None
     if current_minute and current_minute != minute_start:
-        await save_candle()
+        closed_minute, closed_ticks = current_minute, tick_buffer
         tick_buffer = []
 
     current_minute = minute_start
     tick_buffer.append({"price": price, "epoch": epoch})
     previous_price = price
 
+    if closed_ticks:
+        await save_candle(closed_minute, closed_ticks)
 
-async def save_candle():
-    """Aggregate buffered ticks into a 1-minute candle and save to Mongo."""
-    if not tick_buffer:
+
+async def save_candle(minute_start, ticks):
+    """Aggregate one minute of ticks into a 1-minute candle and save to Mongo."""
+    if not ticks:
         return
 
-    prices = [t["price"] for t in tick_buffer]
+    # Called on the first tick of the next minute, i.e. when the candle closes
+    timing = stamp(None, "last_tick", datetime.fromtimestamp(ticks[-1]["epoch"], timezone.utc))
+    timing = stamp(timing, "candle_closed")
+
+    prices = [t["price"] for t in ticks]
 
     # Use summed absolute price moves as a range proxy.
     summed_range = sum(
@@ -61,7 +75,7 @@ async def save_candle():
 
     candle = {
         "symbol": config.SYMBOL,
-        "minute_start": current_minute,
+        "minute_start": minute_start,
         "open": prices[0],
         "high": max(prices),
         "low": min(prices),
@@ -71,9 +85,18 @@ async def save_candle():
         "created_at": datetime.now(timezone.utc),
     }
 
-    db.save_1m_candle(candle)
+    try:
+        candle["indicators"] = await indicators_1m.close(candle)
+    except Exception as e:
+        # The candle matters more; the next one catches the indicators up
+        print(f"[INGESTOR] ⚠️  Indicator update failed: {e}")
+    candle["timing"] = stamp(timing, "candle_saved")
+
+    await adb.save_1m_candle(candle)
+    if "indicators" in candle:
+        await indicators_1m.save()
     print(
-        f"[INGESTOR] Saved 1m: {current_minute} | "
+        f"[INGESTOR] Saved 1m: {minute_start} | "
         f"O:{prices[0]:.4f} C:{prices[-1]:.4f} | "
         f"Range:{summed_range:.4f} | Ticks:{len(prices)}"
     )
@@ -82,25 +105,12 @@ async def save_candle():
 async def main():
     """Main ingestion loop."""
     print(f"[INGESTOR] Starting for {config.SYMBOL}...")
-    api = DerivAPI(use_auth=False)
-
-    while True:
-        try:
-            await api.connect()
-            # Subscribe for ticks – this just tells Deriv what we want.
-            await api.subscribe_ticks(config.SYMBOL, on_tick)
-
-            # Now *we* continuously read from the WebSocket and forward ticks.
-            while True:
-                raw = await api.ws.recv()
-                data = json.loads(raw)
-                tick = data.get("tick")
-                if tick:
-                    await on_tick(tick)
-
-        except Exception as e:
-            print(f"[INGESTOR] Error: {e}. Reconnecting...")
-            await asyncio.sleep(5)
+
+    # The stream reconnects and re-subscribes on its own.
+    stream = DerivStream(use_auth=False)
+    stream.on("tick", lambda data: on_tick(data["tick"]))
+    await stream.subscribe("ticks", {"ticks": config.SYMBOL})
+    await stream.run_forever()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,92 @@
+"""
+shared/bench_write_concern.py
+=============================
+Candle write throughput under each write-concern profile.
+
+Writes synthetic 1m candles into a scratch database (DB_NAME + "_bench"),
+once as single upserts (the ingestor path) and once as bulk upserts (the
+backfill path), for every profile in config.WRITE_CONCERN_PROFILES, then
+drops the scratch database.
+
+    python bench_write_concern.py
+    python bench_write_concern.py --single 2000 --bulk 50000 --profiles fast majority
+"""
+import argparse
+import sys
+import os
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(__file__))
+import config
+from pymongo import MongoClient, ASCENDING, UpdateOne, WriteConcern
+
+def synthetic_candles(n, symbol='BENCH'):
+    start = datetime(2020, 1, 1)
+    for i in range(n):
+        price = 100 + (i % 50) * 0.01
+        yield {
+            'symbol': symbol,
+            'minute_start': start + timedelta(minutes=i),
+            'open': price,
+            'high': price + 0.05,
+            'low': price - 0.05,
+            'close': price + 0.01,
+            'range': 0.3,
+            'tick_count': 30,
+            'created_at': datetime.utcnow()
+        }
+
+def bench_single(coll, n):
+    t0 = time.perf_counter()
+    for c in synthetic_candles(n):
+        coll.update_one({'symbol': c['symbol'], 'minute_start': c['minute_start']}, {'$set': c}, upsert=True)
+    return n / (time.perf_counter() - t0)
+
+def bench_bulk(coll, n, chunk_size):
+    candles = list(synthetic_candles(n, symbol='BENCH_BULK'))
+    t0 = time.perf_counter()
+    for i in range(0, n, chunk_size):
+        chunk = candles[i:i + chunk_size]
+        coll.bulk_write(
+            [UpdateOne({'symbol': c['symbol'], 'minute_start': c['minute_start']}, {'$set': c}, upsert=True)
+             for c in chunk],
+            ordered=False
+        )
+    return n / (time.perf_counter() - t0)
+
+def main():
+    parser = argparse.ArgumentParser(description="Candle write throughput per write-concern profile")
+    parser.add_argument('--single', type=int, default=1000, help="single upserts per profile")
+    parser.add_argument('--bulk', type=int, default=20000, help="bulk-upserted candles per profile")
+    parser.add_argument('--chunk', type=int, default=config.BULK_CHUNK_SIZE)
+    parser.add_argument('--profiles', nargs='+', default=list(config.WRITE_CONCERN_PROFILES))
+    args = parser.parse_args()
+
+    client = MongoClient(config.MONGO_URI)
+    db_name = f"{config.DB_NAME}_bench"
+    db = client[db_name]
+
+    results = {}
+    try:
+        for profile in args.profiles:
+            coll_name = f"candles_{profile}"
+            db[coll_name].drop()
+            db[coll_name].create_index([('symbol', ASCENDING), ('minute_start', ASCENDING)], unique=True)
+            coll = db.get_collection(coll_name, write_concern=WriteConcern(**config.WRITE_CONCERN_PROFILES[profile]))
+
+            single = bench_single(coll, args.single)
+            bulk = bench_bulk(coll, args.bulk, args.chunk)
+            results[profile] = (single, bulk)
+            print(f"[BENCH] {profile:<15} single: {single:9.0f} candles/s | bulk: {bulk:9.0f} candles/s")
+    finally:
+        client.drop_database(db_name)
+
+    baseline = results.get('majority') or results.get('journaled')
+    if baseline:
+        print("\n[BENCH] Speed-up vs " + ('majority' if 'majority' in results else 'journaled'))
+        for profile, (single, bulk) in results.items():
+            print(f"  {profile:<15} single: {single / baseline[0]:5.1f}x | bulk: {bulk / baseline[1]:5.1f}x")
+
+if __name__ == '__main__':
+    main()
@@ -3,38 +3,46 @@ shared/calculator.py
 ====================
 Trading calculations
 """
+import bisect
 import sys
 import os
 sys.path.insert(0, os.path.dirname(__file__))
 import config
 
-def calculate_stake(balance):
-    """Calculate stake based on balance"""
+# Sorted once; calculate_multiplier bisects instead of scanning the list
+MULTIPLIERS = sorted(config.AVAILABLE_MULTIPLIERS)
+
+def calculate_stake(balance, base_stake=None, stake_increment=None, profit_milestone=None):
+    """Calculate stake based on balance (config values unless overridden)"""
+    base_stake = config.BASE_STAKE if base_stake is None else base_stake
+    stake_increment = config.STAKE_INCREMENT if stake_increment is None else stake_increment
+    profit_milestone = config.PROFIT_MILESTONE if profit_milestone is None else profit_milestone
+    
     if balance < 1000:
-        return config.BASE_STAKE
+        return base_stake
     
-    profit_bands = int((balance - 1000) / config.PROFIT_MILESTONE)
-    stake = config.BASE_STAKE + (profit_bands * config.STAKE_INCREMENT)
+    profit_bands = int((balance - 1000) / profit_milestone)
+    stake = base_stake + (profit_bands * stake_increment)
     
     # Cap at 5% of balance
     max_stake = balance * 0.05
     return min(stake, max_stake)
 
-def calculate_multiplier(entry, sl, stake):
+def calculate_multiplier(entry, sl, stake, breathing_multiple=None):
     """Calculate multiplier using breathing room"""
     sl_dist = entry - sl
     
     if sl_dist <= 0 or entry <= 0:
         return None
     
-    k = config.BREATHING_MULTIPLE
+    k = config.BREATHING_MULTIPLE if breathing_multiple is None else breathing_multiple
     mult_cap = entry / (k * sl_dist)
     
-    valid = [m for m in config.AVAILABLE_MULTIPLIERS if m <= mult_cap]
+    i = bisect.bisect_right(MULTIPLIERS, mult_cap)
     
-    return max(valid) if valid else None
+    return MULTIPLIERS[i - 1] if i else None
 
-def is_doji(candle):
+def is_doji(candle, threshold=None):
     """Check if candle is doji"""
     body = abs(candle['close'] - candle['open'])
     rng = candle['high'] - candle['low']
@@ -43,7 +51,7 @@ def is_doji(candle):
         return False
     
     body_pct = body / rng
-    return body_pct < config.DOJI_THRESHOLD
+    return body_pct < (config.DOJI_THRESHOLD if threshold is None else threshold)
 
 def is_bullish(candle):
     """Check if candle is bullish"""
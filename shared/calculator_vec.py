@@ -0,0 +1,59 @@
+"""
+shared/calculator_vec.py
+========================
+Array-in/array-out counterparts of shared/calculator.py.
+
+Each function takes NumPy columns (open, high, low, close, range,
+balance, ...) and returns one value per row with the same rules as the
+scalar version, so backtests and batch research share the live maths.
+Where a scalar function returns None, the array version returns 0.
+
+Requires numpy (research/backtest images); the live services keep using
+calculator.py.
+"""
+import sys
+import os
+sys.path.insert(0, os.path.dirname(__file__))
+import numpy as np
+
+import config
+from calculator import MULTIPLIERS
+
+_MULTIPLIERS = np.array(MULTIPLIERS, dtype=float)
+
+def calculate_stake(balance, base_stake=None, stake_increment=None, profit_milestone=None):
+    """calculate_stake() for an array of balances"""
+    base_stake = config.BASE_STAKE if base_stake is None else base_stake
+    stake_increment = config.STAKE_INCREMENT if stake_increment is None else stake_increment
+    profit_milestone = config.PROFIT_MILESTONE if profit_milestone is None else profit_milestone
+
+    balance = np.asarray(balance, dtype=float)
+    profit_bands = np.trunc((balance - 1000) / profit_milestone)
+    stake = np.minimum(base_stake + profit_bands * stake_increment, balance * 0.05)
+    return np.where(balance < 1000, base_stake, stake)
+
+def calculate_multiplier(entry, sl, breathing_multiple=None):
+    """calculate_multiplier() for arrays of entry and SL prices (0 where none fits)"""
+    k = config.BREATHING_MULTIPLE if breathing_multiple is None else breathing_multiple
+
+    entry = np.asarray(entry, dtype=float)
+    sl_dist = entry - np.asarray(sl, dtype=float)
+    ok = (sl_dist > 0) & (entry > 0)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        mult_cap = np.where(ok, entry / (k * sl_dist), 0.0)
+    i = np.searchsorted(_MULTIPLIERS, mult_cap, side='right')
+    return np.where(ok & (i > 0), _MULTIPLIERS[np.maximum(i - 1, 0)], 0.0)
+
+def is_doji(open_, high, low, close, threshold=None):
+    """is_doji() for candle columns"""
+    threshold = config.DOJI_THRESHOLD if threshold is None else threshold
+
+    body = np.abs(np.asarray(close, dtype=float) - np.asarray(open_, dtype=float))
+    rng = np.asarray(high, dtype=float) - np.asarray(low, dtype=float)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (rng != 0) & (body / rng < threshold)
+
+def is_bullish(open_, close):
+    """is_bullish() for candle columns"""
+    return np.asarray(close) > np.asarray(open_)
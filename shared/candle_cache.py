@@ -0,0 +1,130 @@
+"""
+shared/candle_cache.py
+======================
+In-process read-through cache of the most recent candles.
+
+One bounded ring per (timeframe, symbol) holds the newest N candles in
+time order. Rings are filled on write and (re)primed with a single "last N"
+query when a read misses. A read is only served from memory
+when the ring provably covers it:
+
+  - last(n):       the ring holds n candles (or everything there is) and
+                   no newer candle can have closed since the newest one
+  - range(s, e):   every period slot in [s, e) is in the ring and the
+                   range does not extend past the newest cached candle
+
+so candles written by other services are picked up as soon as they can
+exist. Re-writing a key that is already cached (e.g. backfill upserts)
+invalidates that symbol's ring. Rewrites done by *other* processes to
+keys already cached are not seen until the ring is re-primed.
+"""
+import threading
+from collections import deque
+from datetime import datetime, timedelta, timezone
+
+
+def _naive_utc(dt):
+    """Mongo returns naive UTC; key cached candles the same way"""
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+class CandleCache:
+    def __init__(self, time_field, period_seconds, size=120):
+        self.time_field = time_field
+        self.period = timedelta(seconds=period_seconds)
+        self.size = size
+        self.rings = {}      # symbol -> deque of candles, oldest first
+        self.complete = {}   # symbol -> True if the ring holds every stored candle
+        self.lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.invalidations = 0
+
+    def _key(self, candle):
+        return _naive_utc(candle[self.time_field])
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'invalidations': self.invalidations,
+            'hit_rate': self.hits / total if total else 0.0,
+            'symbols': len(self.rings),
+        }
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+    def put(self, candle):
+        """Record a candle that was just written"""
+        symbol = candle['symbol']
+        key = self._key(candle)
+
+        with self.lock:
+            ring = self.rings.get(symbol)
+            if ring is None:
+                return  # not primed yet: first read loads it
+            if ring and key <= self._key(ring[-1]):
+                if any(self._key(c) == key for c in ring):
+                    # Upsert of a cached key: the merged document may differ
+                    self._invalidate(symbol)
+                # Older than the ring's tail: outside what we cache
+                return
+            ring.append(dict(candle, **{self.time_field: key}))
+            if len(ring) == self.size:
+                self.complete[symbol] = False
+
+    def prime(self, symbol, candles, requested):
+        """Load the ring from a "last `requested`" query (candles oldest first)"""
+        with self.lock:
+            self.rings[symbol] = deque(candles[-self.size:], maxlen=self.size)
+            self.complete[symbol] = len(candles) < requested
+
+    def _invalidate(self, symbol):
+        self.rings.pop(symbol, None)
+        self.complete.pop(symbol, None)
+        self.invalidations += 1
+
+    def invalidate(self, symbol=None):
+        """Drop one symbol's ring, or every ring"""
+        with self.lock:
+            for s in ([symbol] if symbol is not None else list(self.rings)):
+                self._invalidate(s)
+
+    # ------------------------------------------------------------------
+    # Reads: return a list of copies on a hit, None on a miss
+    # ------------------------------------------------------------------
+    def _fresh(self, ring, now):
+        # The candle after the newest one cannot be stored before it closes
+        return bool(ring) and now < self._key(ring[-1]) + 2 * self.period
+
+    def last(self, symbol, n, now=None):
+        """The newest n candles, oldest first"""
+        now = _naive_utc(now or datetime.now(timezone.utc))
+
+        with self.lock:
+            ring = self.rings.get(symbol)
+            if ring is not None and self._fresh(ring, now) and (len(ring) >= n or self.complete[symbol]):
+                self.hits += 1
+                return [dict(c) for c in list(ring)[-n:]]
+            self.misses += 1
+            return None
+
+    def range(self, symbol, start, end):
+        """Candles with start <= time < end, oldest first"""
+        start, end = _naive_utc(start), _naive_utc(end)
+
+        with self.lock:
+            ring = self.rings.get(symbol)
+            if ring and end <= self._key(ring[-1]) + self.period:
+                candles = [c for c in ring if start <= self._key(c) < end]
+                expected = -(-(end - start) // self.period)
+                if len(candles) == expected:
+                    self.hits += 1
+                    return [dict(c) for c in candles]
+            self.misses += 1
+            return None
@@ -15,12 +15,100 @@ COLL_30M = 'candles_30m'
 COLL_SIGNALS = 'trade_signals'
 COLL_TRADES = 'trades'
 COLL_BALANCE = 'balance_history'
+COLL_RATE_LIMITS = 'rate_limits'
+COLL_SCHEMA = 'schema_migrations'
+COLL_INDICATORS = 'indicator_state'
+
+# Threads behind AsyncMongoDB
+MONGO_ASYNC_WORKERS = int(os.getenv('MONGO_ASYNC_WORKERS', 4))
+
+# Candle storage: 'standard' collections or native 'timeseries' collections
+# (switch only after running migrate_timeseries.py)
+CANDLE_STORAGE = os.getenv('CANDLE_STORAGE', 'standard')
+
+# 1m candle layout: one 'document' per candle, or one 'bucket' document per
+# symbol-hour holding 60 candles as parallel arrays (candles_1m_hourly)
+CANDLE_1M_LAYOUT = os.getenv('CANDLE_1M_LAYOUT', 'document')
+COLL_1M_BUCKETS = 'candles_1m_hourly'
+
+# In-process cache of the newest candles per symbol and timeframe
+CANDLE_CACHE = os.getenv('CANDLE_CACHE', 'false').lower() == 'true'
+CANDLE_CACHE_SIZE = int(os.getenv('CANDLE_CACHE_SIZE', 120))
+
+# Detector strategy plugins to run (services/detector/strategies), a time
+# budget per strategy call, and overruns in a row before one is disabled
+STRATEGIES = [s.strip() for s in os.getenv('STRATEGIES', '010_doji').split(',') if s.strip()]
+STRATEGY_BUDGET_MS = int(os.getenv('STRATEGY_BUDGET_MS', 500))
+STRATEGY_MAX_OVERRUNS = int(os.getenv('STRATEGY_MAX_OVERRUNS', 3))
+
+# Streaming indicators (shared/indicators.py): candles replayed to warm up
+# a fresh or stale indicator state
+INDICATOR_WARMUP = int(os.getenv('INDICATOR_WARMUP', 200))
+
+# Write-concern profile per collection: unacknowledged (w=0), fast
+# (w=1, no journal wait), journaled (w=1, j) or majority (w=majority, j).
+# Candles can be re-derived from Deriv history; trades and balances cannot.
+WRITE_CONCERN_PROFILES = {
+    'unacknowledged': {'w': 0},
+    'fast': {'w': 1, 'j': False},
+    'journaled': {'w': 1, 'j': True},
+    'majority': {'w': 'majority', 'j': True},
+}
+WC_CANDLES = os.getenv('WC_CANDLES', 'fast')
+WC_SIGNALS = os.getenv('WC_SIGNALS', 'journaled')
+WC_TRADES = os.getenv('WC_TRADES', 'majority')
+WC_BALANCE = os.getenv('WC_BALANCE', 'majority')
+WC_DEFAULT = os.getenv('WC_DEFAULT', 'fast')
+WRITE_CONCERN = {
+    COLL_1M: WC_CANDLES,
+    COLL_30M: WC_CANDLES,
+    COLL_1M_BUCKETS: WC_CANDLES,
+    COLL_SIGNALS: WC_SIGNALS,
+    COLL_TRADES: WC_TRADES,
+    COLL_BALANCE: WC_BALANCE,
+}
+
+# Retention: days to keep per collection (0 = forever); older whole days are
+# archived to RETENTION_ARCHIVE_DIR, downsampled, then deleted in batches
+RETENTION_DAYS = {
+    COLL_1M: int(os.getenv('RETENTION_1M_DAYS', 90)),
+    COLL_SIGNALS: int(os.getenv('RETENTION_SIGNALS_DAYS', 180)),
+    COLL_BALANCE: int(os.getenv('RETENTION_BALANCE_DAYS', 365)),
+}
+RETENTION_ARCHIVE_DIR = os.getenv('RETENTION_ARCHIVE_DIR', '/app/archive')
+RETENTION_BATCH = int(os.getenv('RETENTION_BATCH', 1000))
+RETENTION_PAUSE = float(os.getenv('RETENTION_PAUSE', 0.05))  # seconds between delete batches
+
+# Parquet export for offline analysis (export_parquet.py): output directory,
+# rows per cursor batch / row group, and how far behind now an export stops
+EXPORT_DIR = os.getenv('EXPORT_DIR', '/app/research/parquet')
+EXPORT_BATCH = int(os.getenv('EXPORT_BATCH', 5000))
+EXPORT_LAG_MINUTES = int(os.getenv('EXPORT_LAG_MINUTES', 5))
+
+# Candles per bulk_write batch
+BULK_CHUNK_SIZE = int(os.getenv('BULK_CHUNK_SIZE', 1000))
 
 # Deriv API
 DERIV_API_TOKEN = os.getenv('DERIV_API_TOKEN', '')
 DERIV_APP_ID = os.getenv('DERIV_APP_ID', '1089')
 WS_URL = os.getenv('WS_URL', f'wss://ws.derivws.com/websockets/v3?app_id={DERIV_APP_ID}')
 
+# Deriv API rate limits, "requests_per_second:burst"
+def _rate(name, default):
+    rate, burst = os.getenv(name, default).split(':')
+    return float(rate), float(burst)
+
+RATE_LIMIT_ENABLED = os.getenv('RATE_LIMIT_ENABLED', 'true').lower() == 'true'
+RATE_LIMIT_STORE = os.getenv('RATE_LIMIT_STORE', 'mongo')  # 'mongo' (shared) or 'local'
+RATE_STORE_RETRY = float(os.getenv('RATE_STORE_RETRY', 30))  # seconds on local buckets after a store error
+RATE_GLOBAL = _rate('RATE_GLOBAL', '25:50')
+RATE_ORDER = _rate('RATE_ORDER', '10:10')
+RATE_BALANCE = _rate('RATE_BALANCE', '5:10')
+RATE_HISTORY = _rate('RATE_HISTORY', '2:5')
+# Share of the global burst kept free for higher-priority classes
+RATE_RESERVE_BALANCE = float(os.getenv('RATE_RESERVE_BALANCE', 0.2))
+RATE_RESERVE_HISTORY = float(os.getenv('RATE_RESERVE_HISTORY', 0.5))
+
 # Trading
 SYMBOL = os.getenv('SYMBOL', 'R_50')
 BASE_STAKE = float(os.getenv('BASE_STAKE', 15.0))
@@ -31,5 +119,27 @@ BREATHING_MULTIPLE = float(os.getenv('BREATHING_MULTIPLE', 1.7))
 DOJI_THRESHOLD = float(os.getenv('DOJI_THRESHOLD', 0.85))
 SL_BUFFER_PCT = float(os.getenv('SL_BUFFER_PCT', 0.01))
 
+# Executor balance cache (seconds)
+BALANCE_MAX_AGE = float(os.getenv('BALANCE_MAX_AGE', 300))
+BALANCE_PUSH_WAIT = float(os.getenv('BALANCE_PUSH_WAIT', 2))
+
+# Executor order pipeline
+ORDER_CONCURRENCY = int(os.getenv('ORDER_CONCURRENCY', 4))
+ORDER_SERIALIZE_ACCOUNT = os.getenv('ORDER_SERIALIZE_ACCOUNT', 'false').lower() == 'true'
+SIGNAL_POLL_INTERVAL = float(os.getenv('SIGNAL_POLL_INTERVAL', 1))
+
+# Executor order pre-staging (seconds before the 30m close; 0 disables)
+PRESTAGE_LEAD = float(os.getenv('PRESTAGE_LEAD', 60))
+PRESTAGE_SYMBOLS = os.getenv('PRESTAGE_SYMBOLS', SYMBOL).split(',')
+# Warm sockets are opened at the pre-stage lead and pinged every WARM_SOCKET_PING
+# so Deriv does not drop them while idle; the buy comes 70-130s later
+# (lead + aggregator delay + detector poll), well inside the max age
+WARM_SOCKET_MAX_AGE = float(os.getenv('WARM_SOCKET_MAX_AGE', 300))
+WARM_SOCKET_PING = float(os.getenv('WARM_SOCKET_PING', 30))
+WARM_SOCKETS_MAX = int(os.getenv('WARM_SOCKETS_MAX', 1))  # per DerivAPI instance
+
+# Executor buy path: 'direct' (buy with parameters) or 'proposal' (buy pre-fetched quote)
+ORDER_MODE = os.getenv('ORDER_MODE', 'direct')
+
 # Mode
 MODE = os.getenv('MODE', 'demo')
\ No newline at end of file
@@ -161,25 +161,35 @@ Thin Deriv API wrapper using synchronous websocket-client,
 wrapped in async methods so the rest of the code can `await`
 get_balance() and buy_contract().
 
-We completely avoid the async `websockets` library here.
 All critical calls (auth, balance, buy) use short-lived
 sync WebSocket connections, which is what worked in Colab.
+
+DerivStream is the one exception: a single long-lived async
+connection for streamed data (balance pushes etc.) so the
+executor does not re-authorize for every read.
 """
 
 import json
 import time
 import asyncio
-from typing import Optional, Tuple
+import select
+import threading
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
 
 import websocket  # websocket-client
+import websockets  # async, used only by DerivStream
 
 import config
+from rate_limiter import acquire, classify
 
 
 APP_ID = config.DERIV_APP_ID
 DERIV_TOKEN = config.DERIV_API_TOKEN
 WS_URL = config.WS_URL or f"wss://ws.derivws.com/websockets/v3?app_id={APP_ID}"
 
+# ticks_history returns at most this many candles per request
+CANDLES_PER_REQUEST = 5000
+
 
 class DerivAPI:
     def __init__(self, use_auth: bool = False):
@@ -193,6 +203,10 @@ class DerivAPI:
                 "DERIV_API_TOKEN is empty – set it in your .env file."
             )
 
+        # Pre-authorized sockets waiting for a buy: [(opened_at, ws)]
+        self._warm = []
+        self._warm_lock = threading.Lock()
+
     # ------------------------------------------------------------------
     # Low-level synchronous helpers (same style as your Colab notebook)
     # ------------------------------------------------------------------
@@ -230,6 +244,82 @@ class DerivAPI:
         ws.close()
         raise TimeoutError("Timed out waiting for authorize response.")
 
+    def _warm_up_sync(self, count: int = 1):
+        """
+        Open and authorize `count` sockets ahead of a buy. Sockets older
+        than WARM_SOCKET_MAX_AGE, and the oldest beyond WARM_SOCKETS_MAX,
+        are closed so unused warm-ups do not pile up.
+        """
+        for _ in range(count):
+            ws, _ = self._ws_auth()
+            with self._warm_lock:
+                self._warm.append((time.monotonic(), ws))
+                now = time.monotonic()
+                fresh = [w for w in self._warm if now - w[0] <= config.WARM_SOCKET_MAX_AGE]
+                keep = fresh[-max(1, config.WARM_SOCKETS_MAX):]
+                evicted = [w for w in self._warm if w not in keep]
+                self._warm = keep
+
+            for _, old in evicted:
+                try:
+                    old.close()
+                except Exception:
+                    pass
+
+    @staticmethod
+    def _idle_ok(ws: websocket.WebSocket) -> bool:
+        """
+        True if an idle socket is still open. Nothing is expected on it,
+        so anything readable (a close frame, EOF) means the server gave up
+        on it: better found before the buy is sent than after.
+        """
+        if not ws.connected:
+            return False
+        try:
+            readable, _, _ = select.select([ws.sock], [], [], 0)
+        except (OSError, ValueError):
+            return False
+        return not readable
+
+    def _ping_warm_sync(self, timeout: float = 5.0):
+        """Ping every warm socket so Deriv keeps it open; drop the ones that fail"""
+        with self._warm_lock:
+            warm, self._warm = self._warm, []
+
+        alive = []
+        for opened_at, ws in warm:
+            try:
+                ws.settimeout(timeout)
+                ws.send(json.dumps({"ping": 1}))
+                while json.loads(ws.recv()).get("msg_type") != "ping":
+                    pass
+                ws.settimeout(None)
+                alive.append((opened_at, ws))
+            except Exception:
+                try:
+                    ws.close()
+                except Exception:
+                    pass
+
+        # Sockets warmed while we were pinging are newer: keep them last
+        with self._warm_lock:
+            self._warm = alive + self._warm
+
+    def _take_ws(self) -> Tuple[websocket.WebSocket, bool]:
+        """
+        Pop a pre-authorized socket if one is fresh enough and still open,
+        otherwise authorize a new one. Returns (ws, was_warm).
+        """
+        with self._warm_lock:
+            while self._warm:
+                opened_at, ws = self._warm.pop()
+                if time.monotonic() - opened_at <= config.WARM_SOCKET_MAX_AGE and self._idle_ok(ws):
+                    return ws, True
+                ws.close()
+
+        ws, _ = self._ws_auth()
+        return ws, False
+
     def _get_balance_sync(self) -> float:
         """
         Sync implementation of balance request using websocket-client.
@@ -257,6 +347,33 @@ class DerivAPI:
             raise RuntimeError("Did not receive balance from Deriv.")
         return balance_val
 
+    def _candles_history_sync(self, symbol: str, start_epoch: int, end_epoch: int) -> list:
+        """
+        Sync ticks_history request for 1-min candles. Public data, so no
+        authorize is needed.
+        """
+        ws = websocket.create_connection(WS_URL)
+        ws.send(json.dumps({
+            "ticks_history": symbol,
+            "start": int(start_epoch),
+            "end": int(end_epoch),
+            "style": "candles",
+            "granularity": 60,
+            "count": CANDLES_PER_REQUEST,
+        }))
+
+        try:
+            while True:
+                data = json.loads(ws.recv())
+
+                if "error" in data:
+                    raise RuntimeError(f"History error: {data['error']}")
+
+                if data.get("msg_type") == "candles":
+                    return data.get("candles", [])
+        finally:
+            ws.close()
+
     def _buy_multiplier_sync(
         self,
         symbol: str,
@@ -272,7 +389,7 @@ class DerivAPI:
 
         Returns the raw 'buy' response dict, or raises on error.
         """
-        ws, _ = self._ws_auth()
+        ws, warm = self._take_ws()
 
         buy_payload = {
             "buy": 1,
@@ -291,7 +408,16 @@ class DerivAPI:
             },
         }
 
-        ws.send(json.dumps(buy_payload))
+        try:
+            ws.send(json.dumps(buy_payload))
+        except (websocket.WebSocketException, OSError):
+            # A warm socket may have been dropped while idle; nothing was
+            # sent, so it is safe to retry once on a fresh connection.
+            if not warm:
+                raise
+            ws, _ = self._ws_auth()
+            ws.send(json.dumps(buy_payload))
+
         buy_response = None
         contract_id = None
 
@@ -335,8 +461,31 @@ class DerivAPI:
         """
         Async wrapper for _get_balance_sync() so executor can `await` it.
         """
+        await acquire("balance")
         return await asyncio.to_thread(self._get_balance_sync)
 
+    async def get_candles_history(self, symbol: str, start_epoch: int, end_epoch: int) -> list:
+        """
+        Async wrapper for _candles_history_sync(), throttled as a
+        low-priority history call.
+        """
+        await acquire("history")
+        return await asyncio.to_thread(self._candles_history_sync, symbol, start_epoch, end_epoch)
+
+    async def warm_up(self, count: int = 1):
+        """
+        Authorize sockets in the background so the next buy_contract()
+        skips the connect + authorize round trips.
+        """
+        for _ in range(count):
+            await acquire("balance")
+            await asyncio.to_thread(self._warm_up_sync, 1)
+
+    async def keep_warm(self):
+        """Ping the warm sockets (run every WARM_SOCKET_PING seconds)"""
+        if self._warm:
+            await asyncio.to_thread(self._ping_warm_sync)
+
     async def buy_contract(
         self,
         symbol: str,
@@ -354,6 +503,7 @@ class DerivAPI:
         sl_usd = float(limit_order.get("stop_loss", 0))
         tp_usd = float(limit_order.get("take_profit", 0))
 
+        await acquire("order")
         return await asyncio.to_thread(
             self._buy_multiplier_sync,
             symbol,
@@ -374,9 +524,186 @@ class DerivAPI:
         """
         return
 
+    async def close(self):
+        """
+        Backwards-compat stub; every request closes its own socket.
+        """
+        return
+
     async def subscribe_portfolio(self, callback):
         """
         Stub for future portfolio streaming. Currently unused in your
         latest executor version.
         """
         return
+
+
+class SubscribeError(RuntimeError):
+    """The server rejected a subscription request."""
+
+
+class DerivStream:
+    """
+    Long-lived async Deriv connection shared by all subscriptions.
+
+    One reader task routes every incoming message: responses resolve the
+    pending request with the same req_id, and every message (including
+    subscription pushes) is also dispatched to the callbacks registered
+    for its msg_type. Subscriptions are remembered and replayed after a
+    reconnect, so callers subscribe once and keep receiving pushes.
+    """
+
+    def __init__(self, use_auth: bool = True):
+        self.use_auth = use_auth
+        if self.use_auth and not DERIV_TOKEN:
+            raise RuntimeError(
+                "DERIV_API_TOKEN is empty – set it in your .env file."
+            )
+
+        self.ws = None
+        self.req_id = 0
+        self.pending: Dict[int, asyncio.Future] = {}
+        self.handlers: Dict[str, List[Callable[[dict], Awaitable]]] = {}
+        self.subscriptions: Dict[str, dict] = {}
+        self.subscription_ids: Dict[str, str] = {}
+        self.ready = asyncio.Event()
+        self._reader: Optional[asyncio.Task] = None
+        self._handler_tasks: set = set()  # strong refs until each callback finishes
+
+    # ------------------------------------------------------------------
+    # Connection lifecycle
+    # ------------------------------------------------------------------
+    async def connect(self):
+        """Open the socket, start the reader and authorize if needed."""
+        self.ws = await websockets.connect(WS_URL, ping_interval=20, ping_timeout=20)
+        self._reader = asyncio.create_task(self._read_loop())
+
+        if self.use_auth:
+            data = await self.request({"authorize": DERIV_TOKEN})
+            if "error" in data:
+                raise RuntimeError(f"Auth error: {data['error'].get('message')}")
+
+    async def close(self):
+        """Close the socket and fail any request still waiting."""
+        self.ready.clear()
+        if self.ws is not None:
+            await self.ws.close()
+            self.ws = None
+        if self._reader is not None:
+            self._reader.cancel()
+            self._reader = None
+        for fut in self.pending.values():
+            if not fut.done():
+                fut.set_exception(ConnectionError("Deriv stream closed"))
+        self.pending.clear()
+        self.subscription_ids.clear()
+
+    async def run_forever(self, reconnect_delay: float = 5.0):
+        """Keep the connection up, replaying subscriptions on every reconnect."""
+        while True:
+            try:
+                await self.connect()
+                for key, msg in list(self.subscriptions.items()):
+                    try:
+                        await self._send_subscribe(key, msg)
+                    except SubscribeError as e:
+                        # Rejected by the server: drop it rather than the connection
+                        print(f"[DERIV] ⚠️  {e}; dropping subscription")
+                self.ready.set()
+                print("[DERIV] 📡 Stream connected")
+                await self._reader
+            except asyncio.CancelledError:
+                await self.close()
+                raise
+            except Exception as e:
+                print(f"[DERIV] Stream error: {e}. Reconnecting...")
+
+            await self.close()
+            await asyncio.sleep(reconnect_delay)
+
+    # ------------------------------------------------------------------
+    # Requests and subscriptions
+    # ------------------------------------------------------------------
+    def on(self, msg_type: str, callback: Callable[[dict], Awaitable]):
+        """Register an async callback for every message of `msg_type`."""
+        self.handlers.setdefault(msg_type, []).append(callback)
+
+    async def request(self, msg: dict, timeout: float = 10.0, priority: Optional[str] = None) -> dict:
+        """
+        Send one request and wait for the response with the same req_id.
+        The call is throttled by the shared rate limiter under `priority`
+        (derived from the message type if not given).
+        """
+        if self.ws is None:
+            raise ConnectionError("Deriv stream is not connected")
+
+        await acquire(priority or classify(msg))
+
+        self.req_id += 1
+        req_id = self.req_id
+        fut = asyncio.get_running_loop().create_future()
+        self.pending[req_id] = fut
+
+        try:
+            await self.ws.send(json.dumps(dict(msg, req_id=req_id)))
+            return await asyncio.wait_for(fut, timeout)
+        finally:
+            self.pending.pop(req_id, None)
+
+    async def subscribe(self, key: str, msg: dict) -> Optional[dict]:
+        """
+        Subscribe to a stream and remember it under `key` for replay.
+        If the stream is not connected yet the subscription is only
+        recorded and will be sent by run_forever(). Raises SubscribeError
+        (and forgets `key`) if the server rejects it.
+        """
+        self.subscriptions[key] = msg
+        if self.ws is None:
+            return None
+        return await self._send_subscribe(key, msg)
+
+    async def unsubscribe(self, key: str) -> bool:
+        """
+        Forget a subscription locally and on the server.
+        Returns False if `key` was not subscribed (e.g. already removed).
+        """
+        if self.subscriptions.pop(key, None) is None:
+            return False
+        sub_id = self.subscription_ids.pop(key, None)
+        if sub_id and self.ws is not None:
+            await self.request({"forget": sub_id})
+        return True
+
+    async def _send_subscribe(self, key: str, msg: dict) -> dict:
+        data = await self.request(dict(msg, subscribe=1))
+        if "error" in data:
+            self.subscriptions.pop(key, None)
+            self.subscription_ids.pop(key, None)
+            raise SubscribeError(f"Subscribe error ({key}): {data['error'].get('message')}")
+        sub_id = (data.get("subscription") or {}).get("id")
+        if sub_id:
+            self.subscription_ids[key] = sub_id
+        return data
+
+    async def _read_loop(self):
+        async for raw in self.ws:
+            data = json.loads(raw)
+
+            fut = self.pending.get(data.get("req_id"))
+            if fut is not None and not fut.done():
+                fut.set_result(data)
+
+            if "error" in data:
+                continue
+
+            # Callbacks run as tasks so they may await request() themselves
+            for cb in self.handlers.get(data.get("msg_type"), []):
+                task = asyncio.create_task(self._dispatch(cb, data))
+                self._handler_tasks.add(task)
+                task.add_done_callback(self._handler_tasks.discard)
+
+    async def _dispatch(self, cb, data):
+        try:
+            await cb(data)
+        except Exception as e:
+            print(f"[DERIV] Handler error ({data.get('msg_type')}): {e}")
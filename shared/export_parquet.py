@@ -0,0 +1,356 @@
+"""
+shared/export_parquet.py
+========================
+Incremental Parquet export of candles, trades and balances for offline
+analysis, so research reads files instead of querying the live database.
+
+Layout (hive-style partitions, readable by pyarrow.dataset, DuckDB, pandas):
+
+    EXPORT_DIR/candles_1m/symbol=R_50/day=2026-10-19/part-<run>.parquet
+    EXPORT_DIR/candles_30m/symbol=R_50/day=.../
+    EXPORT_DIR/trades/symbol=R_50/day=.../          closed trades, by exit day
+    EXPORT_DIR/balance_history/day=.../
+
+Rows are selected by when they were written, not by the time they
+describe: a 30m candle only exists ~30m after its window_start, and a
+trade can be recorded closed long after its exit_time. Each run exports
+the rows written after the watermark and before now - EXPORT_LAG_MINUTES,
+per dataset and symbol, then moves the watermark to the newest write it
+exported (EXPORT_DIR/_export_state.json), so repeated runs only append
+what is new and never skip a row that did not exist yet. Documents are
+streamed from a sorted cursor and written EXPORT_BATCH rows at a time,
+one partition file open at a time: memory stays flat whatever the range.
+Part files are written under a temp name and renamed once the
+dataset/symbol is done. Reads go to a secondary when the deployment has
+one.
+
+A candle that is saved again later (e.g. re-filled by backfill) is
+exported again; keep the last row per (symbol, time) when reading. Hour
+buckets have no per-minute write time, so with CANDLE_1M_LAYOUT=bucket
+1m candles are tracked by minute_start (written in order by the
+ingestor) and minutes backfilled behind the watermark need --full.
+
+    python export_parquet.py
+    python export_parquet.py --dataset candles_30m --dataset trades
+    python export_parquet.py --full --since 2025-01-01
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+sys.path.insert(0, os.path.dirname(__file__))
+import config
+from pymongo import ASCENDING, ReadPreference
+from mongo_client import unpack_bucket, hour_start
+
+TS = pa.timestamp('ms', tz='UTC')
+
+CANDLE_COLUMNS = [
+    ('open', pa.float64()),
+    ('high', pa.float64()),
+    ('low', pa.float64()),
+    ('close', pa.float64()),
+    ('range', pa.float64()),
+    ('tick_count', pa.int64()),
+]
+
+# Dataset -> (collection, time field, partition by symbol, extra filter, columns)
+DATASETS = {
+    'candles_1m': (config.COLL_1M, 'minute_start', True, {}, [
+        ('minute_start', TS),
+        *CANDLE_COLUMNS,
+        ('filled', pa.bool_()),
+    ]),
+    'candles_30m': (config.COLL_30M, 'window_start', True, {}, [
+        ('window_start', TS),
+        *CANDLE_COLUMNS,
+        ('candle_count', pa.int64()),
+    ]),
+    'trades': (config.COLL_TRADES, 'exit_time', True, {'status': 'CLOSED'}, [
+        ('contract_id', pa.int64()),
+        ('pattern_id', pa.string()),
+        ('strategy', pa.string()),
+        ('direction', pa.int64()),
+        ('contract_type', pa.string()),
+        ('entry_time', TS),
+        ('exit_time', TS),
+        ('closed_at', TS),
+        ('entry_price', pa.float64()),
+        ('exit_price', pa.float64()),
+        ('sl_price', pa.float64()),
+        ('tp_price', pa.float64()),
+        ('sl_usd', pa.float64()),
+        ('tp_usd', pa.float64()),
+        ('stake', pa.float64()),
+        ('multiplier', pa.float64()),
+        ('buy_price', pa.float64()),
+        ('sell_price', pa.float64()),
+        ('pnl', pa.float64()),
+        ('result', pa.string()),
+        ('balance_before', pa.float64()),
+        ('prestaged', pa.bool_()),
+        ('order_path', pa.string()),
+    ]),
+    'balance_history': (config.COLL_BALANCE, 'time', False, {}, [
+        ('time', TS),
+        ('balance', pa.float64()),
+        ('contract_id', pa.int64()),
+        ('pnl', pa.float64()),
+        ('downsampled', pa.bool_()),
+    ]),
+}
+
+# Dataset -> field holding when the row was written (selection and watermark)
+WRITTEN = {
+    'candles_1m': 'created_at',
+    'candles_30m': 'created_at',
+    'trades': 'closed_at',
+    'balance_history': 'time',
+}
+
+CASTS = {
+    pa.float64(): float,
+    pa.int64(): int,
+    pa.bool_(): bool,
+    pa.string(): str,
+}
+
+def to_table(docs, columns):
+    """Arrow table with a fixed schema; missing or unconvertible values become null"""
+    data = {}
+    for name, type_ in columns:
+        cast = CASTS.get(type_)
+        values = []
+        for doc in docs:
+            v = doc.get(name)
+            if v is not None and cast is not None:
+                try:
+                    v = cast(v)
+                except (TypeError, ValueError):
+                    v = None
+            values.append(v)
+        data[name] = values
+    return pa.table(data, schema=pa.schema(columns))
+
+
+class PartitionWriter:
+    """Writes one dataset/symbol run: one open Parquet file at a time, renamed on commit"""
+
+    def __init__(self, root, columns, run_id):
+        self.root = root
+        self.schema = pa.schema(columns)
+        self.run_id = run_id
+        self.current = None   # (day, ParquetWriter, tmp path, final path)
+        self.pending = []
+        self.opened = {}      # day -> files opened this run
+        self.rows = 0
+
+    def write(self, day, table):
+        if self.current is None or self.current[0] != day:
+            self._close()
+            folder = os.path.join(self.root, f"day={day:%Y-%m-%d}")
+            os.makedirs(folder, exist_ok=True)
+            # Rows arrive in write order, so a day can come round again
+            n = self.opened[day] = self.opened.get(day, 0) + 1
+            name = f"part-{self.run_id}" + (f"-{n}" if n > 1 else '')
+            path = os.path.join(folder, f"{name}.parquet")
+            tmp = os.path.join(folder, f".{name}.parquet.tmp")  # dot: readers skip it
+            self.current = (day, pq.ParquetWriter(tmp, self.schema, compression='zstd'), tmp, path)
+        self.current[1].write_table(table)
+        self.rows += table.num_rows
+
+    def _close(self):
+        if self.current is not None:
+            _, writer, tmp, path = self.current
+            writer.close()
+            self.pending.append((tmp, path))
+            self.current = None
+
+    def commit(self):
+        self._close()
+        for tmp, path in self.pending:
+            os.replace(tmp, path)
+        self.pending = []
+
+    def abort(self):
+        self._close()
+        for tmp, _ in self.pending:
+            os.remove(tmp)
+        self.pending = []
+
+
+class Exporter:
+    def __init__(self, mongo, out_dir=None, batch=None, lag_minutes=None):
+        self.mongo = mongo
+        self.out_dir = out_dir or config.EXPORT_DIR
+        self.batch = batch or config.EXPORT_BATCH
+        lag = config.EXPORT_LAG_MINUTES if lag_minutes is None else lag_minutes
+        self.until = datetime.utcnow().replace(second=0, microsecond=0) - timedelta(minutes=lag)
+        self.run_id = datetime.utcnow().strftime('%Y%m%dT%H%M%S%f')
+        self.state_path = os.path.join(self.out_dir, '_export_state.json')
+        self.state = self._load_state()
+
+    # ------------------------------------------------------------------
+    # Watermarks
+    # ------------------------------------------------------------------
+    def _load_state(self):
+        if not os.path.exists(self.state_path):
+            return {}
+        with open(self.state_path) as f:
+            return json.load(f)
+
+    def _save_state(self):
+        os.makedirs(self.out_dir, exist_ok=True)
+        tmp = self.state_path + '.tmp'
+        with open(tmp, 'w') as f:
+            json.dump(self.state, f, indent=2, sort_keys=True)
+        os.replace(tmp, self.state_path)
+
+    def watermark(self, dataset, key):
+        value = self.state.get(dataset, {}).get(key)
+        return datetime.fromisoformat(value) if value else None
+
+    def reset(self, dataset):
+        """Forget a dataset's watermarks and files (--full)"""
+        self.state.pop(dataset, None)
+        self._save_state()
+        shutil.rmtree(os.path.join(self.out_dir, dataset), ignore_errors=True)
+
+    # ------------------------------------------------------------------
+    # Reading
+    # ------------------------------------------------------------------
+    def _collection(self, name):
+        return self.mongo.collection(name).with_options(read_preference=ReadPreference.SECONDARY_PREFERRED)
+
+    def _written_field(self, dataset):
+        if dataset == 'candles_1m' and self.mongo.bucketed:
+            return 'minute_start'
+        return WRITTEN[dataset]
+
+    def _docs(self, dataset, symbol, after, since=None):
+        """
+        Documents of one dataset/symbol written after `after` (and before
+        self.until), in write order; `since` bounds the time field of a
+        first export
+        """
+        coll_name, time_field, by_symbol, extra, _ = DATASETS[dataset]
+
+        if dataset == 'candles_1m' and self.mongo.bucketed:
+            start = after or since
+            hours = {'$lt': self.until}
+            if start is not None:
+                hours['$gte'] = hour_start(start)
+            cursor = self._collection(config.COLL_1M_BUCKETS).find(
+                {'symbol': symbol, 'hour': hours}
+            ).sort('hour', ASCENDING).batch_size(max(1, self.batch // 60))
+            for doc in cursor:
+                for candle in unpack_bucket(doc, start, self.until):
+                    if after is None or candle['minute_start'] > after:
+                        yield candle
+            return
+
+        written = WRITTEN[dataset]
+        query = {written: {'$lt': self.until}, **extra}
+        if after is not None:
+            query[written]['$gt'] = after
+        if since is not None:
+            query.setdefault(time_field, {})['$gte'] = since
+        if by_symbol:
+            query['symbol'] = symbol
+        cursor = self._collection(coll_name).find(query).sort(written, ASCENDING).batch_size(self.batch)
+        yield from cursor
+
+    def _symbols(self, dataset):
+        coll_name, _, by_symbol, extra, _ = DATASETS[dataset]
+        if not by_symbol:
+            return [None]
+        if dataset == 'candles_1m' and self.mongo.bucketed:
+            coll_name = config.COLL_1M_BUCKETS
+        return sorted(s for s in self._collection(coll_name).distinct('symbol', extra) if s)
+
+    # ------------------------------------------------------------------
+    # Export
+    # ------------------------------------------------------------------
+    def export_one(self, dataset, symbol, since=None):
+        _, time_field, by_symbol, _, columns = DATASETS[dataset]
+        written = self._written_field(dataset)
+        key = symbol or '*'
+        after = self.watermark(dataset, key)
+        last = after
+
+        root = os.path.join(self.out_dir, dataset, f"symbol={symbol}" if by_symbol else '')
+        writer = PartitionWriter(root.rstrip(os.sep), columns, self.run_id)
+        rows, day = [], None
+
+        def flush():
+            if rows:
+                writer.write(day, to_table(rows, columns))
+                rows.clear()
+
+        try:
+            for doc in self._docs(dataset, symbol, after, since):
+                last = doc[written]
+                doc_day = doc[time_field].replace(hour=0, minute=0, second=0, microsecond=0)
+                if doc_day != day:
+                    flush()
+                    day = doc_day
+                rows.append(doc)
+                if len(rows) >= self.batch:
+                    flush()
+            flush()
+            writer.commit()
+        except BaseException:
+            writer.abort()
+            raise
+
+        if last is not None and last != after:
+            self.state.setdefault(dataset, {})[key] = last.isoformat()
+            self._save_state()
+        return writer.rows
+
+    def export(self, dataset, since=None):
+        t0 = time.perf_counter()
+        total = 0
+        for symbol in self._symbols(dataset):
+            rows = self.export_one(dataset, symbol, since)
+            total += rows
+            if rows:
+                label = f"{dataset}/{symbol}" if symbol else dataset
+                print(f"[EXPORT] {label}: {rows} rows")
+        print(f"[EXPORT] {dataset}: {total} new rows written before {self.until:%Y-%m-%d %H:%M} "
+              f"({time.perf_counter() - t0:.1f}s)")
+        return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Incremental Parquet export for offline analytics")
+    parser.add_argument('--dataset', action='append', choices=list(DATASETS), help="default: all")
+    parser.add_argument('--out', default=config.EXPORT_DIR)
+    parser.add_argument('--since', help="start of a first/full export (ISO date, UTC); default: everything")
+    parser.add_argument('--full', action='store_true', help="drop the dataset's files and watermarks, re-export")
+    args = parser.parse_args()
+
+    since = datetime.fromisoformat(args.since) if args.since else None
+    if since is not None and since.tzinfo is not None:
+        since = since.astimezone(timezone.utc).replace(tzinfo=None)
+
+    from mongo_client import MongoDB
+    exporter = Exporter(MongoDB(), out_dir=args.out)
+
+    for dataset in args.dataset or list(DATASETS):
+        if args.full:
+            exporter.reset(dataset)
+        try:
+            exporter.export(dataset, since)
+        except Exception as e:
+            print(f"[EXPORT] ❌ {dataset}: {e}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,350 @@
+"""
+shared/indicators.py
+====================
+Streaming technical indicators, updated once per closed candle.
+
+Every indicator keeps just enough state to fold in the next candle in
+O(1) (EMA, ATR, RSI) or O(1) amortised over a fixed window (Bollinger,
+doji stats), and can be dumped to / restored from a plain dict so the
+state survives restarts in MongoDB.
+
+    ind = IndicatorSet.default()
+    values = ind.update(candle)      # {'ema_20': ..., 'rsi_14': ..., ...}
+    state = ind.state()              # store it
+    ind = IndicatorSet.restore(state)
+
+Values are None until an indicator has seen enough candles. Services use
+IndicatorFeed, which keeps one symbol/timeframe set in step with the
+stored candles: the ingestor for 1m, the aggregator for 30m.
+"""
+import math
+import sys
+import os
+from collections import deque
+from datetime import timedelta
+
+sys.path.insert(0, os.path.dirname(__file__))
+from calculator import is_doji
+import config
+
+INDICATORS = {}
+
+def register(cls):
+    INDICATORS[cls.kind] = cls
+    return cls
+
+
+class Indicator:
+    kind = None
+
+    def __init__(self, period):
+        self.period = period
+
+    @property
+    def name(self):
+        return f"{self.kind}_{self.period}"
+
+    def update(self, candle):
+        """Fold in one closed candle; returns {value name: value or None}"""
+        raise NotImplementedError
+
+    def state(self):
+        return {'kind': self.kind, **self.__dict__}
+
+
+@register
+class EMA(Indicator):
+    """Exponential moving average of close, seeded with the SMA of the first `period` closes"""
+    kind = 'ema'
+
+    def __init__(self, period):
+        super().__init__(period)
+        self.alpha = 2 / (period + 1)
+        self.count = 0
+        self.seed_sum = 0.0
+        self.value = None
+
+    def update(self, candle):
+        close = candle['close']
+        if self.count < self.period:
+            self.count += 1
+            self.seed_sum += close
+            if self.count == self.period:
+                self.value = self.seed_sum / self.period
+        else:
+            self.value += self.alpha * (close - self.value)
+        return {self.name: self.value}
+
+
+@register
+class ATR(Indicator):
+    """Wilder's average true range"""
+    kind = 'atr'
+
+    def __init__(self, period):
+        super().__init__(period)
+        self.prev_close = None
+        self.count = 0
+        self.seed_sum = 0.0
+        self.value = None
+
+    def update(self, candle):
+        high, low = candle['high'], candle['low']
+        if self.prev_close is None:
+            tr = high - low
+        else:
+            tr = max(high - low, abs(high - self.prev_close), abs(low - self.prev_close))
+        self.prev_close = candle['close']
+
+        if self.count < self.period:
+            self.count += 1
+            self.seed_sum += tr
+            if self.count == self.period:
+                self.value = self.seed_sum / self.period
+        else:
+            self.value = (self.value * (self.period - 1) + tr) / self.period
+        return {self.name: self.value}
+
+
+@register
+class RSI(Indicator):
+    """Wilder's relative strength index of close"""
+    kind = 'rsi'
+
+    def __init__(self, period):
+        super().__init__(period)
+        self.prev_close = None
+        self.count = 0
+        self.avg_gain = 0.0
+        self.avg_loss = 0.0
+        self.value = None
+
+    def update(self, candle):
+        close = candle['close']
+        if self.prev_close is None:
+            self.prev_close = close
+            return {self.name: None}
+
+        change = close - self.prev_close
+        self.prev_close = close
+        gain, loss = max(change, 0.0), max(-change, 0.0)
+
+        if self.count < self.period:
+            self.count += 1
+            self.avg_gain += gain / self.period
+            self.avg_loss += loss / self.period
+            if self.count < self.period:
+                return {self.name: None}
+        else:
+            self.avg_gain = (self.avg_gain * (self.period - 1) + gain) / self.period
+            self.avg_loss = (self.avg_loss * (self.period - 1) + loss) / self.period
+
+        if self.avg_loss == 0:
+            self.value = 100.0 if self.avg_gain > 0 else 50.0
+        else:
+            self.value = 100 - 100 / (1 + self.avg_gain / self.avg_loss)
+        return {self.name: self.value}
+
+
+@register
+class Bollinger(Indicator):
+    """Bollinger bands: rolling mean of close +/- k population standard deviations"""
+    kind = 'bb'
+
+    def __init__(self, period, k=2.0):
+        super().__init__(period)
+        self.k = k
+        self.window = deque(maxlen=period)
+        self.total = 0.0
+        self.total_sq = 0.0
+
+    def update(self, candle):
+        close = candle['close']
+        if len(self.window) == self.period:
+            old = self.window[0]
+            self.total -= old
+            self.total_sq -= old * old
+        self.window.append(close)
+        self.total += close
+        self.total_sq += close * close
+
+        if len(self.window) < self.period:
+            return {f"{self.name}_mid": None, f"{self.name}_upper": None, f"{self.name}_lower": None}
+
+        mean = self.total / self.period
+        std = math.sqrt(max(self.total_sq / self.period - mean * mean, 0.0))
+        return {
+            f"{self.name}_mid": mean,
+            f"{self.name}_upper": mean + self.k * std,
+            f"{self.name}_lower": mean - self.k * std,
+        }
+
+    def state(self):
+        state = super().state()
+        state['window'] = list(self.window)
+        return state
+
+
+@register
+class DojiStats(Indicator):
+    """Share of doji candles and mean body/range ratio over the last `period` candles"""
+    kind = 'doji'
+
+    def __init__(self, period):
+        super().__init__(period)
+        self.flags = deque(maxlen=period)
+        self.bodies = deque(maxlen=period)
+        self.doji_count = 0
+        self.body_total = 0.0
+
+    def update(self, candle):
+        rng = candle['high'] - candle['low']
+        flag = 1 if is_doji(candle) else 0
+        body = abs(candle['close'] - candle['open']) / rng if rng else 0.0
+
+        if len(self.flags) == self.period:
+            self.doji_count -= self.flags[0]
+            self.body_total -= self.bodies[0]
+        self.flags.append(flag)
+        self.bodies.append(body)
+        self.doji_count += flag
+        self.body_total += body
+
+        ready = len(self.flags) == self.period
+        return {
+            f"doji_rate_{self.period}": self.doji_count / self.period if ready else None,
+            f"body_pct_{self.period}": self.body_total / self.period if ready else None,
+        }
+
+    def state(self):
+        state = super().state()
+        state['flags'] = list(self.flags)
+        state['bodies'] = list(self.bodies)
+        return state
+
+
+def restore_indicator(state):
+    """Rebuild an indicator from Indicator.state()"""
+    state = dict(state)
+    cls = INDICATORS[state.pop('kind')]
+    ind = cls.__new__(cls)
+    ind.__dict__.update(state)
+    for key in ('window', 'flags', 'bodies'):
+        if key in state:
+            setattr(ind, key, deque(state[key], maxlen=state['period']))
+    return ind
+
+
+class IndicatorSet:
+    """A group of indicators fed the same candle stream"""
+
+    # (kind, period[, extra args]) built by default()
+    DEFAULT = (
+        ('ema', 20),
+        ('ema', 50),
+        ('atr', 14),
+        ('rsi', 14),
+        ('bb', 20),
+        ('doji', 20),
+    )
+
+    def __init__(self, indicators, last=None):
+        self.indicators = indicators
+        self.last = last  # time key of the newest candle folded in
+        self.values = {}
+
+    @classmethod
+    def default(cls):
+        return cls([INDICATORS[kind](*args) for kind, *args in cls.DEFAULT])
+
+    def update(self, candle, key=None):
+        """Fold in one closed candle and return all current values"""
+        values = {}
+        for ind in self.indicators:
+            values.update(ind.update(candle))
+        self.values = values
+        if key is not None:
+            self.last = key
+        return values
+
+    def state(self):
+        return {
+            'indicators': [ind.state() for ind in self.indicators],
+            'last': self.last,
+            'values': self.values,
+        }
+
+    @classmethod
+    def restore(cls, state):
+        ind_set = cls([restore_indicator(s) for s in state['indicators']], state.get('last'))
+        ind_set.values = state.get('values', {})
+        return ind_set
+
+
+class IndicatorFeed:
+    """
+    One symbol/timeframe IndicatorSet kept in step with the stored candles.
+    On first use the set is restored from indicator_state, then fed any
+    stored candles it missed (at most INDICATOR_WARMUP; an older state
+    starts over), so each closed candle is folded in exactly once.
+
+        feed = IndicatorFeed(adb, 'R_50', '1m')
+        candle['indicators'] = await feed.close(candle)
+        ... save the candle ...
+        await feed.save()
+    """
+
+    # timeframe -> (candle period, time field)
+    TIMEFRAMES = {
+        '1m': (timedelta(minutes=1), 'minute_start'),
+        '30m': (timedelta(minutes=30), 'window_start'),
+    }
+
+    # Candle fields the indicators read, for replaying stored candles
+    FIELDS = ('open', 'high', 'low', 'close')
+
+    def __init__(self, adb, symbol, timeframe):
+        self.adb = adb
+        self.symbol = symbol
+        self.timeframe = timeframe
+        self.period, self.time_field = self.TIMEFRAMES[timeframe]
+        self.ind = None
+
+    async def _stored(self, start, end):
+        if self.timeframe == '1m':
+            return await self.adb.get_1m_candles(self.symbol, start, end, fields=self.FIELDS)
+        return (await self.adb.get_30m_candles_multi([self.symbol], start, end, fields=self.FIELDS))[self.symbol]
+
+    async def catch_up(self, until):
+        """Fold in the stored candles before `until` that the set has not seen"""
+        until = until.replace(tzinfo=None)
+        horizon = until - self.period * config.INDICATOR_WARMUP
+
+        if self.ind is None:
+            state = await self.adb.get_indicator_state(self.symbol, self.timeframe)
+            self.ind = IndicatorSet.restore(state) if state else IndicatorSet.default()
+        if self.ind.last is None or self.ind.last < horizon:
+            self.ind = IndicatorSet.default()
+
+        since = horizon if self.ind.last is None else self.ind.last + self.period
+        if since < until:
+            missed = await self._stored(since, until)
+            self.fold(missed)
+            if missed:
+                print(f"[INDICATORS] {self.symbol} {self.timeframe}: replayed {len(missed)} candles")
+
+    def fold(self, candles):
+        """Feed closed candles newer than the set's last one; returns the latest values"""
+        for c in candles:
+            key = c[self.time_field].replace(tzinfo=None)
+            if self.ind.last is None or key > self.ind.last:
+                self.ind.update(c, key)
+        return self.ind.values
+
+    async def close(self, candle):
+        """Values after the candle that just closed (catching up first if needed)"""
+        await self.catch_up(candle[self.time_field])
+        return dict(self.fold([candle]))
+
+    async def save(self):
+        await self.adb.save_indicator_state(self.symbol, self.timeframe, self.ind.state())
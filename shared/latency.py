@@ -0,0 +1,136 @@
+"""
+shared/latency.py
+=================
+End-to-end latency tracing from tick to order fill.
+
+Every stage stamps a UTC time into a `timing` dict on the document it
+writes and copies the upstream `timing` it read, so a trade ends up
+carrying the whole chain:
+
+    1m candle   last_tick, candle_closed, candle_saved   (ingestor)
+    30m candle  + window_end, aggregated                  (aggregator)
+    signal      + signal_inserted                         (detector)
+    trade       + queued, claimed, order_sent, buy_ack    (executor)
+
+Report per-stage percentiles with:
+
+    python latency.py --hours 24
+    python latency.py --since 2026-01-01 --until 2026-01-08 --collection trade_signals
+"""
+import argparse
+import math
+import sys
+import os
+from datetime import datetime, timedelta, timezone
+
+sys.path.insert(0, os.path.dirname(__file__))
+import config
+
+STAGES = [
+    'last_tick',
+    'window_end',
+    'candle_closed',
+    'candle_saved',
+    'aggregated',
+    'signal_inserted',
+    'queued',
+    'claimed',
+    'order_sent',
+    'buy_ack',
+]
+
+def stamp(timing, stage, when=None):
+    """Set `stage` on a timing dict (created if None) and return it"""
+    timing = dict(timing or {})
+    timing[stage] = when or datetime.now(timezone.utc)
+    return timing
+
+def _naive_utc(dt):
+    """Mongo returns naive UTC; normalise aware values the same way"""
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+def stage_deltas(timing):
+    """Milliseconds between consecutive stages present in `timing`"""
+    present = [(s, _naive_utc(timing[s])) for s in STAGES if timing.get(s)]
+    deltas = {}
+    for (a, ta), (b, tb) in zip(present, present[1:]):
+        deltas[f"{a}->{b}"] = (tb - ta).total_seconds() * 1000
+    if len(present) >= 2:
+        deltas[f"{present[0][0]}->{present[-1][0]} (total)"] = (
+            (present[-1][1] - present[0][1]).total_seconds() * 1000
+        )
+    return deltas
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    k = max(0, math.ceil(pct / 100 * len(sorted_values)) - 1)
+    return sorted_values[k]
+
+def report(db, start, end, collection=config.COLL_TRADES, group_by=None):
+    """
+    Per-stage latency percentiles for documents created in [start, end).
+    Returns {group: {stage_pair: {n, p50, p90, p99, max}}}.
+    """
+    time_field = 'entry_time' if collection == config.COLL_TRADES else 'created_at'
+    cursor = db[collection].find(
+        {time_field: {'$gte': start, '$lt': end}, 'timing': {'$exists': True}},
+        {'timing': 1, group_by or '_id': 1}
+    )
+
+    samples = {}
+    for doc in cursor:
+        group = doc.get(group_by, 'all') if group_by else 'all'
+        for pair, ms in stage_deltas(doc['timing']).items():
+            samples.setdefault(group, {}).setdefault(pair, []).append(ms)
+
+    result = {}
+    for group, pairs in samples.items():
+        result[group] = {}
+        for pair, values in pairs.items():
+            values.sort()
+            result[group][pair] = {
+                'n': len(values),
+                'p50': percentile(values, 50),
+                'p90': percentile(values, 90),
+                'p99': percentile(values, 99),
+                'max': values[-1],
+            }
+    return result
+
+def print_report(result):
+    for group, pairs in result.items():
+        print(f"\n[LATENCY] {group}")
+        print(f"  {'stage':<42} {'n':>5} {'p50':>10} {'p90':>10} {'p99':>10} {'max':>10}")
+        for pair, s in pairs.items():
+            print(
+                f"  {pair:<42} {s['n']:>5} {s['p50']:>8.0f}ms {s['p90']:>8.0f}ms "
+                f"{s['p99']:>8.0f}ms {s['max']:>8.0f}ms"
+            )
+
+def main():
+    parser = argparse.ArgumentParser(description="Per-stage tick→fill latency report")
+    parser.add_argument('--hours', type=float, default=24, help="look back this many hours")
+    parser.add_argument('--since', help="start (ISO date/time, UTC)")
+    parser.add_argument('--until', help="end (ISO date/time, UTC)")
+    parser.add_argument('--collection', default=config.COLL_TRADES)
+    parser.add_argument('--group-by', help="document field to group by (e.g. symbol)")
+    args = parser.parse_args()
+
+    end = datetime.fromisoformat(args.until) if args.until else datetime.utcnow()
+    start = datetime.fromisoformat(args.since) if args.since else end - timedelta(hours=args.hours)
+
+    from mongo_client import MongoDB
+    db = MongoDB().db
+
+    result = report(db, start, end, args.collection, args.group_by)
+    if not result:
+        print(f"[LATENCY] No timed documents in {args.collection} between {start} and {end}")
+        return
+    print_report(result)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+shared/migrate_buckets.py
+=========================
+Copy per-minute candles from candles_1m into hour buckets (candles_1m_hourly).
+
+Safe to re-run: each candle is written to its slot with a positional $set,
+so existing buckets are simply overwritten. The source collection is left
+untouched. Afterwards restart services with CANDLE_1M_LAYOUT=bucket.
+
+    python migrate_buckets.py
+    python migrate_buckets.py --symbols R_50 R_75 --batch 5000
+"""
+import argparse
+import itertools
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+import config
+from pymongo import ASCENDING
+
+def main():
+    parser = argparse.ArgumentParser(description="Copy 1m candles into hour buckets")
+    parser.add_argument('--symbols', nargs='+', help="only these symbols (default: all)")
+    parser.add_argument('--batch', type=int, default=config.BULK_CHUNK_SIZE * 5)
+    args = parser.parse_args()
+
+    config.CANDLE_1M_LAYOUT = 'bucket'
+    from mongo_client import MongoDB
+    # No schema run: this process's bucket profile is not what the services use
+    mongo = MongoDB(ensure_schema=False)
+    mongo.db[config.COLL_1M_BUCKETS].create_index([('symbol', ASCENDING), ('hour', ASCENDING)], unique=True)
+
+    query = {'symbol': {'$in': args.symbols}} if args.symbols else {}
+    source = mongo.db[config.COLL_1M]
+    total = source.count_documents(query)
+    cursor = source.find(query, {'_id': 0, 'created_at': 0}).sort([('symbol', ASCENDING), ('minute_start', ASCENDING)])
+
+    t0 = time.perf_counter()
+    copied = buckets = 0
+    # One bulk call per batch: the bulk save only returns once its input is
+    # exhausted, so handing it the whole cursor would report nothing until the end
+    while True:
+        chunk = list(itertools.islice(cursor, args.batch))
+        if not chunk:
+            break
+        for s in mongo.save_1m_candles_bulk(chunk, chunk_size=args.batch):
+            copied += s['size']
+            buckets += s['upserted']
+            print(f"[MIGRATE] {copied}/{total} candles | {buckets} new buckets | {s['ms']:.0f}ms")
+
+    hourly = mongo.db[config.COLL_1M_BUCKETS].count_documents({'symbol': {'$in': args.symbols}} if args.symbols else {})
+    print(
+        f"[MIGRATE] ✅ {copied} candles -> {hourly} hour buckets in {time.perf_counter() - t0:.1f}s. "
+        f"Restart services with CANDLE_1M_LAYOUT=bucket"
+    )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""
+shared/migrate_timeseries.py
+============================
+One-off migration of candle collections to native time-series storage.
+
+For each collection:
+  1. rename  candles_1m -> candles_1m_legacy
+  2. create  candles_1m as a time-series collection (metaField: symbol)
+  3. copy    legacy documents across in insert_many batches
+  4. verify  document counts, then drop the legacy copy if --drop-legacy
+
+Stop ingestor/aggregator/backfill while it runs, then restart them with
+CANDLE_STORAGE=timeseries. Time-series collections cannot be renamed, so
+a failed run is resumed by re-running: an existing legacy collection is
+reused and the time-series target is rebuilt from it.
+
+    python migrate_timeseries.py
+    python migrate_timeseries.py --collections candles_1m --batch 20000 --drop-legacy
+"""
+import argparse
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+import config
+from pymongo import MongoClient, ASCENDING
+from mongo_client import CANDLE_COLLECTIONS, timeseries_options
+
+def collection_stats(db, name):
+    stats = db.command('collStats', name)
+    return stats.get('storageSize', 0), stats.get('totalIndexSize', 0)
+
+def migrate(db, name, batch_size, drop_legacy):
+    legacy = f"{name}_legacy"
+    time_field, _ = CANDLE_COLLECTIONS[name]
+    existing = {c['name']: c for c in db.list_collections()}
+
+    if existing.get(name, {}).get('type') == 'timeseries' and legacy not in existing:
+        print(f"[MIGRATE] {name} is already time-series, skipping")
+        return
+
+    if legacy not in existing:
+        if name not in existing:
+            print(f"[MIGRATE] {name} does not exist, creating empty time-series collection")
+            db.create_collection(name, timeseries=timeseries_options(name))
+            return
+        db[name].rename(legacy)
+        print(f"[MIGRATE] Renamed {name} -> {legacy}")
+    elif name in existing:
+        # Resume: rebuild the target from the legacy copy
+        db[name].drop()
+
+    db.create_collection(name, timeseries=timeseries_options(name))
+
+    total = db[legacy].estimated_document_count()
+    copied = 0
+    t0 = time.perf_counter()
+    batch = []
+
+    cursor = db[legacy].find({}, {'_id': 0}, batch_size=batch_size).sort(time_field, ASCENDING)
+    for doc in cursor:
+        batch.append(doc)
+        if len(batch) >= batch_size:
+            db[name].insert_many(batch, ordered=False)
+            copied += len(batch)
+            batch = []
+            print(f"[MIGRATE] {name}: {copied}/{total} ({copied / (time.perf_counter() - t0):.0f} docs/s)")
+    if batch:
+        db[name].insert_many(batch, ordered=False)
+        copied += len(batch)
+
+    db[name].create_index([('symbol', ASCENDING), (time_field, ASCENDING)])
+
+    migrated = db[name].count_documents({})
+    source = db[legacy].count_documents({})
+    if migrated != source:
+        raise RuntimeError(f"{name}: copied {migrated} documents but {legacy} has {source}; legacy kept")
+
+    old_size, old_index = collection_stats(db, legacy)
+    new_size, new_index = collection_stats(db, name)
+    print(
+        f"[MIGRATE] ✅ {name}: {migrated} docs in {time.perf_counter() - t0:.1f}s | "
+        f"storage {old_size / 1e6:.1f}MB -> {new_size / 1e6:.1f}MB | "
+        f"indexes {old_index / 1e6:.1f}MB -> {new_index / 1e6:.1f}MB"
+    )
+
+    if drop_legacy:
+        db[legacy].drop()
+        print(f"[MIGRATE] Dropped {legacy}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Migrate candle collections to time-series storage")
+    parser.add_argument('--collections', nargs='+', default=list(CANDLE_COLLECTIONS))
+    parser.add_argument('--batch', type=int, default=10000)
+    parser.add_argument('--drop-legacy', action='store_true')
+    args = parser.parse_args()
+
+    # Plain client: MongoDB() would try to create the standard indexes
+    db = MongoClient(config.MONGO_URI)[config.DB_NAME]
+
+    for name in args.collections:
+        migrate(db, name, args.batch, args.drop_legacy)
+
+    print("[MIGRATE] Done. Restart services with CANDLE_STORAGE=timeseries")
+
+if __name__ == '__main__':
+    main()
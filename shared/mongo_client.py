@@ -3,108 +3,524 @@ shared/mongo_client.py
 ======================
 MongoDB connection helper
 """
-from pymongo import MongoClient, ASCENDING
-from datetime import datetime
+from pymongo import MongoClient, ASCENDING, UpdateOne, DeleteMany, InsertOne, WriteConcern
+from pymongo.errors import BulkWriteError
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from array import array
+import asyncio
+import functools
+import itertools
+import threading
+import time
 import sys
 import os
 sys.path.insert(0, os.path.dirname(__file__))
 import config
+import schema
+from candle_cache import CandleCache
+
+# Candle collection -> (time field, time-series granularity)
+CANDLE_COLLECTIONS = {
+    config.COLL_1M: ('minute_start', 'minutes'),
+    config.COLL_30M: ('window_start', 'hours'),
+}
+
+# Candle collection -> period in seconds
+CANDLE_PERIODS = {
+    config.COLL_1M: 60,
+    config.COLL_30M: 1800,
+}
+
+def timeseries_options(coll_name):
+    """create_collection() options for a candle collection in time-series mode"""
+    time_field, granularity = CANDLE_COLLECTIONS[coll_name]
+    return {'timeField': time_field, 'metaField': 'symbol', 'granularity': granularity}
+
+# Per-minute fields stored as 60-slot arrays in hour buckets
+BUCKET_FIELDS = ('open', 'high', 'low', 'close', 'range', 'tick_count')
+
+def candle_snapshot(candle):
+    """Slim copy of a candle (time + OHLC/range/ticks) for embedding in signals and trades"""
+    time_field = 'window_start' if 'window_start' in candle else 'minute_start'
+    snap = {time_field: candle[time_field]}
+    snap.update({f: candle[f] for f in BUCKET_FIELDS if f in candle})
+    return snap
+
+def candle_projection(time_field, fields):
+    """find() projection for `fields` plus the time field, without _id"""
+    projection = {'_id': 0, time_field: 1}
+    projection.update({f: 1 for f in fields})
+    return projection
+
+def empty_columns():
+    """Column container for get_1m_columns(): floats as array('d'), tick counts as array('q')"""
+    columns = {'minute_start': []}
+    columns.update({f: array('d') for f in BUCKET_FIELDS if f != 'tick_count'})
+    columns['tick_count'] = array('q')
+    return columns
+
+def hour_start(dt):
+    return dt.replace(minute=0, second=0, microsecond=0)
+
+def bucket_slot_updates(candle):
+    """Positional $set for one candle inside its hour bucket"""
+    m = candle['minute_start'].minute
+    updates = {f"{f}.{m}": candle[f] for f in BUCKET_FIELDS if f in candle}
+    if candle.get('filled'):
+        updates[f"filled.{m}"] = True
+    if candle.get('timing'):
+        updates[f"timing.{m}"] = candle['timing']
+    if candle.get('indicators'):
+        updates[f"indicators.{m}"] = candle['indicators']
+    updates['updated_at'] = datetime.utcnow()
+    return updates
+
+def empty_bucket():
+    """$setOnInsert for a new hour bucket: 60 empty slots per field"""
+    doc = {f: [None] * 60 for f in BUCKET_FIELDS}
+    doc['filled'] = [False] * 60
+    return doc
+
+def unpack_bucket(doc, start=None, end=None):
+    """Expand an hour bucket into per-minute candles within [start, end)"""
+    candles = []
+    for m in range(60):
+        if doc['open'][m] is None:
+            continue
+        minute_start = doc['hour'] + timedelta(minutes=m)
+        if (start is not None and minute_start < start) or (end is not None and minute_start >= end):
+            continue
+        candle = {'symbol': doc['symbol'], 'minute_start': minute_start}
+        for f in BUCKET_FIELDS:
+            candle[f] = doc[f][m]
+        if doc.get('filled', [False] * 60)[m]:
+            candle['filled'] = True
+        timing = doc.get('timing', {}).get(str(m))
+        if timing:
+            candle['timing'] = timing
+        indicators = doc.get('indicators', {}).get(str(m))
+        if indicators:
+            candle['indicators'] = indicators
+        candles.append(candle)
+    return candles
+
+def _naive(dt):
+    """Bucket hours come back naive UTC; compare range bounds the same way"""
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
 
 class MongoDB:
-    def __init__(self):
-        self.client = MongoClient(config.MONGO_URI)
-        self.db = self.client[config.DB_NAME]
-        self._create_indexes()
-    
-    def _create_indexes(self):
-        """Create necessary indexes"""
-        # 1-min candles
-        self.db[config.COLL_1M].create_index(
-            [('symbol', ASCENDING), ('minute_start', ASCENDING)],
-            unique=True
-        )
+    def __init__(self, ensure_schema=True):
+        # connect=False: no server round trip until the first query
+        self.client = MongoClient(config.MONGO_URI, connect=False)
+        self._db = self.client[config.DB_NAME]
+        self._schema_ready = not ensure_schema
+        self._schema_lock = threading.Lock()
+        self.timeseries = config.CANDLE_STORAGE == 'timeseries'
+        self.bucketed = config.CANDLE_1M_LAYOUT == 'bucket'
+        self._collections = {}
+        self.cache = {}
+        if config.CANDLE_CACHE:
+            self.cache = {
+                coll_name: CandleCache(CANDLE_COLLECTIONS[coll_name][0], period, config.CANDLE_CACHE_SIZE)
+                for coll_name, period in CANDLE_PERIODS.items()
+            }
+    
+    @property
+    def db(self):
+        """Database handle; pending schema migrations run on first access"""
+        if not self._schema_ready:
+            with self._schema_lock:
+                if not self._schema_ready:
+                    schema.ensure_schema(self)
+                    self._schema_ready = True
+        return self._db
+    
+    def collection(self, name):
+        """Collection handle with the write concern configured for it"""
+        coll = self._collections.get(name)
+        if coll is None:
+            profile = config.WRITE_CONCERN.get(name, config.WC_DEFAULT)
+            options = config.WRITE_CONCERN_PROFILES[profile]
+            if name == config.COLL_1M_BUCKETS and options.get('w') == 0:
+                # Bucket writes branch on matched_count, which needs an ack
+                options = config.WRITE_CONCERN_PROFILES['fast']
+            coll = self.db.get_collection(name, write_concern=WriteConcern(**options))
+            self._collections[name] = coll
+        return coll
+    
+    def _ensure_timeseries(self, coll_name):
+        """Create a candle collection as time-series if it does not exist yet"""
+        info = next(self._db.list_collections(filter={'name': coll_name}), None)
         
-        # 30-min candles
-        self.db[config.COLL_30M].create_index(
-            [('symbol', ASCENDING), ('window_start', ASCENDING)],
-            unique=True
-        )
+        if info is None:
+            self._db.create_collection(coll_name, timeseries=timeseries_options(coll_name))
+        elif info.get('type') != 'timeseries':
+            raise RuntimeError(
+                f"{coll_name} is a regular collection but CANDLE_STORAGE=timeseries; "
+                f"run migrate_timeseries.py first"
+            )
+    
+    def _save_candle(self, coll_name, candle):
+        time_field, _ = CANDLE_COLLECTIONS[coll_name]
+        key = {'symbol': candle['symbol'], time_field: candle[time_field]}
         
-        # Trades
-        self.db[config.COLL_TRADES].create_index('contract_id', unique=True)
-        self.db[config.COLL_TRADES].create_index('status')
+        if self.timeseries:
+            # Time-series collections do not support upserts: replace instead
+            self.collection(coll_name).delete_many(key)
+            self.collection(coll_name).insert_one(dict(candle))
+        else:
+            self.collection(coll_name).update_one(key, {'$set': candle}, upsert=True)
     
     def save_1m_candle(self, candle):
         """Save 1-min candle"""
-        self.db[config.COLL_1M].update_one(
-            {'symbol': candle['symbol'], 'minute_start': candle['minute_start']},
-            {'$set': candle},
-            upsert=True
-        )
+        if self.bucketed:
+            self._save_1m_bucketed(candle)
+        else:
+            self._save_candle(config.COLL_1M, candle)
+        self._cache_put(config.COLL_1M, candle)
+    
+    def _save_1m_bucketed(self, candle):
+        coll = self.collection(config.COLL_1M_BUCKETS)
+        key = {'symbol': candle['symbol'], 'hour': hour_start(candle['minute_start'])}
+        updates = bucket_slot_updates(candle)
+        
+        # Positional $set cannot create the arrays, so only the first
+        # minute of each hour pays for creating the bucket
+        if coll.update_one(key, {'$set': updates}).matched_count:
+            return
+        coll.update_one(key, {'$setOnInsert': empty_bucket()}, upsert=True)
+        coll.update_one(key, {'$set': updates})
     
     def save_30m_candle(self, candle):
         """Save 30-min candle"""
-        self.db[config.COLL_30M].update_one(
-            {'symbol': candle['symbol'], 'window_start': candle['window_start']},
-            {'$set': candle},
-            upsert=True
-        )
+        self._save_candle(config.COLL_30M, candle)
+        self._cache_put(config.COLL_30M, candle)
+    
+    def _cache_put(self, coll_name, candle):
+        cache = self.cache.get(coll_name)
+        if cache is not None:
+            cache.put(candle)
+    
+    def _invalidating(self, coll_name, candles):
+        """Pass candles through, dropping cached rings of every symbol seen"""
+        cache = self.cache.get(coll_name)
+        for c in candles:
+            if cache is not None:
+                cache.invalidate(c['symbol'])
+            yield c
+    
+    def cache_stats(self):
+        """Hit/miss counters per cached collection"""
+        return {coll_name: cache.stats() for coll_name, cache in self.cache.items()}
+    
+    def _bulk_upsert(self, coll_name, candles, key_field, chunk_size=None):
+        """
+        Upsert candles with unordered bulk_write in chunks of chunk_size
+        (delete + insert per chunk in time-series mode).
+        Accepts any iterable, so generators stay bounded in memory.
+        Returns one stats dict per batch.
+        """
+        chunk_size = chunk_size or config.BULK_CHUNK_SIZE
+        coll = self.collection(coll_name)
+        stats = []
+        it = iter(candles)
+        
+        for batch in itertools.count():
+            chunk = list(itertools.islice(it, chunk_size))
+            if not chunk:
+                break
+            
+            keys = [{'symbol': c['symbol'], key_field: c[key_field]} for c in chunk]
+            
+            if self.timeseries:
+                # Replace: drop existing keys, then insert (ordered so the delete runs first)
+                ops = [DeleteMany({'$or': keys})] + [InsertOne(dict(c)) for c in chunk]
+                ordered = True
+            else:
+                ops = [UpdateOne(k, {'$set': c}, upsert=True) for k, c in zip(keys, chunk)]
+                ordered = False
+            
+            t0 = time.perf_counter()
+            try:
+                result = coll.bulk_write(ops, ordered=ordered)
+                # Unacknowledged writes (w=0) report no counts
+                result = result.bulk_api_result if result.acknowledged else {}
+            except BulkWriteError as e:
+                result = e.details
+            
+            if self.timeseries:
+                replaced = result.get('nRemoved', 0)
+                upserted, matched = result.get('nInserted', 0) - replaced, replaced
+            else:
+                upserted, matched = result.get('nUpserted', 0), result.get('nMatched', 0)
+            
+            stats.append({
+                'batch': batch,
+                'size': len(chunk),
+                'upserted': upserted,
+                'matched': matched,
+                'modified': result.get('nModified', 0),
+                'errors': len(result.get('writeErrors', [])),
+                'ms': (time.perf_counter() - t0) * 1000
+            })
+        
+        return stats
+    
+    def _bulk_upsert_bucketed(self, candles, chunk_size=None):
+        """
+        Bulk save 1-min candles into hour buckets: one upsert per new bucket,
+        then one positional $set per candle. In the stats, `upserted` counts
+        buckets created and `matched` candles written.
+        """
+        chunk_size = chunk_size or config.BULK_CHUNK_SIZE
+        coll = self.collection(config.COLL_1M_BUCKETS)
+        stats = []
+        it = iter(candles)
+        
+        for batch in itertools.count():
+            chunk = list(itertools.islice(it, chunk_size))
+            if not chunk:
+                break
+            
+            keys = [{'symbol': c['symbol'], 'hour': hour_start(c['minute_start'])} for c in chunk]
+            buckets = {(k['symbol'], k['hour']): k for k in keys}
+            
+            t0 = time.perf_counter()
+            errors = 0
+            try:
+                created = coll.bulk_write(
+                    [UpdateOne(k, {'$setOnInsert': empty_bucket()}, upsert=True) for k in buckets.values()],
+                    ordered=False
+                ).bulk_api_result
+            except BulkWriteError as e:
+                created = e.details
+                errors += len(created.get('writeErrors', []))
+            try:
+                result = coll.bulk_write(
+                    [UpdateOne(k, {'$set': bucket_slot_updates(c)}) for k, c in zip(keys, chunk)],
+                    ordered=False
+                ).bulk_api_result
+            except BulkWriteError as e:
+                result = e.details
+                errors += len(result.get('writeErrors', []))
+            
+            stats.append({
+                'batch': batch,
+                'size': len(chunk),
+                'upserted': created.get('nUpserted', 0),
+                'matched': result.get('nMatched', 0),
+                'modified': result.get('nModified', 0),
+                'errors': errors,
+                'ms': (time.perf_counter() - t0) * 1000
+            })
+        
+        return stats
+    
+    def save_1m_candles_bulk(self, candles, chunk_size=None):
+        """Bulk upsert 1-min candles; returns per-batch stats"""
+        candles = self._invalidating(config.COLL_1M, candles)
+        if self.bucketed:
+            return self._bulk_upsert_bucketed(candles, chunk_size)
+        return self._bulk_upsert(config.COLL_1M, candles, 'minute_start', chunk_size)
+    
+    def save_30m_candles_bulk(self, candles, chunk_size=None):
+        """Bulk upsert 30-min candles; returns per-batch stats"""
+        candles = self._invalidating(config.COLL_30M, candles)
+        return self._bulk_upsert(config.COLL_30M, candles, 'window_start', chunk_size)
     
-    def get_1m_candles(self, symbol, start, end):
-        """Get 1-min candles in range"""
-        cursor = self.db[config.COLL_1M].find({
+    def _get_candles_multi(self, coll_name, key_field, symbols, start, end, fields=None):
+        projection = candle_projection(key_field, tuple(fields) + ('symbol',)) if fields else None
+        cursor = self.collection(coll_name).find({
+            'symbol': {'$in': list(symbols)},
+            key_field: {'$gte': start, '$lt': end}
+        }, projection).sort([('symbol', ASCENDING), (key_field, ASCENDING)])
+        
+        result = {s: [] for s in symbols}
+        for c in cursor:
+            result[c['symbol']].append(c)
+        return result
+    
+    def _get_1m_bucketed(self, symbols, start, end):
+        cursor = self.collection(config.COLL_1M_BUCKETS).find({
+            'symbol': {'$in': list(symbols)},
+            'hour': {'$gte': hour_start(start), '$lt': end}
+        }).sort([('symbol', ASCENDING), ('hour', ASCENDING)])
+        
+        result = {s: [] for s in symbols}
+        for doc in cursor:
+            result[doc['symbol']].extend(unpack_bucket(doc, _naive(start), _naive(end)))
+        return result
+    
+    def get_1m_candles_multi(self, symbols, start, end, fields=None):
+        """Get 1-min candles in range for many symbols in one query: {symbol: [candles]}"""
+        if self.bucketed:
+            return self._get_1m_bucketed(symbols, start, end)
+        return self._get_candles_multi(config.COLL_1M, 'minute_start', symbols, start, end, fields)
+    
+    def get_30m_candles_multi(self, symbols, start, end, fields=None):
+        """Get 30-min candles in range for many symbols in one query: {symbol: [candles]}"""
+        return self._get_candles_multi(config.COLL_30M, 'window_start', symbols, start, end, fields)
+    
+    def get_1m_columns(self, symbol, start, end):
+        """
+        Get 1-min candles in range as columns instead of documents:
+        {'minute_start': [datetime], 'open': array('d'), ..., 'tick_count': array('q')}.
+        
+        The server packs each day into one document of parallel arrays
+        (hour buckets already are), so decoding a month costs ~30 documents
+        rather than ~43k dicts.
+        """
+        columns = empty_columns()
+        
+        if self.bucketed:
+            cursor = self.collection(config.COLL_1M_BUCKETS).find({
+                'symbol': symbol,
+                'hour': {'$gte': hour_start(start), '$lt': end}
+            }, {'_id': 0, 'hour': 1, **{f: 1 for f in BUCKET_FIELDS}}).sort('hour', ASCENDING)
+            lo, hi = _naive(start), _naive(end)
+            
+            for doc in cursor:
+                opens = doc['open']
+                for m in range(60):
+                    t = doc['hour'] + timedelta(minutes=m)
+                    if opens[m] is None or t < lo or t >= hi:
+                        continue
+                    columns['minute_start'].append(t)
+                    for f in BUCKET_FIELDS:
+                        columns[f].append(doc[f][m] or 0)
+            return columns
+        
+        pipeline = [
+            {'$match': {'symbol': symbol, 'minute_start': {'$gte': start, '$lt': end}}},
+            {'$sort': {'minute_start': 1}},
+            {'$group': {
+                '_id': {'$dateTrunc': {'date': '$minute_start', 'unit': 'day'}},
+                'minute_start': {'$push': '$minute_start'},
+                **{f: {'$push': {'$ifNull': [f"${f}", 0]}} for f in BUCKET_FIELDS}
+            }},
+            {'$sort': {'_id': 1}},
+        ]
+        for day in self.collection(config.COLL_1M).aggregate(pipeline):
+            columns['minute_start'].extend(day['minute_start'])
+            for f in BUCKET_FIELDS:
+                columns[f].extend(day[f])
+        return columns
+    
+    def _last_candles(self, coll_name, symbol, limit):
+        """Newest `limit` candles, oldest first"""
+        if coll_name == config.COLL_1M and self.bucketed:
+            docs = self.collection(config.COLL_1M_BUCKETS).find({
+                'symbol': symbol
+            }).sort('hour', -1).limit(limit // 60 + 2)
+            candles = [c for doc in reversed(list(docs)) for c in unpack_bucket(doc)]
+            return candles[-limit:]
+        
+        time_field, _ = CANDLE_COLLECTIONS[coll_name]
+        cursor = self.collection(coll_name).find({
+            'symbol': symbol
+        }).sort(time_field, -1).limit(limit)
+        return list(reversed(list(cursor)))
+    
+    def get_1m_candles(self, symbol, start, end, fields=None):
+        """
+        Get 1-min candles in range. With `fields`, only those fields (plus
+        minute_start) are read from MongoDB; cache hits may return more.
+        """
+        cache = self.cache.get(config.COLL_1M)
+        if cache is not None:
+            hit = cache.range(symbol, start, end)
+            if hit is not None:
+                return hit
+            
+            # Recent range: (re)prime the ring with one "last N" read and serve from it
+            horizon = datetime.utcnow() - timedelta(seconds=CANDLE_PERIODS[config.COLL_1M] * cache.size)
+            if _naive(start) >= horizon:
+                candles = self._last_candles(config.COLL_1M, symbol, cache.size)
+                cache.prime(symbol, candles, cache.size)
+                if len(candles) < cache.size or candles[0]['minute_start'] <= _naive(start):
+                    return [dict(c) for c in candles if _naive(start) <= c['minute_start'] < _naive(end)]
+        
+        if self.bucketed:
+            return self._get_1m_bucketed([symbol], start, end)[symbol]
+        projection = candle_projection('minute_start', fields) if fields else None
+        cursor = self.collection(config.COLL_1M).find({
             'symbol': symbol,
             'minute_start': {'$gte': start, '$lt': end}
-        }).sort('minute_start', ASCENDING)
+        }, projection).sort('minute_start', ASCENDING)
         return list(cursor)
     
     def get_30m_candles(self, symbol, limit=3):
         """Get last N 30-min candles"""
-        cursor = self.db[config.COLL_30M].find({
-            'symbol': symbol
-        }).sort('window_start', -1).limit(limit)
-        return list(reversed(list(cursor)))
+        cache = self.cache.get(config.COLL_30M)
+        if cache is None:
+            return self._last_candles(config.COLL_30M, symbol, limit)
+        
+        hit = cache.last(symbol, limit)
+        if hit is not None:
+            return hit
+        candles = self._last_candles(config.COLL_30M, symbol, limit)
+        cache.prime(symbol, candles, limit)
+        return [dict(c) for c in candles]
+    
+    def get_indicator_state(self, symbol, timeframe):
+        """Saved IndicatorSet state for a symbol/timeframe, or None"""
+        return self.collection(config.COLL_INDICATORS).find_one({'_id': f"{symbol}:{timeframe}"})
+    
+    def save_indicator_state(self, symbol, timeframe, state):
+        """Save IndicatorSet.state() for a symbol/timeframe"""
+        self.collection(config.COLL_INDICATORS).replace_one(
+            {'_id': f"{symbol}:{timeframe}"},
+            {'symbol': symbol, 'timeframe': timeframe, **state, 'updated_at': datetime.utcnow()},
+            upsert=True
+        )
     
     def save_signal(self, signal):
         """Save trade signal"""
-        self.db[config.COLL_SIGNALS].insert_one(signal)
+        self.collection(config.COLL_SIGNALS).insert_one(signal)
     
     def get_pending_signals(self):
         """Get unprocessed signals"""
-        cursor = self.db[config.COLL_SIGNALS].find({
+        cursor = self.collection(config.COLL_SIGNALS).find({
             'processed': {'$ne': True}
         })
         return list(cursor)
     
     def mark_signal_processed(self, signal_id):
         """Mark signal as processed"""
-        self.db[config.COLL_SIGNALS].update_one(
+        self.collection(config.COLL_SIGNALS).update_one(
             {'_id': signal_id},
             {'$set': {'processed': True, 'processed_at': datetime.utcnow()}}
         )
     
     def save_trade(self, trade):
         """Save trade record"""
-        self.db[config.COLL_TRADES].insert_one(trade)
+        self.collection(config.COLL_TRADES).insert_one(trade)
     
     def update_trade(self, contract_id, updates):
         """Update trade"""
-        self.db[config.COLL_TRADES].update_one(
+        self.collection(config.COLL_TRADES).update_one(
             {'contract_id': contract_id},
             {'$set': updates}
         )
     
-    def get_open_trades(self, symbol):
-        """Get open trades"""
-        cursor = self.db[config.COLL_TRADES].find({
-            'symbol': symbol,
-            'status': 'OPEN'
-        })
+    def get_trade(self, contract_id):
+        """Get one trade by contract id"""
+        return self.collection(config.COLL_TRADES).find_one({'contract_id': contract_id})
+    
+    def get_open_trades(self, symbol=None):
+        """Get open trades (all symbols if symbol is None)"""
+        query = {'status': 'OPEN'}
+        if symbol is not None:
+            query['symbol'] = symbol
+        cursor = self.collection(config.COLL_TRADES).find(query)
         return list(cursor)
     
     def save_balance(self, balance, contract_id=None, pnl=None):
         """Save balance snapshot"""
-        self.db[config.COLL_BALANCE].insert_one({
+        self.collection(config.COLL_BALANCE).insert_one({
             'time': datetime.utcnow(),
             'balance': balance,
             'contract_id': contract_id,
@@ -113,6 +529,45 @@ class MongoDB:
     
     def get_latest_balance(self):
         """Get most recent balance"""
-        cursor = self.db[config.COLL_BALANCE].find().sort('time', -1).limit(1)
+        cursor = self.collection(config.COLL_BALANCE).find().sort('time', -1).limit(1)
         results = list(cursor)
-        return results[0]['balance'] if results else None
\ No newline at end of file
+        return results[0]['balance'] if results else None
+
+
+class AsyncMongoDB:
+    """
+    Async counterpart of MongoDB for use inside coroutines.
+
+    Exposes the same public methods as MongoDB, but awaitable: each call
+    runs on a dedicated thread pool so database I/O overlaps with network
+    I/O instead of blocking the event loop. Use run() for anything else
+    (e.g. raw collection queries).
+    """
+    def __init__(self, sync_db=None, workers=None):
+        self.sync = sync_db or MongoDB()
+        self.executor = ThreadPoolExecutor(
+            max_workers=workers or config.MONGO_ASYNC_WORKERS,
+            thread_name_prefix='mongo'
+        )
+    
+    @property
+    def db(self):
+        return self.sync.db
+    
+    async def run(self, fn, *args, **kwargs):
+        """Run any blocking callable on the Mongo thread pool"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+    
+    def __getattr__(self, name):
+        attr = getattr(self.sync, name)
+        if name.startswith('_') or not callable(attr):
+            return attr
+        
+        @functools.wraps(attr)
+        async def call(*args, **kwargs):
+            return await self.run(attr, *args, **kwargs)
+        
+        # Cache so later lookups skip __getattr__
+        setattr(self, name, call)
+        return call
@@ -0,0 +1,271 @@
+"""
+shared/rate_limiter.py
+======================
+Token-bucket scheduler for Deriv API calls, shared by every service.
+
+All calls draw from one app-wide bucket plus a bucket for their priority
+class (order > balance > history). Lower classes may only take app-wide
+tokens while a reserve is left for the classes above them, so a large
+backfill cannot starve the executor's orders.
+
+With RATE_LIMIT_STORE=mongo (default) the buckets live in one document in
+the `rate_limits` collection and are refilled and debited in a single
+atomic update, so all processes share the same budget. RATE_LIMIT_STORE=
+local keeps them in-process.
+
+Orders never wait on Mongo: they spend a token from the process's local
+buckets and the shared buckets are debited in the background (only when
+the local order bucket is empty do they go through the store). If the
+store errors, calls fail open to the local buckets, with a log line, and
+the store is retried after RATE_STORE_RETRY seconds.
+
+Show the shared throttle stats with:
+
+    python rate_limiter.py
+"""
+import asyncio
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(__file__))
+import config
+
+CLASSES = ('order', 'balance', 'history')
+
+# msg key -> priority class, for DerivStream.request(). Calls on the
+# order's own path (dropping a used quote, tracking the new contract)
+# are orders too, so they take the local fast path instead of the store
+MSG_CLASSES = {
+    'buy': 'order',
+    'proposal': 'order',
+    'sell': 'order',
+    'forget': 'order',
+    'forget_all': 'order',
+    'proposal_open_contract': 'order',
+    'balance': 'balance',
+    'authorize': 'balance',
+    'ticks_history': 'history',
+}
+
+def classify(msg):
+    """Priority class of a raw Deriv request"""
+    for key, cls in MSG_CLASSES.items():
+        if key in msg:
+            return cls
+    return 'balance'
+
+
+class RateLimiter:
+    def __init__(self, store=None, key=None):
+        self.store = store or config.RATE_LIMIT_STORE
+        self.key = key or f"deriv:{config.DERIV_APP_ID}"
+        self.global_rate, self.global_burst = config.RATE_GLOBAL
+        self.budgets = {
+            'order': config.RATE_ORDER,
+            'balance': config.RATE_BALANCE,
+            'history': config.RATE_HISTORY,
+        }
+        # Global tokens each class must leave for the classes above it
+        self.reserves = {
+            'order': 0.0,
+            'balance': config.RATE_RESERVE_BALANCE * self.global_burst,
+            'history': config.RATE_RESERVE_HISTORY * self.global_burst,
+        }
+
+        self._coll = None
+        self._store_retry_at = 0.0
+        self._settling = set()
+        self._local = {'g': self.global_burst, 't': time.monotonic()}
+        self._local.update({f"c_{k}": burst for k, (_, burst) in self.budgets.items()})
+
+        # Per-process throttle stats
+        self.stats = {k: {'calls': 0, 'throttled': 0, 'wait_ms': 0.0, 'max_wait_ms': 0.0} for k in CLASSES}
+
+    # ------------------------------------------------------------------
+    # Bucket backends: return (granted, seconds_until_next_token)
+    # ------------------------------------------------------------------
+    def _take_local(self, cls):
+        b = self._local
+        now = time.monotonic()
+        elapsed = now - b['t']
+        b['t'] = now
+        b['g'] = min(self.global_burst, b['g'] + elapsed * self.global_rate)
+        for k, (rate, burst) in self.budgets.items():
+            b[f"c_{k}"] = min(burst, b[f"c_{k}"] + elapsed * rate)
+
+        return self._debit(b, cls)
+
+    def _take_mongo(self, cls, force=False):
+        """Shared buckets; force debits even below zero (settling a local grant)"""
+        from pymongo import ReturnDocument
+
+        if self._coll is None:
+            from mongo_client import MongoDB
+            self._coll = MongoDB().collection(config.COLL_RATE_LIMITS)
+
+        elapsed = {'$divide': [{'$subtract': ['$$NOW', {'$ifNull': ['$t', '$$NOW']}]}, 1000]}
+
+        def refill(field, rate, burst):
+            return {'$min': [burst, {'$add': [{'$ifNull': [f"${field}", burst]}, {'$multiply': [elapsed, rate]}]}]}
+
+        refilled = {'g': refill('g', self.global_rate, self.global_burst)}
+        for k, (rate, burst) in self.budgets.items():
+            refilled[f"c_{k}"] = refill(f"c_{k}", rate, burst)
+        refilled['t'] = '$$NOW'
+
+        c = f"c_{cls}"
+        granted = True if force else {'$and': [
+            {'$gte': ['$g', 1 + self.reserves[cls]]},
+            {'$gte': [f"${c}", 1]},
+        ]}
+
+        doc = self._coll.find_one_and_update(
+            {'_id': self.key},
+            [
+                {'$set': refilled},
+                {'$set': {'granted': granted}},
+                {'$set': {
+                    'g': {'$cond': ['$granted', {'$subtract': ['$g', 1]}, '$g']},
+                    c: {'$cond': ['$granted', {'$subtract': [f"${c}", 1]}, f"${c}"]},
+                }},
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        return self._wait_for(doc, cls) if not doc['granted'] else (True, 0.0)
+
+    def _debit(self, b, cls):
+        c = f"c_{cls}"
+        if b['g'] >= 1 + self.reserves[cls] and b[c] >= 1:
+            b['g'] -= 1
+            b[c] -= 1
+            return True, 0.0
+        return self._wait_for(b, cls)
+
+    def _wait_for(self, b, cls):
+        rate, _ = self.budgets[cls]
+        need_global = (1 + self.reserves[cls] - b['g']) / self.global_rate
+        need_class = (1 - b[f"c_{cls}"]) / rate
+        return False, max(need_global, need_class, 0.01)
+
+    def _record_wait(self, cls, wait):
+        if not self._store_up():
+            return
+        try:
+            self._coll.update_one(
+                {'_id': self.key},
+                {'$inc': {f"throttled_{cls}": 1, f"wait_ms_{cls}": wait * 1000},
+                 '$max': {f"max_wait_ms_{cls}": wait * 1000}}
+            )
+        except Exception as e:
+            self._store_failed(e)
+
+    # ------------------------------------------------------------------
+    # Shared store health
+    # ------------------------------------------------------------------
+    def _store_up(self):
+        return self.store == 'mongo' and time.monotonic() >= self._store_retry_at
+
+    def _store_failed(self, e):
+        if self._store_retry_at == 0.0:
+            print(f"[RATE] ⚠️  Shared rate-limit store unavailable ({e}); using local buckets")
+        self._store_retry_at = time.monotonic() + config.RATE_STORE_RETRY
+
+    def _store_ok(self):
+        if self._store_retry_at:
+            print("[RATE] ✅ Shared rate-limit store back")
+            self._store_retry_at = 0.0
+
+    def _settle(self, cls):
+        """Debit the shared buckets for a call already granted locally"""
+        try:
+            self._take_mongo(cls, force=True)
+            self._store_ok()
+        except Exception as e:
+            self._store_failed(e)
+
+    async def _take(self, cls):
+        if self.store != 'mongo':
+            return self._take_local(cls)
+
+        if cls == 'order':
+            granted, retry_in = self._take_local(cls)
+            if granted:
+                # Fast path: the order goes now, the shared store catches up
+                if self._store_up():
+                    task = asyncio.create_task(asyncio.to_thread(self._settle, cls))
+                    self._settling.add(task)
+                    task.add_done_callback(self._settling.discard)
+                return granted, retry_in
+
+        if not self._store_up():
+            return self._take_local(cls)
+        try:
+            result = await asyncio.to_thread(self._take_mongo, cls)
+        except Exception as e:
+            self._store_failed(e)
+            return self._take_local(cls)
+        self._store_ok()
+        return result
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    async def acquire(self, cls):
+        """Wait until a `cls` call is allowed; returns the seconds waited"""
+        start = time.monotonic()
+
+        while True:
+            granted, retry_in = await self._take(cls)
+            if granted:
+                break
+            await asyncio.sleep(retry_in)
+
+        wait = time.monotonic() - start
+        s = self.stats[cls]
+        s['calls'] += 1
+        if wait > 0.001:
+            s['throttled'] += 1
+            s['wait_ms'] += wait * 1000
+            s['max_wait_ms'] = max(s['max_wait_ms'], wait * 1000)
+            await asyncio.to_thread(self._record_wait, cls, wait)
+            if wait > 1:
+                print(f"[RATE] {cls} call throttled for {wait:.2f}s")
+        return wait
+
+
+_limiter = None
+
+def get_limiter():
+    """Process-wide limiter instance"""
+    global _limiter
+    if _limiter is None:
+        _limiter = RateLimiter()
+    return _limiter
+
+async def acquire(cls):
+    """Shortcut for get_limiter().acquire(cls); no-op when disabled"""
+    if not config.RATE_LIMIT_ENABLED:
+        return 0.0
+    return await get_limiter().acquire(cls)
+
+def main():
+    from mongo_client import MongoDB
+    doc = MongoDB().collection(config.COLL_RATE_LIMITS).find_one({'_id': f"deriv:{config.DERIV_APP_ID}"})
+    if not doc:
+        print("[RATE] No shared rate-limit state yet")
+        return
+
+    print(f"[RATE] {doc['_id']} | global tokens: {doc.get('g', 0):.1f}")
+    for cls in CLASSES:
+        throttled = doc.get(f"throttled_{cls}", 0)
+        wait_ms = doc.get(f"wait_ms_{cls}", 0.0)
+        avg = wait_ms / throttled if throttled else 0.0
+        print(
+            f"  {cls:<8} tokens: {doc.get('c_' + cls, 0):5.1f} | throttled: {throttled:>6} | "
+            f"avg wait: {avg:7.0f}ms | max wait: {doc.get('max_wait_ms_' + cls, 0):7.0f}ms"
+        )
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,195 @@
+"""
+shared/retention.py
+===================
+Tiered retention for collections that otherwise grow forever.
+
+Per policy, every whole UTC day older than the cutoff is:
+  1. exported to RETENTION_ARCHIVE_DIR/<collection>/<YYYY-MM-DD>.jsonl.gz
+     (Extended JSON, one document per line; written to a temp file and
+     renamed, so a partial archive never looks complete)
+  2. downsampled where the data has a coarser form worth keeping:
+       1m candles      -> missing 30m candles are rebuilt from them
+       balance_history -> the last snapshot of each day is kept
+  3. deleted in batches of RETENTION_BATCH with RETENTION_PAUSE between
+     batches, so live writes are not starved
+
+Only processed signals are expired. A day is never deleted unless its
+archive holds exactly the documents about to be removed.
+
+    python retention.py --dry-run
+    python retention.py
+    python retention.py --every 6      # keep running, every 6 hours
+"""
+import argparse
+import gzip
+import sys
+import os
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(__file__))
+import config
+from bson import json_util
+from pymongo import ASCENDING
+
+def floor_day(dt):
+    return dt.replace(hour=0, minute=0, second=0, microsecond=0)
+
+def downsample_30m(symbol, window_start, candles):
+    """30m candle from its 1m candles, the same way the aggregator builds it"""
+    prices = [p for c in candles for p in (c['open'], c['high'], c['low'], c['close'])]
+    return {
+        'symbol': symbol,
+        'window_start': window_start,
+        'open': candles[0]['open'],
+        'high': max(prices),
+        'low': min(prices),
+        'close': candles[-1]['close'],
+        'range': sum(c['range'] for c in candles),
+        'tick_count': sum(c['tick_count'] for c in candles),
+        'candle_count': len(candles),
+        'downsampled': True,
+        'created_at': datetime.utcnow()
+    }
+
+
+class Retention:
+    def __init__(self, mongo, archive_dir=None, batch=None, pause=None, dry_run=False):
+        self.mongo = mongo
+        self.archive_dir = archive_dir or config.RETENTION_ARCHIVE_DIR
+        self.batch = batch or config.RETENTION_BATCH
+        self.pause = config.RETENTION_PAUSE if pause is None else pause
+        self.dry_run = dry_run
+
+    def policies(self):
+        """(collection, time field, days to keep, extra filter, downsampler)"""
+        if self.mongo.bucketed:
+            candles = (config.COLL_1M_BUCKETS, 'hour')
+        else:
+            candles = (config.COLL_1M, 'minute_start')
+        return [
+            (*candles, config.RETENTION_DAYS[config.COLL_1M], {}, self._downsample_candles),
+            (config.COLL_SIGNALS, 'created_at', config.RETENTION_DAYS[config.COLL_SIGNALS], {'processed': True}, None),
+            (config.COLL_BALANCE, 'time', config.RETENTION_DAYS[config.COLL_BALANCE], {'downsampled': {'$ne': True}},
+             self._downsample_balance),
+        ]
+
+    # ------------------------------------------------------------------
+    # Steps
+    # ------------------------------------------------------------------
+    def _export(self, coll_name, day, docs):
+        folder = os.path.join(self.archive_dir, coll_name)
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, f"{day:%Y-%m-%d}.jsonl.gz")
+        if os.path.exists(path):
+            # Same day expired in two runs: keep both parts
+            path = path.replace('.jsonl.gz', f".{int(time.time())}.jsonl.gz")
+
+        tmp = path + '.tmp'
+        with gzip.open(tmp, 'wt', encoding='utf-8') as f:
+            for doc in docs:
+                f.write(json_util.dumps(doc))
+                f.write('\n')
+        os.replace(tmp, path)
+        return path
+
+    def _downsample_candles(self, day, docs):
+        """Rebuild any 30m candles that are missing for the day"""
+        symbols = sorted({d['symbol'] for d in docs})
+        candles = self.mongo.get_1m_candles_multi(symbols, day, day + timedelta(days=1))
+        coll_30m = self.mongo.collection(config.COLL_30M)
+        added = 0
+
+        for symbol, rows in candles.items():
+            windows = {}
+            for c in rows:
+                t = c['minute_start']
+                windows.setdefault(t.replace(minute=(t.minute // 30) * 30, second=0, microsecond=0), []).append(c)
+
+            existing = {
+                c['window_start'] for c in coll_30m.find(
+                    {'symbol': symbol, 'window_start': {'$gte': day, '$lt': day + timedelta(days=1)}},
+                    {'window_start': 1}
+                )
+            }
+            missing = [downsample_30m(symbol, ws, cs) for ws, cs in sorted(windows.items()) if ws not in existing]
+            if missing and not self.dry_run:
+                self.mongo.save_30m_candles_bulk(missing)
+            added += len(missing)
+        return added
+
+    def _downsample_balance(self, day, docs):
+        """Keep the day's last balance snapshot"""
+        last = max(docs, key=lambda d: d['time'])
+        if not self.dry_run:
+            snapshot = {k: v for k, v in last.items() if k != '_id'}
+            snapshot['downsampled'] = True
+            self.mongo.collection(config.COLL_BALANCE).insert_one(snapshot)
+        return 1
+
+    def _delete(self, coll, ids):
+        deleted = 0
+        for i in range(0, len(ids), self.batch):
+            deleted += coll.delete_many({'_id': {'$in': ids[i:i + self.batch]}}).deleted_count
+            if self.pause:
+                time.sleep(self.pause)
+        return deleted
+
+    # ------------------------------------------------------------------
+    # Run
+    # ------------------------------------------------------------------
+    def expire(self, coll_name, time_field, days, extra, downsample):
+        if not days:
+            return
+        coll = self.mongo.collection(coll_name)
+        cutoff = floor_day(datetime.utcnow() - timedelta(days=days))
+
+        oldest = coll.find_one({time_field: {'$lt': cutoff}, **extra}, sort=[(time_field, ASCENDING)])
+        if oldest is None:
+            print(f"[RETENTION] {coll_name}: nothing older than {cutoff:%Y-%m-%d}")
+            return
+
+        day = floor_day(oldest[time_field])
+        while day < cutoff:
+            query = {time_field: {'$gte': day, '$lt': day + timedelta(days=1)}, **extra}
+            docs = list(coll.find(query).sort(time_field, ASCENDING))
+
+            if docs:
+                t0 = time.perf_counter()
+                kept = downsample(day, docs) if downsample else 0
+                if self.dry_run:
+                    print(f"[RETENTION] {coll_name} {day:%Y-%m-%d}: would archive and delete {len(docs)} docs, "
+                          f"keep {kept} downsampled")
+                else:
+                    path = self._export(coll_name, day, docs)
+                    deleted = self._delete(coll, [d['_id'] for d in docs])
+                    print(f"[RETENTION] {coll_name} {day:%Y-%m-%d}: archived {len(docs)} -> {path}, "
+                          f"deleted {deleted}, kept {kept} downsampled ({time.perf_counter() - t0:.1f}s)")
+            day += timedelta(days=1)
+
+    def run(self):
+        for policy in self.policies():
+            try:
+                self.expire(*policy)
+            except Exception as e:
+                print(f"[RETENTION] ❌ {policy[0]}: {e}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Archive, downsample and expire old data")
+    parser.add_argument('--dry-run', action='store_true')
+    parser.add_argument('--archive-dir', default=config.RETENTION_ARCHIVE_DIR)
+    parser.add_argument('--every', type=float, help="repeat every N hours")
+    args = parser.parse_args()
+
+    from mongo_client import MongoDB
+    retention = Retention(MongoDB(), archive_dir=args.archive_dir, dry_run=args.dry_run)
+
+    while True:
+        retention.run()
+        if not args.every:
+            break
+        time.sleep(args.every * 3600)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""
+shared/schema.py
+================
+Versioned index/schema migrations.
+
+MongoDB() no longer creates indexes on construction. The first time a
+process touches the database, ensure_schema() reads one document from
+`schema_migrations` and only runs the migrations newer than the recorded
+version. The version is recorded per storage profile (CANDLE_STORAGE /
+CANDLE_1M_LAYOUT): a process with another profile runs the migrations
+that profile has not seen without resetting anyone else's, and every
+step is idempotent.
+
+Add a migration by appending (version, description, fn(mongo)) to
+MIGRATIONS. Show or apply the schema state with:
+
+    python schema.py
+"""
+import sys
+import os
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(__file__))
+import config
+from pymongo import ASCENDING, DESCENDING
+
+SCHEMA_ID = 'schema'
+
+def _candle_indexes(mongo):
+    from mongo_client import CANDLE_COLLECTIONS
+
+    for coll_name, (time_field, _) in CANDLE_COLLECTIONS.items():
+        if mongo.timeseries:
+            mongo._ensure_timeseries(coll_name)
+            # Time-series collections cannot have unique indexes
+            mongo._db[coll_name].create_index([('symbol', ASCENDING), (time_field, ASCENDING)])
+        else:
+            mongo._db[coll_name].create_index(
+                [('symbol', ASCENDING), (time_field, ASCENDING)],
+                unique=True
+            )
+
+def _trade_indexes(mongo):
+    trades = mongo._db[config.COLL_TRADES]
+    trades.create_index('contract_id', unique=True)
+    trades.create_index('status')
+    trades.create_index([('symbol', ASCENDING), ('status', ASCENDING)])
+
+def _bucket_indexes(mongo):
+    if mongo.bucketed:
+        mongo._db[config.COLL_1M_BUCKETS].create_index(
+            [('symbol', ASCENDING), ('hour', ASCENDING)],
+            unique=True
+        )
+
+def _signal_and_history_indexes(mongo):
+    signals = mongo._db[config.COLL_SIGNALS]
+    # Executor poll: get_pending_signals()
+    signals.create_index('processed')
+    # Detector duplicate check
+    signals.create_index([('symbol', ASCENDING), ('window_start', ASCENDING)])
+    # Latency reports
+    signals.create_index('created_at')
+    mongo._db[config.COLL_TRADES].create_index('entry_time')
+    # get_latest_balance()
+    mongo._db[config.COLL_BALANCE].create_index([('time', DESCENDING)])
+
+def _export_indexes(mongo):
+    from mongo_client import CANDLE_COLLECTIONS
+
+    # export_parquet.py selects rows by when they were written
+    for coll_name in CANDLE_COLLECTIONS:
+        mongo._db[coll_name].create_index([('symbol', ASCENDING), ('created_at', ASCENDING)])
+    trades = mongo._db[config.COLL_TRADES]
+    trades.update_many(
+        {'status': 'CLOSED', 'closed_at': {'$exists': False}},
+        [{'$set': {'closed_at': '$exit_time'}}]
+    )
+    trades.create_index([('symbol', ASCENDING), ('closed_at', ASCENDING)])
+
+MIGRATIONS = [
+    (1, 'candle indexes', _candle_indexes),
+    (2, 'trade indexes', _trade_indexes),
+    (3, 'hour-bucket 1m candle index', _bucket_indexes),
+    (4, 'trade_signals, entry_time and balance_history indexes', _signal_and_history_indexes),
+    (5, 'created_at and closed_at indexes for the Parquet export', _export_indexes),
+]
+
+LATEST = MIGRATIONS[-1][0]
+
+def profile(mongo):
+    """Storage settings the index set depends on"""
+    return f"{'timeseries' if mongo.timeseries else 'standard'}/{'bucket' if mongo.bucketed else 'document'}"
+
+def ensure_schema(mongo, verbose=False):
+    """Apply pending migrations; returns the versions that ran"""
+    coll = mongo._db[config.COLL_SCHEMA]
+    current = profile(mongo)
+    state_id = f"{SCHEMA_ID}:{current}"
+    state = coll.find_one({'_id': state_id})
+    if state is None:
+        # Older deployments kept one document for whichever profile ran last
+        legacy = coll.find_one({'_id': SCHEMA_ID}) or {}
+        state = legacy if legacy.get('profile') == current else {}
+
+    applied = state.get('version', 0)
+    pending = [m for m in MIGRATIONS if m[0] > applied]
+    if not pending:
+        if verbose:
+            print(f"[SCHEMA] Up to date (v{applied}, {current})")
+        return []
+
+    for version, description, fn in pending:
+        t0 = time.perf_counter()
+        fn(mongo)
+        ms = (time.perf_counter() - t0) * 1000
+        coll.update_one(
+            {'_id': state_id},
+            {'$set': {'version': version, 'profile': current, 'updated_at': datetime.utcnow()},
+             '$push': {'history': {'version': version, 'description': description,
+                                   'profile': current, 'ms': ms, 'at': datetime.utcnow()}}},
+            upsert=True
+        )
+        print(f"[SCHEMA] Applied v{version} ({description}) in {ms:.0f}ms")
+
+    return [m[0] for m in pending]
+
+def main():
+    from mongo_client import MongoDB
+    mongo = MongoDB(ensure_schema=False)
+    ensure_schema(mongo, verbose=True)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,14 @@
+"""
+Shared test setup: services import shared modules from /app/shared in
+their containers; here they come from the checkout.
+"""
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+os.environ.setdefault('RATE_LIMIT_STORE', 'local')
+os.environ.setdefault('DERIV_API_TOKEN', 'test-token')
+
+sys.path.insert(0, os.path.join(ROOT, 'shared'))
+sys.path.insert(0, os.path.join(ROOT, 'services', 'deriv_stub'))
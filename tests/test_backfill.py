@@ -0,0 +1,47 @@
+"""Backfill pages long gaps through ticks_history (local Deriv stub)"""
+import asyncio
+import os
+import sys
+
+import websockets
+
+from conftest import ROOT
+sys.path.insert(0, os.path.join(ROOT, 'services', 'backfill'))
+
+import backfill
+import deriv_api
+import deriv_stub
+
+
+class FakeAsyncDB:
+    """No stored candles; records what backfill saves"""
+
+    def __init__(self):
+        self.saved = []
+
+    async def get_1m_candles(self, symbol, start, end, fields=None):
+        return []
+
+    async def save_1m_candles_bulk(self, candles):
+        self.saved.extend(candles)
+        return [{'upserted': len(candles)}]
+
+
+def test_gap_longer_than_one_history_page(monkeypatch):
+    minutes = deriv_api.CANDLES_PER_REQUEST * 2 + 500
+    monkeypatch.setenv('LOOKBACK_MINUTES', str(minutes))
+    fake = FakeAsyncDB()
+    monkeypatch.setattr(backfill, 'adb', fake)
+
+    async def run():
+        server = await websockets.serve(deriv_stub.handler, '127.0.0.1', 0)
+        monkeypatch.setattr(deriv_api, 'WS_URL', f"ws://127.0.0.1:{server.sockets[0].getsockname()[1]}")
+        try:
+            await backfill.check_gaps()
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    asyncio.run(run())
+    times = {c['minute_start'] for c in fake.saved}
+    assert len(times) == len(fake.saved) == minutes
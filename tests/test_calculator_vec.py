@@ -0,0 +1,72 @@
+"""The NumPy calculator functions agree with the scalar ones in calculator.py"""
+import numpy as np
+import pytest
+
+import calculator
+import calculator_vec
+import config
+
+N = 20000
+
+
+@pytest.fixture
+def rng():
+    return np.random.default_rng(20261019)
+
+
+def candles(rng, n=N):
+    open_ = rng.uniform(50, 200, n)
+    close = open_ + rng.normal(0, 1, n)
+    high = np.maximum(open_, close) + rng.exponential(0.5, n)
+    low = np.minimum(open_, close) - rng.exponential(0.5, n)
+
+    # Edge cases: flat candles, zero and negative ranges, exact dojis
+    high[:50] = low[:50] = open_[:50] = close[:50]
+    high[50:100], low[50:100] = low[50:100], high[50:100]
+    close[100:150] = open_[100:150]
+    return open_, high, low, close
+
+
+def test_calculate_stake(rng):
+    balance = np.concatenate([
+        rng.uniform(0, 50000, N),
+        [0, 999.99, 1000, 1000.01, 1499.99, 1500, 2000, -50],
+    ])
+    expected = [calculator.calculate_stake(b) for b in balance]
+    np.testing.assert_allclose(calculator_vec.calculate_stake(balance), expected, rtol=0, atol=1e-12)
+
+    expected = [calculator.calculate_stake(b, 10, 1, 250) for b in balance]
+    np.testing.assert_allclose(calculator_vec.calculate_stake(balance, 10, 1, 250), expected, rtol=0, atol=1e-12)
+
+
+@pytest.mark.parametrize('k', [None, 1.0, 1.7, 2.5])
+def test_calculate_multiplier(rng, k):
+    entry = rng.uniform(-10, 200, N)
+    sl = entry - rng.uniform(-1, 1, N) * rng.choice([0.01, 0.1, 1.0], N)
+    sl[:20] = entry[:20]  # zero SL distance
+    entry[20:40] = 0
+
+    # Distances right at each multiplier's cap
+    mult = np.array(calculator.MULTIPLIERS, dtype=float)
+    kk = config.BREATHING_MULTIPLE if k is None else k
+    entry[40:40 + len(mult)] = 100.0
+    sl[40:40 + len(mult)] = 100.0 - 100.0 / (kk * mult)
+
+    expected = [calculator.calculate_multiplier(e, s, 15, k) or 0 for e, s in zip(entry, sl)]
+    np.testing.assert_array_equal(calculator_vec.calculate_multiplier(entry, sl, k), expected)
+
+
+@pytest.mark.parametrize('threshold', [None, 0.1, 0.5, 0.85])
+def test_is_doji(rng, threshold):
+    open_, high, low, close = candles(rng)
+    expected = [
+        calculator.is_doji({'open': o, 'high': h, 'low': l, 'close': c}, threshold)
+        for o, h, l, c in zip(open_, high, low, close)
+    ]
+    np.testing.assert_array_equal(calculator_vec.is_doji(open_, high, low, close, threshold), expected)
+
+
+def test_is_bullish(rng):
+    open_, _, _, close = candles(rng)
+    expected = [calculator.is_bullish({'open': o, 'close': c}) for o, c in zip(open_, close)]
+    np.testing.assert_array_equal(calculator_vec.is_bullish(open_, close), expected)
@@ -0,0 +1,60 @@
+"""DerivStream subscription handling against the local Deriv stub"""
+import asyncio
+
+import pytest
+import websockets
+
+import deriv_api
+import deriv_stub
+from deriv_api import DerivStream, SubscribeError
+
+
+async def start_stub(monkeypatch):
+    server = await websockets.serve(deriv_stub.handler, '127.0.0.1', 0)
+    port = server.sockets[0].getsockname()[1]
+    monkeypatch.setattr(deriv_api, 'WS_URL', f"ws://127.0.0.1:{port}")
+    return server
+
+
+def test_rejected_subscribe_is_forgotten(monkeypatch):
+    async def run():
+        server = await start_stub(monkeypatch)
+        stream = DerivStream()
+        try:
+            await stream.connect()
+            with pytest.raises(SubscribeError):
+                await stream.subscribe('ticks:BAD', {'ticks': 'NOT_A_SYMBOL'})
+            assert 'ticks:BAD' not in stream.subscriptions
+            assert 'ticks:BAD' not in stream.subscription_ids
+
+            await stream.subscribe('ticks:R_50', {'ticks': 'R_50'})
+            assert 'ticks:R_50' in stream.subscription_ids
+        finally:
+            await stream.close()
+            server.close()
+            await server.wait_closed()
+
+    asyncio.run(run())
+
+
+def test_replay_drops_rejected_subscription(monkeypatch):
+    async def run():
+        server = await start_stub(monkeypatch)
+        stream = DerivStream()
+        # Recorded while disconnected, so only run_forever() sends them
+        await stream.subscribe('ticks:BAD', {'ticks': 'NOT_A_SYMBOL'})
+        await stream.subscribe('balance', {'balance': 1})
+
+        task = asyncio.create_task(stream.run_forever(reconnect_delay=0.1))
+        try:
+            await asyncio.wait_for(stream.ready.wait(), 5)
+            assert list(stream.subscriptions) == ['balance']
+            assert 'balance' in stream.subscription_ids
+        finally:
+            task.cancel()
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            server.close()
+            await server.wait_closed()
+
+    asyncio.run(run())
@@ -0,0 +1,107 @@
+"""Exporter watermarks: rows are picked up by when they were written"""
+import operator
+from datetime import datetime, timedelta
+
+import pyarrow.dataset as ds
+
+import config
+from export_parquet import Exporter
+
+OPS = {'$lt': operator.lt, '$gt': operator.gt, '$gte': operator.ge}
+
+
+def matches(doc, query):
+    for field, cond in query.items():
+        if isinstance(cond, dict):
+            if field not in doc or not all(OPS[op](doc[field], v) for op, v in cond.items()):
+                return False
+        elif doc.get(field) != cond:
+            return False
+    return True
+
+
+class FakeCursor(list):
+    def sort(self, field, direction):
+        return FakeCursor(sorted(self, key=lambda d: d[field], reverse=direction < 0))
+
+    def batch_size(self, n):
+        return self
+
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = []
+
+    def with_options(self, **kwargs):
+        return self
+
+    def find(self, query):
+        return FakeCursor(dict(d) for d in self.docs if matches(d, query))
+
+    def distinct(self, field, query):
+        return list({d[field] for d in self.docs if matches(d, query)})
+
+
+class FakeMongo:
+    bucketed = False
+
+    def __init__(self):
+        self.collections = {}
+
+    def collection(self, name):
+        return self.collections.setdefault(name, FakeCollection())
+
+
+def export_at(mongo, out_dir, now, dataset):
+    exporter = Exporter(mongo, out_dir=str(out_dir))
+    exporter.until = now - timedelta(minutes=config.EXPORT_LAG_MINUTES)
+    exporter.run_id = f"{now:%Y%m%dT%H%M%S}"
+    exporter.export(dataset)
+
+
+def test_candles_written_after_the_cutoff_are_not_skipped(tmp_path):
+    mongo = FakeMongo()
+    candles = mongo.collection(config.COLL_30M)
+    day = datetime(2026, 10, 19)
+
+    def close(window_start):
+        # The aggregator writes a 30m candle 10s after its window ends
+        candles.docs.append({
+            'symbol': 'R_50', 'window_start': window_start,
+            'open': 1.0, 'high': 2.0, 'low': 0.5, 'close': 1.5,
+            'created_at': window_start + timedelta(minutes=30, seconds=10),
+        })
+
+    close(day.replace(hour=9, minute=30))
+    export_at(mongo, tmp_path, day.replace(hour=10, minute=20), 'candles_30m')
+    close(day.replace(hour=10))
+    export_at(mongo, tmp_path, day.replace(hour=10, minute=45), 'candles_30m')
+    close(day.replace(hour=10, minute=30))
+    export_at(mongo, tmp_path, day.replace(hour=11, minute=15), 'candles_30m')
+
+    table = ds.dataset(str(tmp_path / 'candles_30m'), partitioning='hive').to_table()
+    starts = sorted(t.replace(tzinfo=None) for t in table.column('window_start').to_pylist())
+    assert starts == [day.replace(hour=9, minute=30), day.replace(hour=10), day.replace(hour=10, minute=30)]
+
+
+def test_late_recorded_trade_close_is_exported(tmp_path):
+    mongo = FakeMongo()
+    trades = mongo.collection(config.COLL_TRADES)
+    now = datetime(2026, 10, 19, 12)
+
+    trades.docs.append({
+        'symbol': 'R_50', 'contract_id': 1, 'status': 'CLOSED',
+        'exit_time': now - timedelta(hours=1), 'closed_at': now - timedelta(minutes=50),
+    })
+    export_at(mongo, tmp_path, now, 'trades')
+
+    # Closed an hour ago, recorded only now (e.g. re-attached after a restart)
+    trades.docs.append({
+        'symbol': 'R_50', 'contract_id': 2, 'status': 'CLOSED',
+        'exit_time': now - timedelta(hours=1), 'closed_at': now + timedelta(minutes=1),
+    })
+    export_at(mongo, tmp_path, now + timedelta(minutes=10), 'trades')
+    export_at(mongo, tmp_path, now + timedelta(minutes=20), 'trades')
+
+    table = ds.dataset(str(tmp_path / 'trades'), partitioning='hive').to_table()
+    assert sorted(table.column('contract_id').to_pylist()) == [1, 2]
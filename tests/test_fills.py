@@ -0,0 +1,62 @@
+"""Path fill coverage: holes in the 1m/tick path fall back to the 30m result"""
+import os
+import sys
+
+import numpy as np
+
+from conftest import ROOT
+sys.path.insert(0, os.path.join(ROOT, 'services', 'backtest'))
+
+from fills import MINUTE, simulate_fills, tick_path
+
+START = np.datetime64('2024-02-19T00:00', 'ms')
+
+
+def flat_path(minutes, price=100.0):
+    t = START + np.arange(minutes) * MINUTE
+    p = np.full(minutes, price)
+    return {'t': t, 'open': p, 'high': p + 0.1, 'low': p - 0.1, 'close': p, 'bar': MINUTE, 'max_gap': MINUTE}
+
+
+def drop(path, first, last):
+    keep = (path['t'] < START + first * MINUTE) | (path['t'] >= START + last * MINUTE)
+    return {k: (v[keep] if isinstance(v, np.ndarray) and v.shape == keep.shape else v) for k, v in path.items()}
+
+
+def run(path, entries, max_hold=60):
+    entry = START + np.asarray(entries) * MINUTE
+    T = len(entry)
+    # Levels far away: every trade runs to its horizon unless the path stops
+    return simulate_fills(path, entry, np.full(T, 200.0), np.full(T, 50.0), 0, max_hold)
+
+
+def test_entry_inside_a_hole_is_not_covered():
+    path = drop(flat_path(6 * 1440), 1440, 4 * 1440)  # 3 days missing
+    fills = run(path, [0, 2 * 1440, 3 * 1440 + 30])
+    assert fills['covered'].tolist() == [True, False, False]
+
+
+def test_hole_inside_the_horizon_truncates():
+    path = drop(flat_path(600), 100, 130)
+    fills = run(path, [20, 60, 200])
+    assert fills['covered'].all()
+    assert fills['truncated'].tolist() == [False, True, False]
+    # Scanned up to the last bar before the hole, not across it
+    assert fills['exit_time'][1] == START + 100 * MINUTE
+
+
+def test_level_hit_before_the_hole_still_counts():
+    path = drop(flat_path(600), 100, 130)
+    path['high'][70] = 250.0
+    fills = run(path, [60])
+    assert fills['outcome'][0] == 'SL' and not fills['truncated'][0]
+
+
+def test_ticks_use_each_trades_own_horizon():
+    times = START + np.arange(0, 3600, 2) * np.timedelta64(1, 's')
+    path = tick_path(times, np.full(len(times), 100.0))
+    entry = START + np.array([0, 600]) * np.timedelta64(1, 's')
+    max_hold = np.searchsorted(times, entry + np.timedelta64(10, 'm')) - np.searchsorted(times, entry)
+    fills = simulate_fills(path, entry, np.full(2, 200.0), np.full(2, 50.0), 0, max_hold)
+    assert fills['exit_time'].tolist() == (entry + np.timedelta64(598, 's')).tolist()
+    assert not fills['truncated'].any()
@@ -0,0 +1,67 @@
+"""IndicatorFeed: 1m/30m indicators folded once per closed candle, across restarts"""
+import asyncio
+from datetime import datetime, timedelta
+
+from indicators import IndicatorFeed, IndicatorSet
+
+START = datetime(2026, 10, 19, 9)
+
+
+def candle(i):
+    price = 100 + (i % 7) - (i % 3)
+    return {'minute_start': START + timedelta(minutes=i),
+            'open': price, 'high': price + 1, 'low': price - 1, 'close': price + 0.5}
+
+
+class FakeAsyncDB:
+    def __init__(self):
+        self.candles = []
+        self.state = None
+
+    async def get_1m_candles(self, symbol, start, end, fields=None):
+        return [c for c in self.candles if start <= c['minute_start'] < end]
+
+    async def get_indicator_state(self, symbol, timeframe):
+        return self.state
+
+    async def save_indicator_state(self, symbol, timeframe, state):
+        self.state = state
+
+
+def reference(n):
+    ind = IndicatorSet.default()
+    for i in range(n):
+        ind.update(candle(i))
+    return ind.values
+
+
+def test_values_match_a_straight_fold_across_a_restart():
+    adb = FakeAsyncDB()
+
+    async def run():
+        feed = IndicatorFeed(adb, 'R_50', '1m')
+        for i in range(60):
+            c = candle(i)
+            c['indicators'] = await feed.close(c)
+            adb.candles.append(c)
+            await feed.save()
+        assert adb.candles[-1]['indicators'] == reference(60)
+
+        # Restart after 40 more candles were stored without the feed
+        adb.candles.extend(candle(i) for i in range(60, 100))
+        feed = IndicatorFeed(adb, 'R_50', '1m')
+        return await feed.close(candle(100))
+
+    assert asyncio.run(run()) == reference(101)
+
+
+def test_candle_already_folded_is_not_counted_twice():
+    adb = FakeAsyncDB()
+
+    async def run():
+        feed = IndicatorFeed(adb, 'R_50', '1m')
+        for i in range(30):
+            await feed.close(candle(i))
+        return await feed.close(candle(29))
+
+    assert asyncio.run(run()) == reference(30)
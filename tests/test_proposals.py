@@ -0,0 +1,69 @@
+"""ProposalBook failure handling against the local Deriv stub"""
+import asyncio
+import os
+import sys
+
+import pytest
+import websockets
+
+from conftest import ROOT
+sys.path.insert(0, os.path.join(ROOT, 'services', 'executor'))
+
+import deriv_api
+import deriv_stub
+from deriv_api import DerivStream
+from proposals import ProposalBook
+
+PLAN = {'stake': 10.0, 'contract_type': 'MULTDOWN', 'multiplier': 100, 'sl_usd': 5.0, 'tp_usd': 8.0}
+
+
+async def connected(monkeypatch):
+    server = await websockets.serve(deriv_stub.handler, '127.0.0.1', 0)
+    monkeypatch.setattr(deriv_api, 'WS_URL', f"ws://127.0.0.1:{server.sockets[0].getsockname()[1]}")
+    stream = DerivStream()
+    await stream.connect()
+    book = ProposalBook(stream)
+    stream.on('proposal', book.on_proposal)
+    return server, stream, book
+
+
+def test_failed_quote_leaves_nothing_subscribed(monkeypatch):
+    async def run():
+        server, stream, book = await connected(monkeypatch)
+        try:
+            assert await book.prefetch('NOT_A_SYMBOL', PLAN) is None
+            assert book.subscribed == {}
+            assert stream.subscriptions == {}
+
+            # No quote to buy by: the executor places a direct buy
+            assert await book.buy('NOT_A_SYMBOL', PLAN) == (None, 'direct_requote')
+        finally:
+            await stream.close()
+            server.close()
+            await server.wait_closed()
+
+    asyncio.run(run())
+
+
+def test_buy_by_prefetched_quote(monkeypatch):
+    async def run():
+        server, stream, book = await connected(monkeypatch)
+        try:
+            assert await book.prefetch('R_50', PLAN) is not None
+            buy, path = await book.buy('R_50', PLAN)
+            assert path == 'proposal' and buy['contract_id']
+            assert book.subscribed == {}
+
+            # SL/TP recomputed from the final candle: no re-quote on the order path
+            assert await book.prefetch('R_50', PLAN) is not None
+            final = dict(PLAN, sl_usd=5.4, tp_usd=8.7)
+            assert await book.buy('R_50', final) == (None, 'direct_requote')
+            assert book.subscribed == {} and book.quotes == {}
+            await asyncio.sleep(0.1)
+            assert stream.subscriptions == {}
+        finally:
+            await stream.close()
+            server.close()
+            await server.wait_closed()
+
+    asyncio.run(run())
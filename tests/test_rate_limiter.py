@@ -0,0 +1,75 @@
+"""RateLimiter with the shared Mongo store: order fast path and failing open"""
+import asyncio
+import threading
+
+from rate_limiter import RateLimiter, classify
+
+
+class SlowStore:
+    """Stands in for the rate_limits collection; optionally down"""
+
+    def __init__(self, down=False):
+        self.down = down
+        self.calls = 0
+        self.release = threading.Event()
+
+    def find_one_and_update(self, *args, **kwargs):
+        self.calls += 1
+        if self.down:
+            raise ConnectionError("store down")
+        self.release.wait(5)
+        return {'granted': True}
+
+    def update_one(self, *args, **kwargs):
+        if self.down:
+            raise ConnectionError("store down")
+
+
+def limiter(store):
+    lim = RateLimiter(store='mongo', key='test')
+    lim._coll = store
+    return lim
+
+
+def test_order_does_not_wait_for_store():
+    async def run():
+        store = SlowStore()
+        lim = limiter(store)
+        wait = await asyncio.wait_for(lim.acquire('order'), 1)
+        assert wait < 0.1
+
+        # The shared debit happens in the background
+        store.release.set()
+        await asyncio.gather(*lim._settling)
+        assert store.calls == 1
+
+    asyncio.run(run())
+
+
+def test_store_error_fails_open(capsys):
+    async def run():
+        store = SlowStore(down=True)
+        lim = limiter(store)
+        await asyncio.wait_for(lim.acquire('balance'), 1)
+        await asyncio.wait_for(lim.acquire('order'), 1)
+        await asyncio.wait_for(lim.acquire('history'), 1)
+        # Store is not retried until RATE_STORE_RETRY has passed
+        assert store.calls == 1
+
+    asyncio.run(run())
+    assert 'unavailable' in capsys.readouterr().out
+
+
+def test_order_path_calls_skip_the_store():
+    for msg in ({'forget': 'abc'}, {'proposal_open_contract': 1, 'contract_id': 1, 'subscribe': 1}):
+        assert classify(msg) == 'order'
+
+    async def run():
+        store = SlowStore()
+        lim = limiter(store)
+        wait = await asyncio.wait_for(lim.acquire(classify({'forget': 'abc'})), 1)
+        assert wait < 0.1
+        store.release.set()
+        await asyncio.gather(*lim._settling)
+
+    asyncio.run(run())
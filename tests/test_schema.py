@@ -0,0 +1,49 @@
+"""Schema versions are recorded per storage profile"""
+import config
+import schema
+
+
+class FakeCollection:
+    def __init__(self):
+        self.docs = {}
+
+    def find_one(self, query):
+        return self.docs.get(query['_id'])
+
+    def update_one(self, query, update, upsert=False):
+        doc = self.docs.setdefault(query['_id'], {'_id': query['_id']})
+        doc.update(update['$set'])
+        for field, value in update.get('$push', {}).items():
+            doc.setdefault(field, []).append(value)
+
+
+class FakeMongo:
+    def __init__(self, db, timeseries=False, bucketed=False):
+        self._db = db
+        self.timeseries = timeseries
+        self.bucketed = bucketed
+
+
+def test_other_profile_does_not_reset_the_version(monkeypatch):
+    runs = []
+    monkeypatch.setattr(schema, 'MIGRATIONS', [
+        (1, 'one', lambda mongo: runs.append((schema.profile(mongo), 1))),
+        (2, 'two', lambda mongo: runs.append((schema.profile(mongo), 2))),
+    ])
+    db = {config.COLL_SCHEMA: FakeCollection()}
+    services = FakeMongo(db)
+    tool = FakeMongo(db, bucketed=True)
+
+    assert schema.ensure_schema(services) == [1, 2]
+    assert schema.ensure_schema(tool) == [1, 2]
+    # The services' record is untouched: nothing re-runs on their next start
+    assert schema.ensure_schema(services) == []
+    assert schema.ensure_schema(tool) == []
+    assert len(runs) == 4
+
+
+def test_legacy_record_for_the_same_profile_is_honoured(monkeypatch):
+    monkeypatch.setattr(schema, 'MIGRATIONS', [(1, 'one', lambda mongo: None)])
+    coll = FakeCollection()
+    coll.docs[schema.SCHEMA_ID] = {'_id': schema.SCHEMA_ID, 'version': 1, 'profile': 'standard/document'}
+    assert schema.ensure_schema(FakeMongo({config.COLL_SCHEMA: coll})) == []
@@ -0,0 +1,49 @@
+"""Pre-authorized buy sockets (DerivAPI.warm_up) against the local Deriv stub"""
+import asyncio
+
+import websockets
+
+import deriv_api
+import deriv_stub
+from deriv_api import DerivAPI
+
+ORDER = dict(symbol='R_50', amount=10.0, multiplier=100, contract_type='MULTUP',
+             limit_order={'stop_loss': 5.0, 'take_profit': 8.0})
+
+
+def with_stub(monkeypatch, body):
+    async def run():
+        server = await websockets.serve(deriv_stub.handler, '127.0.0.1', 0)
+        monkeypatch.setattr(deriv_api, 'WS_URL', f"ws://127.0.0.1:{server.sockets[0].getsockname()[1]}")
+        try:
+            await body(DerivAPI(use_auth=True))
+        finally:
+            server.close()
+            await server.wait_closed()
+
+    asyncio.run(run())
+
+
+def test_pinged_socket_is_used_for_the_buy(monkeypatch):
+    async def body(api):
+        await api.warm_up()
+        await api.keep_warm()
+        ws, warm = await asyncio.to_thread(api._take_ws)
+        assert warm
+        await asyncio.to_thread(ws.close)
+
+    with_stub(monkeypatch, body)
+
+
+def test_socket_closed_by_the_server_is_not_used(monkeypatch):
+    async def body(api):
+        await api.warm_up()
+        for session in list(deriv_stub.sessions):
+            session.ws.transport.abort()  # dropped connection
+        await asyncio.sleep(0.1)
+
+        buy = await api.buy_contract(**ORDER)
+        assert buy['contract_id']
+        assert api._warm == []
+
+    with_stub(monkeypatch, body)